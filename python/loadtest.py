@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+"""
+loadtest.py
+
+추천/OCR 엔드포인트 부하 테스트 (오프라인, 로컬 서버 + 픽스처 데이터)
+- RecommendService.cs가 보내는 RecommendRequest 형태의 요청을 재생
+  (기록된 요청 파일 또는 픽스처 후보군에서 뽑은 합성 대상 물건)
+- RegistryOcrService.cs와 같은 multipart("file") 형태로 샘플 PDF 업로드
+- 동시 요청 수(--concurrency)와 초당 요청 수(--rate) 조절, 요청 수 또는 시간으로 종료
+- 처리량, p50/p95/p99 지연, 오류율을 엔드포인트별 JSON으로 출력
+- --target inprocess: 서버 없이 process_recommend/process_pdf를 스레드에서 직접 호출
+
+Usage:
+    python loadtest.py --fixture cases.json --count 500 --concurrency 8
+    python loadtest.py --requests recorded.jsonl --rate 20 --duration 60
+    python loadtest.py --fixture cases.json --pdf ./samples --ocr-ratio 0.2 --count 200
+    python loadtest.py --fixture cases.json --target inprocess --count 100
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_TARGET = "http://localhost:8000"   # PythonBackendService.DefaultServerUrl
+RECOMMEND_ENDPOINT = "/api/recommend"
+OCR_ENDPOINT = "/api/ocr/registry"
+TIMEOUT_SEC = 300.0                          # C# HttpClient.Timeout (5분)
+
+# RecommendSubject 필드 (RecommendService.cs)
+SUBJECT_FIELDS = [
+    "property_id",
+    "address",
+    "usage",
+    "region_big",
+    "region_mid",
+    "latitude",
+    "longitude",
+    "building_area",
+    "land_area",
+    "building_appraisal_price",
+    "land_appraisal_price",
+    "auction_date",
+]
+
+
+# -----------------------
+# 요청 준비
+# -----------------------
+def load_recorded_requests(path: str) -> List[Dict[str, Any]]:
+    """기록된 RecommendRequest 로드 (JSON 객체/배열 또는 NDJSON)."""
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if not text:
+        return []
+    if text[0] in "[{":
+        try:
+            data = json.loads(text)
+            return data if isinstance(data, list) else [data]
+        except json.JSONDecodeError:
+            pass
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _clean(value: Any) -> Any:
+    """JSON 직렬화용 값 정리 (NaN/NaT → None, numpy/Timestamp → 기본 타입)."""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()[:10]
+    if hasattr(value, "item"):
+        value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+    return value
+
+
+def synthesize_requests(
+    fixture_path: str,
+    n: int,
+    candidates_source: str = "json",
+    candidates_path: Optional[str] = None,
+    rule_index: Optional[int] = None,
+    similar_land: bool = False,
+    region_scope: str = "big",
+    topk: int = 10,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    픽스처 후보군에서 행을 뽑아 합성 RecommendRequest 생성.
+
+    실제 경매 물건을 대상으로 쓰므로 지역/용도/좌표 분포가 운영 요청과 비슷하다.
+
+    Args:
+        fixture_path: 후보군 JSON/NDJSON 파일
+        n: 생성할 요청 수 (픽스처보다 많으면 중복 허용)
+        candidates_source, candidates_path: 요청에 넣을 후보군 소스 (기본: 픽스처 파일 자체)
+        rule_index, similar_land, region_scope, topk: RecommendRequest 옵션
+        seed: 난수 시드
+
+    Returns:
+        RecommendRequest dict 목록
+    """
+    from recommend.json_stream import load_json_candidates
+
+    df = load_json_candidates(fixture_path)
+    columns = [c for c in SUBJECT_FIELDS if c in df.columns]
+    rows = df[columns].to_dict("records")
+    if not rows:
+        return []
+
+    rng = random.Random(seed)
+    picked = rng.sample(rows, n) if n <= len(rows) else [rng.choice(rows) for _ in range(n)]
+
+    requests = []
+    for i, row in enumerate(picked):
+        subject = {k: _clean(v) for k, v in row.items()}
+        subject["property_id"] = f"load-{i}"
+        requests.append({
+            "subject": subject,
+            "rule_index": rule_index,
+            "similar_land": similar_land,
+            "region_scope": region_scope,
+            "topk": topk,
+            "candidates_source": candidates_source,
+            "candidates_path": candidates_path or fixture_path,
+            "supabase_url": None,
+            "supabase_key": None,
+        })
+    return requests
+
+
+def collect_pdfs(paths: List[str]) -> List[Path]:
+    """PDF 파일/디렉토리 목록 → PDF 파일 목록."""
+    pdfs: List[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            pdfs.extend(sorted(p.glob("*.pdf")))
+        elif p.exists():
+            pdfs.append(p)
+    return pdfs
+
+
+# -----------------------
+# 요청 실행
+# -----------------------
+class HttpRunner:
+    """로컬 서버로 요청 전송 (httpx 비동기 클라이언트 하나를 공유)."""
+
+    def __init__(self, target: str, concurrency: int, timeout: float = TIMEOUT_SEC):
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            base_url=target.rstrip("/"),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+
+    async def recommend(self, payload: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
+        resp = await self._client.post(RECOMMEND_ENDPOINT, json=payload)
+        return resp.status_code, _body_error(resp.status_code, resp.content)
+
+    async def ocr(self, pdf: Path) -> Tuple[Optional[int], Optional[str]]:
+        files = {"file": (pdf.name, pdf.read_bytes(), "application/pdf")}
+        resp = await self._client.post(OCR_ENDPOINT, files=files)
+        return resp.status_code, _body_error(resp.status_code, resp.content)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class InProcessRunner:
+    """서버 없이 현재 프로세스에서 직접 실행 (스레드 풀, 서버 오버헤드 제외한 처리 비용 측정)."""
+
+    def __init__(self):
+        import recommend_processor
+
+        self._processor = recommend_processor
+
+    async def recommend(self, payload: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
+        kwargs = {k: v for k, v in payload.items() if k not in ("supabase_url", "supabase_key")}
+        result = await asyncio.to_thread(self._processor.process_recommend, **kwargs)
+        return None, None if result.get("success") else str(result.get("error"))
+
+    async def ocr(self, pdf: Path) -> Tuple[Optional[int], Optional[str]]:
+        import ocr_processor
+
+        result = await asyncio.to_thread(ocr_processor.process_pdf, str(pdf))
+        return None, None if result.get("success") else str(result.get("error"))
+
+    async def aclose(self) -> None:
+        pass
+
+
+def _body_error(status: int, body: bytes) -> Optional[str]:
+    """HTTP 응답 → 오류 메시지 (2xx + success!=False면 None)."""
+    if not 200 <= status < 300:
+        return f"HTTP {status}"
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return "invalid JSON"
+    if isinstance(data, dict) and data.get("success") is False:
+        return str(data.get("error") or "success=false")
+    return None
+
+
+# -----------------------
+# 부하 생성
+# -----------------------
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """정렬된 값의 분위수 (선형 보간)."""
+    if not sorted_values:
+        return None
+    pos = q * (len(sorted_values) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize(samples: List[Tuple[str, float, Optional[int], Optional[str]]], elapsed: float) -> Dict[str, Any]:
+    """(kind, latency, status, error) 목록 → 엔드포인트별 요약."""
+    report: Dict[str, Any] = {}
+    for kind in sorted({s[0] for s in samples}):
+        rows = [s for s in samples if s[0] == kind]
+        latencies = sorted(s[1] for s in rows)
+        errors = [s[3] for s in rows if s[3]]
+        status: Dict[str, int] = {}
+        for s in rows:
+            if s[2] is not None:
+                status[str(s[2])] = status.get(str(s[2]), 0) + 1
+        top_errors: Dict[str, int] = {}
+        for e in errors:
+            top_errors[e[:120]] = top_errors.get(e[:120], 0) + 1
+        report[kind] = {
+            "requests": len(rows),
+            "errors": len(errors),
+            "error_rate": round(len(errors) / len(rows), 4),
+            "throughput_rps": round(len(rows) / elapsed, 2) if elapsed > 0 else None,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50) * 1000, 1),
+                "p95": round(percentile(latencies, 0.95) * 1000, 1),
+                "p99": round(percentile(latencies, 0.99) * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1),
+                "mean": round(sum(latencies) / len(latencies) * 1000, 1),
+            },
+            "status": status,
+            "top_errors": dict(sorted(top_errors.items(), key=lambda kv: -kv[1])[:5]),
+        }
+    return report
+
+
+async def run_load(
+    runner: Any,
+    requests: List[Dict[str, Any]],
+    pdfs: List[Path],
+    concurrency: int = 4,
+    rate: float = 0.0,
+    count: Optional[int] = None,
+    duration: Optional[float] = None,
+    ocr_ratio: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    부하 실행.
+
+    rate가 0이면 closed-loop (concurrency개 작업자가 쉬지 않고 요청),
+    rate > 0이면 open-loop (초당 rate건을 일정 간격으로 시작, 동시 실행은 concurrency로 제한).
+    open-loop 지연은 예정 시작 시각부터 측정하므로 서버가 밀리면 대기 시간까지 포함된다.
+
+    Args:
+        runner: HttpRunner 또는 InProcessRunner
+        requests: 재생할 RecommendRequest 목록 (순환)
+        pdfs: 업로드할 PDF 목록 (순환)
+        concurrency: 최대 동시 요청 수
+        rate: 초당 요청 수 (0이면 최대 속도)
+        count: 총 요청 수 (None이면 duration까지)
+        duration: 최대 실행 시간 (초)
+        ocr_ratio: 전체 요청 중 OCR 요청 비율 (0~1, 일정 간격으로 섞음)
+
+    Returns:
+        {"config", "elapsed_sec", "endpoints": {recommend/ocr: 요약}}
+    """
+    if not requests and not pdfs:
+        raise ValueError("재생할 추천 요청이나 PDF가 없습니다.")
+    if not pdfs:
+        ocr_ratio = 0.0
+    elif not requests:
+        ocr_ratio = 1.0
+    if count is None and duration is None:
+        count = len(requests) or len(pdfs)
+
+    rec_cycle = itertools.cycle(requests) if requests else None
+    pdf_cycle = itertools.cycle(pdfs) if pdfs else None
+    samples: List[Tuple[str, float, Optional[int], Optional[str]]] = []
+    jobs = itertools.count()
+
+    def next_job() -> Tuple[str, Any]:
+        i = next(jobs)
+        if pdf_cycle is not None and math.floor((i + 1) * ocr_ratio) > math.floor(i * ocr_ratio):
+            return "ocr", next(pdf_cycle)
+        return "recommend", next(rec_cycle)
+
+    async def execute(kind: str, item: Any, started: float) -> None:
+        try:
+            if kind == "ocr":
+                status, error = await runner.ocr(item)
+            else:
+                status, error = await runner.recommend(item)
+        except Exception as e:
+            status, error = None, f"{type(e).__name__}: {e}"
+        samples.append((kind, time.perf_counter() - started, status, error))
+
+    t0 = time.perf_counter()
+    deadline = t0 + duration if duration else math.inf
+    issued = itertools.count()
+
+    def more() -> bool:
+        return time.perf_counter() < deadline
+
+    if rate <= 0:
+        async def worker() -> None:
+            while more() and (count is None or next(issued) < count):
+                kind, item = next_job()
+                await execute(kind, item, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    else:
+        sem = asyncio.Semaphore(concurrency)
+        pending = set()
+
+        async def limited(kind: str, item: Any, started: float) -> None:
+            async with sem:
+                await execute(kind, item, started)
+
+        for i in itertools.count():
+            if count is not None and i >= count:
+                break
+            scheduled = t0 + i / rate
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind, item = next_job()
+            task = asyncio.ensure_future(limited(kind, item, scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "elapsed_sec": round(elapsed, 3),
+        "endpoints": summarize(samples, elapsed),
+    }
+
+
+# -----------------------
+# CLI
+# -----------------------
+async def _main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    requests: List[Dict[str, Any]] = []
+    if args.requests:
+        requests = load_recorded_requests(args.requests)
+    elif args.fixture:
+        requests = synthesize_requests(
+            args.fixture,
+            args.synthetic,
+            candidates_source=args.candidates_source,
+            candidates_path=args.candidates_path,
+            rule_index=args.rule_index,
+            similar_land=args.similar_land,
+            region_scope=args.region_scope,
+            topk=args.topk,
+            seed=args.seed,
+        )
+    pdfs = collect_pdfs(args.pdf or [])
+
+    runner = InProcessRunner() if args.target == "inprocess" else HttpRunner(args.target, args.concurrency)
+    try:
+        if args.warmup:
+            await run_load(runner, requests, pdfs, args.concurrency, count=args.warmup,
+                           ocr_ratio=args.ocr_ratio)
+        report = await run_load(
+            runner,
+            requests,
+            pdfs,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            count=args.count,
+            duration=args.duration,
+            ocr_ratio=args.ocr_ratio,
+        )
+    finally:
+        await runner.aclose()
+
+    report["config"] = {
+        "target": args.target,
+        "concurrency": args.concurrency,
+        "rate": args.rate or None,
+        "count": args.count,
+        "duration": args.duration,
+        "ocr_ratio": args.ocr_ratio,
+        "recommend_payloads": len(requests),
+        "pdfs": len(pdfs),
+        "warmup": args.warmup,
+    }
+    report["success"] = True
+    return report
+
+
+def main():
+    """메인 진입점"""
+    parser = argparse.ArgumentParser(description="NPLogic 추천/OCR 부하 테스트")
+    parser.add_argument(
+        "--target",
+        default=DEFAULT_TARGET,
+        help=f"서버 주소 (기본: {DEFAULT_TARGET}, inprocess면 서버 없이 직접 실행)",
+    )
+    parser.add_argument("--requests", help="기록된 RecommendRequest 파일 (JSON 배열 또는 NDJSON)")
+    parser.add_argument("--fixture", help="합성 요청용 후보군 픽스처 (JSON/NDJSON)")
+    parser.add_argument("--synthetic", type=int, default=200, help="합성 요청 수 (기본: 200)")
+    parser.add_argument(
+        "--candidates-source",
+        default="json",
+        choices=["supabase", "json", "excel", "snapshot"],
+        help="합성 요청의 candidates_source (기본: json)",
+    )
+    parser.add_argument(
+        "--candidates-path",
+        help="합성 요청의 candidates_path (기본: --fixture 파일)",
+    )
+    parser.add_argument("--rule-index", type=int, help="합성 요청의 rule_index")
+    parser.add_argument("--similar-land", action="store_true", help="합성 요청의 similar_land")
+    parser.add_argument("--region-scope", default="big", choices=["big", "mid"])
+    parser.add_argument("--topk", type=int, default=10)
+    parser.add_argument("--pdf", nargs="*", help="OCR 샘플 PDF 파일 또는 디렉토리")
+    parser.add_argument("--ocr-ratio", type=float, default=0.0, help="OCR 요청 비율 0~1 (기본: 0)")
+    parser.add_argument("--concurrency", type=int, default=4, help="최대 동시 요청 수 (기본: 4)")
+    parser.add_argument("--rate", type=float, default=0.0, help="초당 요청 수 (기본: 0 = 최대 속도)")
+    parser.add_argument("--count", type=int, help="총 요청 수 (기본: 요청 목록 한 바퀴)")
+    parser.add_argument("--duration", type=float, help="최대 실행 시간 (초)")
+    parser.add_argument("--warmup", type=int, default=0, help="측정 전 버리는 요청 수")
+    parser.add_argument("--seed", type=int, default=0, help="합성 요청 난수 시드")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (기본: stdout만)")
+    args = parser.parse_args()
+
+    if not (args.requests or args.fixture or args.pdf):
+        print(json.dumps({
+            "success": False,
+            "error": "--requests, --fixture, --pdf 중 하나가 필요합니다.",
+        }, ensure_ascii=False))
+        sys.exit(1)
+
+    try:
+        report = asyncio.run(_main_async(args))
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}, ensure_ascii=False))
+        sys.exit(1)
+
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload, encoding="utf-8")
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py
+
+백엔드 프로세스 내부 성능 지표 (표준 라이브러리만 사용)
+- 히스토그램: 엔드포인트별 요청 지연, 규칙 평가 시간, 후보군 로드 시간, OCR 처리 시간
+- 카운터/게이지: OCR 페이지 수, OCR pages/sec, 캐시 hit/miss
+- Prometheus 텍스트 포맷과 JSON 스냅샷으로 조회
+- 로컬 HTTP 엔드포인트(serve_metrics, warm 워커 --metrics-port) 또는 ASGI 앱/미들웨어로 상주 서버에 연결
+- fork 방식 warm 워커는 요청을 처리한 자식 프로세스의 지표 증분을 부모로 합침(ForkCollector)
+
+핫패스 비용: 관측 1회 = 락 1번 + bisect 1번 (수 µs 이하)
+
+Usage (상주 서버):
+    from metrics import MetricsMiddleware, metrics_asgi_app
+    app.add_middleware(MetricsMiddleware)
+    app.mount("/metrics", metrics_asgi_app)   # /metrics (텍스트), /metrics/json
+"""
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# -----------------------
+# 설정
+# -----------------------
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_HOST = "127.0.0.1"
+
+HELP = {
+    "nplogic_http_request_seconds": "엔드포인트별 요청 처리 시간",
+    "nplogic_worker_request_seconds": "warm 워커 요청 처리 시간",
+    "nplogic_candidate_load_seconds": "후보군 로드 시간",
+    "nplogic_rule_eval_seconds": "규칙별 평가 시간 (스트림 소비 시간 제외)",
+    "nplogic_recommend_total": "추천 처리 건수",
+    "nplogic_ocr_seconds": "등기부 OCR 처리 시간",
+    "nplogic_ocr_pages_total": "OCR 처리 페이지 수",
+    "nplogic_ocr_pages_per_second": "최근 OCR 처리 속도",
+    "nplogic_cache_requests_total": "캐시 조회 (result=hit/miss)",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in items
+    )
+    return "{" + body + "}"
+
+
+def _round(v: Optional[float]) -> Optional[float]:
+    return None if v is None else round(v, 6)
+
+
+def _format_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+# -----------------------
+# 지표 저장소
+# -----------------------
+class Histogram:
+    """고정 버킷 히스토그램 (버킷별 개수는 누적하지 않고 저장, 출력 시 누적)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        out, total = [], 0
+        for bound, c in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += c
+            out.append((bound, total))
+        return out
+
+    def quantile(self, q: float) -> Optional[float]:
+        """버킷 내 선형 보간 근사 분위수 (histogram_quantile과 같은 방식, JSON 스냅샷용)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, prev = 0.0, 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float("inf"):
+                    return lower      # 마지막 버킷을 넘으면 최대 유한 상한
+                return lower + (bound - lower) * (rank - prev) / max(total - prev, 1)
+            lower, prev = bound, total
+        return lower
+
+
+class Registry:
+    """
+    히스토그램/카운터/게이지 저장소.
+
+    지표 이름 + 라벨 조합별로 값을 보관한다. collector를 등록하면
+    스냅샷 시점에 외부 모듈의 카운터(캐시 통계 등)를 읽어 합친다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._collectors: Dict[str, Callable[[], List[Tuple[str, str, Dict[str, Any], float]]]] = {}
+        self.started = time.time()
+
+    # 기록
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._hist.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t, **labels)
+
+    def register_collector(
+        self,
+        key: str,
+        fn: Callable[[], List[Tuple[str, str, Dict[str, Any], float]]],
+    ) -> None:
+        """
+        외부 통계 collector 등록 (같은 key는 덮어씀).
+
+        fn() → [(지표 이름, "counter" 또는 "gauge", 라벨, 값), ...]
+        """
+        with self._lock:
+            self._collectors[key] = fn
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def reset_after_fork(self) -> None:
+        """fork된 자식에서 호출: 부모의 다른 스레드가 잡고 있던 락일 수 있으므로 새로 만들고 값을 비운다."""
+        self._lock = threading.Lock()
+        self._hist, self._counters, self._gauges = {}, {}, {}
+
+    # 프로세스 간 전달
+    def export_state(self) -> Dict[str, Any]:
+        """합칠 수 있는 원시 값 (collector 값은 카운터/게이지에 포함). merge_state의 입력."""
+        hist, counters, gauges = self._collect()
+        return {
+            "histograms": [
+                (name, key, buckets, counts, total, count)
+                for name, series in hist.items()
+                for key, (buckets, counts, total, count) in series.items()
+            ],
+            "counters": [(n, k, v) for n, series in counters.items() for k, v in series.items()],
+            "gauges": [(n, k, v) for n, series in gauges.items() for k, v in series.items()],
+        }
+
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        """export_state 값을 더함 (히스토그램/카운터는 누적, 게이지는 덮어씀)."""
+        with self._lock:
+            for name, key, buckets, counts, total, count in state["histograms"]:
+                key = tuple(map(tuple, key))
+                series = self._hist.setdefault(name, {})
+                hist = series.get(key)
+                if hist is None:
+                    hist = series[key] = Histogram(tuple(buckets))
+                hist.counts = [a + b for a, b in zip(hist.counts, counts)]
+                hist.sum += total
+                hist.count += count
+            for name, key, value in state["counters"]:
+                series = self._counters.setdefault(name, {})
+                key = tuple(map(tuple, key))
+                series[key] = series.get(key, 0) + value
+            for name, key, value in state["gauges"]:
+                self._gauges.setdefault(name, {})[tuple(map(tuple, key))] = value
+
+    # 조회
+    def _collect(self) -> Tuple[Dict, Dict, Dict]:
+        with self._lock:
+            hist = {
+                n: {k: (h.buckets, list(h.counts), h.sum, h.count) for k, h in s.items()}
+                for n, s in self._hist.items()
+            }
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            gauges = {n: dict(s) for n, s in self._gauges.items()}
+            collectors = list(self._collectors.values())
+
+        for fn in collectors:
+            try:
+                rows = fn()
+            except Exception:
+                continue
+            for name, kind, labels, value in rows:
+                target = counters if kind == "counter" else gauges
+                series = target.setdefault(name, {})
+                key = _label_key(labels)
+                series[key] = series.get(key, 0) + value if kind == "counter" else value
+        return hist, counters, gauges
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON 직렬화 가능한 스냅샷 (히스토그램은 count/sum/avg/p50/p95/p99 근사 포함)."""
+        hist, counters, gauges = self._collect()
+        out: Dict[str, Any] = {"uptime_sec": round(time.time() - self.started, 3)}
+
+        histograms: Dict[str, List[Dict[str, Any]]] = {}
+        for name, series in sorted(hist.items()):
+            rows = []
+            for key, (buckets, counts, total, count) in sorted(series.items()):
+                h = Histogram(buckets)
+                h.counts, h.sum, h.count = counts, total, count
+                rows.append({
+                    "labels": dict(key),
+                    "count": count,
+                    "sum": round(total, 6),
+                    "avg": round(total / count, 6) if count else None,
+                    "p50": _round(h.quantile(0.50)),
+                    "p95": _round(h.quantile(0.95)),
+                    "p99": _round(h.quantile(0.99)),
+                })
+            histograms[name] = rows
+        out["histograms"] = histograms
+
+        for field, data in (("counters", counters), ("gauges", gauges)):
+            out[field] = {
+                name: [{"labels": dict(k), "value": v} for k, v in sorted(series.items())]
+                for name, series in sorted(data.items())
+            }
+        return out
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        hist, counters, gauges = self._collect()
+        lines: List[str] = []
+
+        def header(name: str, kind: str) -> None:
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in sorted(hist.items()):
+            header(name, "histogram")
+            for key, (buckets, counts, total, count) in sorted(series.items()):
+                h = Histogram(buckets)
+                h.counts = counts
+                for bound, cum in h.cumulative():
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cum}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+
+        for kind, data in (("counter", counters), ("gauge", gauges)):
+            for name, series in sorted(data.items()):
+                header(name, kind)
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set_gauge
+timer = REGISTRY.timer
+register_collector = REGISTRY.register_collector
+snapshot = REGISTRY.snapshot
+render_prometheus = REGISTRY.render_prometheus
+
+
+# -----------------------
+# fork 워커: 자식 프로세스 지표 합치기
+# -----------------------
+def state_delta(after: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    export_state 두 시점의 증분 (before 이후 새로 쌓인 값).
+
+    히스토그램은 before가 비어 있는 상태(reset 직후)를 가정하고 after를 그대로 쓴다.
+    """
+    prev = {(n, k): v for n, k, v in before["counters"]}
+    counters = [(n, k, v - prev.get((n, k), 0)) for n, k, v in after["counters"]]
+    return {
+        "histograms": after["histograms"],
+        "counters": [c for c in counters if c[2]],
+        "gauges": after["gauges"],
+    }
+
+
+class ForkCollector:
+    """
+    요청마다 fork되는 자식 프로세스의 지표를 부모 레지스트리로 합친다.
+
+    부모는 start()로 수신 스레드를 띄우고, 자식은 요청 처리를 child()로 감싼다.
+    자식은 시작 시 fork로 물려받은 값을 비우고, 끝날 때 이번 요청의 증분만 부모로 보낸다.
+    """
+
+    def __init__(self, registry: Optional[Registry] = None):
+        import multiprocessing
+
+        self.registry = registry or REGISTRY
+        self._queue = multiprocessing.SimpleQueue()
+
+    def start(self) -> None:
+        threading.Thread(target=self._receive, name="metrics-merge", daemon=True).start()
+
+    def _receive(self) -> None:
+        while True:
+            self.registry.merge_state(self._queue.get())
+
+    @contextmanager
+    def child(self) -> Iterator[None]:
+        self.registry.reset_after_fork()
+        before = self.registry.export_state()
+        try:
+            yield
+        finally:
+            self._queue.put(state_delta(self.registry.export_state(), before))
+
+
+# -----------------------
+# 노출: 로컬 HTTP / ASGI
+# -----------------------
+def serve_metrics(port: int, host: str = METRICS_HOST) -> Any:
+    """
+    백그라운드 스레드에서 지표 HTTP 서버 실행.
+
+    GET /metrics → Prometheus 텍스트, GET /metrics.json → JSON 스냅샷.
+
+    Returns:
+        ThreadingHTTPServer (shutdown()으로 종료)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path == "/metrics":
+                body = render_prometheus().encode("utf-8")
+                ctype = "text/plain; version=0.0.4; charset=utf-8"
+            elif path in ("/metrics.json", "/metrics/json"):
+                body = json.dumps(snapshot(), ensure_ascii=False).encode("utf-8")
+                ctype = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+async def metrics_asgi_app(scope, receive, send) -> None:
+    """
+    지표 조회 ASGI 앱 (mount 경로 기준 "/" → 텍스트, "/json" → JSON).
+    """
+    if scope["type"] != "http":
+        return
+    path = scope.get("path", "").rstrip("/")
+    if path.endswith("/json") or path.endswith(".json"):
+        body = json.dumps(snapshot(), ensure_ascii=False).encode("utf-8")
+        ctype = b"application/json"
+    else:
+        body = render_prometheus().encode("utf-8")
+        ctype = b"text/plain; version=0.0.4; charset=utf-8"
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", ctype), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class MetricsMiddleware:
+    """
+    요청 지연 히스토그램 ASGI 미들웨어 (nplogic_http_request_seconds{method, path, status}).
+
+    경로 라벨은 라우트 템플릿이 있으면 그것을, 없으면 실제 경로를 쓴다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        t = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or scope.get("path", "")
+            observe(
+                "nplogic_http_request_seconds",
+                time.perf_counter() - t,
+                method=scope.get("method", ""),
+                path=path,
+                status=status["code"],
+            )
@@ -2,84 +2,309 @@
 NPLogic OCR Processor
 
 등기부등본 PDF에서 데이터를 추출하는 OCR 프로세서
-실제 클라이언트 제공 코드로 대체 필요
+- 텍스트 레이어에 구간 제목이 있으면 OCR 없이 추출 텍스트를 그대로 사용
+- 스캔 PDF는 제목 탐지용 저해상도 OCR로 구간 경계를 찾고, 표제부/갑구/을구 구간만 고해상도 OCR
+- --mode full 로 전체 문서 OCR 강제 가능
+- 구간 텍스트 → owners/rights/land_info 파싱은 registry_parser.py
 """
 
+import argparse
+import re
 import sys
 import json
+import time
 from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from registry_parser import parse_land_info, parse_owners, parse_registry_id, parse_rights
 
-def process_pdf(pdf_path: str) -> dict:
+
+# -----------------------
+# OCR 설정
+# -----------------------
+MODE_SECTIONS = "sections"   # 필요한 구간만 고해상도 OCR (기본)
+MODE_FULL = "full"           # 전체 페이지 고해상도 OCR
+MODE_TEXT = "text"           # 텍스트 레이어 사용 (OCR 없음, 통계용)
+
+LOW_DPI = 150                # 구간 제목 탐지용 (60 DPI에서는 한글 제목이 거의 인식되지 않음)
+FULL_DPI = 300               # 본 인식용 해상도
+OCR_LANG = "kor+eng"
+BAND_MARGIN = 0.01           # 구간 crop 여유 (페이지 높이 비율)
+
+# 구간 이름 (공백 제거 후 비교)
+SEC_HEADER = "header"        # 1페이지 상단 (고유번호, 부동산 종류/주소)
+SEC_TITLE = "표제부"
+SEC_GAP = "갑구"
+SEC_EUL = "을구"
+SEC_SUMMARY = "주요등기사항요약"
+
+TARGET_SECTIONS = (SEC_TITLE, SEC_GAP, SEC_EUL)
+
+_HEADING_RE = re.compile(r"【?(표제부|갑구|을구)】?|(주요등기사항요약)")
+
+
+# -----------------------
+# 구간 탐지
+# -----------------------
+def _match_heading(line: str) -> Optional[str]:
+    """한 줄 텍스트가 구간 제목이면 구간 이름 반환."""
+    compact = re.sub(r"\s+", "", line or "")
+    if not compact or len(compact) > 40:
+        return None
+    m = _HEADING_RE.search(compact)
+    if not m:
+        return None
+    name = m.group(1) or m.group(2)
+    # 본문 중 '을구' 등 단어와 구분: 괄호 제목이거나 줄 맨 앞일 때만 인정
+    if name != SEC_SUMMARY and "【" not in compact and not compact.startswith(name):
+        return None
+    return name
+
+
+def split_sections(lines: Iterable[str], current: str = SEC_HEADER) -> Dict[str, str]:
+    """본문 줄을 제목 줄 기준으로 구간별 텍스트로 분리 (제목 이전은 머리말)."""
+    texts: Dict[str, List[str]] = {}
+    for line in lines:
+        name = _match_heading(line)
+        if name:
+            current = name
+        texts.setdefault(current, []).append(line)
+    return {k: "\n".join(v) for k, v in texts.items()}
+
+
+def extract_text_layer(pdf_path: str) -> Tuple[int, Dict[str, str]]:
+    """
+    텍스트 레이어에서 구간별 텍스트 추출 (OCR 없음).
+
+    Returns:
+        (페이지 수, {구간명: 텍스트}) - 텍스트 레이어가 없으면 머리말만 비어 있는 dict
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(pdf_path)
+    lines: List[str] = []
+    for page in reader.pages:
+        lines.extend((page.extract_text() or "").splitlines())
+    return len(reader.pages), split_sections(lines)
+
+
+def find_headings_low_dpi(pdf_path: str, dpi: int = LOW_DPI) -> Tuple[int, List[Tuple[int, float, str]]]:
+    """
+    저해상도 렌더링 + OCR 단어 박스로 구간 제목 위치 탐지 (스캔 PDF용).
+
+    Returns:
+        (페이지 수, [(page_index, y_frac, section)]) - y_frac은 페이지 상단 기준 비율
+    """
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(pdf_path, dpi=dpi, grayscale=True)
+    headings: List[Tuple[int, float, str]] = []
+
+    for page_idx, img in enumerate(images):
+        data = pytesseract.image_to_data(
+            img, lang=OCR_LANG, output_type=pytesseract.Output.DICT
+        )
+        lines: Dict[Tuple[int, int, int], List[Tuple[int, str]]] = {}
+        for i, word in enumerate(data["text"]):
+            if not word or not word.strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append((data["top"][i], word))
+
+        found = []
+        for words in lines.values():
+            name = _match_heading("".join(w for _, w in words))
+            if name:
+                top = min(t for t, _ in words)
+                found.append((top / float(img.height or 1), name))
+        headings.extend((page_idx, y_frac, name) for y_frac, name in sorted(found))
+
+    return len(images), headings
+
+
+def build_section_bands(
+    page_count: int,
+    headings: List[Tuple[int, float, str]],
+    targets: Tuple[str, ...] = TARGET_SECTIONS,
+) -> List[Tuple[int, float, float, str]]:
+    """
+    제목 위치로부터 구간별 (page_index, y0, y1, section) 영역 목록 생성.
+
+    각 구간은 자기 제목부터 다음 제목 직전까지이며, 페이지를 넘어가면
+    중간 페이지는 전체, 마지막 페이지는 다음 제목 위까지로 자른다.
+    """
+    bands: List[Tuple[int, float, float, str]] = []
+    if not headings:
+        return bands
+
+    # 1페이지 상단 머리말 (고유번호/부동산 표시)
+    first_page, first_y, _ = headings[0]
+    if first_page == 0 and first_y > 0:
+        bands.append((0, 0.0, first_y, SEC_HEADER))
+
+    bounds = list(headings) + [(page_count - 1, 1.0, "")]
+    for (p0, y0, name), (p1, y1, _) in zip(bounds, bounds[1:]):
+        if name not in targets:
+            continue
+        for p in range(p0, p1 + 1):
+            top = y0 if p == p0 else 0.0
+            bottom = y1 if p == p1 else 1.0
+            if bottom > top:
+                bands.append((p, top, bottom, name))
+
+    return bands
+
+
+# -----------------------
+# 본 인식 (고해상도)
+# -----------------------
+def _ocr_image(img) -> str:
+    import pytesseract
+
+    return pytesseract.image_to_string(img, lang=OCR_LANG, config="--psm 6")
+
+
+def ocr_bands(pdf_path: str, bands: List[Tuple[int, float, float, str]], dpi: int = FULL_DPI) -> Dict[str, str]:
+    """대상 페이지만 고해상도로 렌더링하고 구간 영역만 잘라 OCR."""
+    from pdf2image import convert_from_path
+
+    texts: Dict[str, List[str]] = {}
+    pages = sorted({b[0] for b in bands})
+    for page_idx in pages:
+        img = convert_from_path(
+            pdf_path, dpi=dpi, first_page=page_idx + 1, last_page=page_idx + 1
+        )[0]
+        for p, y0, y1, name in bands:
+            if p != page_idx:
+                continue
+            top = int(max(y0 - BAND_MARGIN, 0.0) * img.height)
+            bottom = int(min(y1 + BAND_MARGIN, 1.0) * img.height)
+            texts.setdefault(name, []).append(_ocr_image(img.crop((0, top, img.width, bottom))))
+
+    return {k: "\n".join(v) for k, v in texts.items()}
+
+
+def ocr_full_document(pdf_path: str, dpi: int = FULL_DPI) -> Tuple[int, Dict[str, str]]:
+    """전체 페이지 OCR 후 본문 텍스트의 제목 줄로 구간 분리."""
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(pdf_path, dpi=dpi)
+    lines: List[str] = []
+    for img in images:
+        lines.extend(_ocr_image(img).splitlines())
+    return len(images), split_sections(lines)
+
+
+def recognize_sections(pdf_path: str, mode: str = MODE_SECTIONS) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    등기부 구간별 텍스트 인식.
+
+    Args:
+        pdf_path: PDF 파일 경로
+        mode: "sections" (필요 구간만) 또는 "full" (전체 문서)
+
+    Returns:
+        ({구간명: 텍스트}, OCR 통계 dict)
+    """
+    if mode != MODE_FULL:
+        # 1) 텍스트 레이어에 구간이 있으면 OCR 없이 사용
+        try:
+            page_count, sections = extract_text_layer(pdf_path)
+        except Exception:
+            page_count, sections = 0, {}
+        if any(name in sections for name in TARGET_SECTIONS):
+            return sections, {
+                "mode": MODE_TEXT,
+                "pages_total": page_count,
+                "pages_ocr": 0,
+            }
+
+        # 2) 스캔 PDF: 제목 위치 탐지 후 필요한 구간만 고해상도 OCR
+        page_count, headings = find_headings_low_dpi(pdf_path)
+        bands = build_section_bands(page_count, headings)
+        if any(b[3] in TARGET_SECTIONS for b in bands):
+            sections = ocr_bands(pdf_path, bands)
+            return sections, {
+                "mode": MODE_SECTIONS,
+                "pages_total": page_count,
+                "pages_ocr": len({b[0] for b in bands}),
+            }
+
+    # 구간을 찾지 못했거나 full 모드: 전체 OCR
+    page_count, sections = ocr_full_document(pdf_path)
+    return sections, {
+        "mode": MODE_FULL,
+        "pages_total": page_count,
+        "pages_ocr": page_count,
+    }
+
+
+def _record_metrics(mode: str, elapsed: float, stats: Dict[str, Any]) -> None:
+    """OCR 시간/처리 페이지 수를 지표로 기록 (metrics.py)."""
+    import metrics
+
+    metrics.observe("nplogic_ocr_seconds", elapsed, mode=mode)
+    metrics.inc("nplogic_ocr_pages_total", stats["pages_ocr"], mode=mode)
+    if stats["pages_per_sec"] is not None:
+        metrics.set_gauge("nplogic_ocr_pages_per_second", stats["pages_per_sec"], mode=mode)
+
+
+def process_pdf(pdf_path: str, mode: str = MODE_SECTIONS) -> dict:
     """
     PDF 파일을 OCR 처리하여 데이터 추출
-    
+
     Args:
         pdf_path: PDF 파일 경로
-        
+        mode: "sections" (표제부/갑구/을구만 OCR) 또는 "full" (전체 OCR)
+
     Returns:
         추출된 데이터 딕셔너리
     """
-    # TODO: 클라이언트 제공 OCR 코드로 대체
-    
-    # 샘플 출력 (실제 구현 필요)
-    result = {
+    t = time.perf_counter()
+    sections, stats = recognize_sections(pdf_path, mode)
+    elapsed = time.perf_counter() - t
+    stats["seconds"] = round(elapsed, 3)
+    stats["pages_per_sec"] = round(stats["pages_ocr"] / elapsed, 2) if elapsed > 0 else None
+    _record_metrics(mode, elapsed, stats)
+
+    header = sections.get(SEC_HEADER, "")
+    gapgu = sections.get(SEC_GAP, "")
+    eulgu = sections.get(SEC_EUL, "")
+
+    return {
         "success": True,
         "file_path": pdf_path,
-        "registry_type": "토지",
-        "registry_number": "1234-5678-901234",
-        "owners": [
-            {
-                "name": "홍길동",
-                "regno": "123456-1******",
-                "share_ratio": "1/2"
-            },
-            {
-                "name": "김철수",
-                "regno": "234567-1******",
-                "share_ratio": "1/2"
-            }
-        ],
-        "rights": [
-            {
-                "type": "근저당",
-                "order": 1,
-                "holder": "○○은행",
-                "amount": 100000000,
-                "date": "2023-01-15",
-                "number": "2023-접수-12345"
-            },
-            {
-                "type": "가압류",
-                "order": 2,
-                "holder": "채권자A",
-                "amount": 50000000,
-                "date": "2023-06-20",
-                "number": "2023-접수-67890"
-            }
-        ],
-        "land_info": {
-            "address": "서울특별시 강남구 테헤란로 123",
-            "area": 85.5,
-            "land_category": "대"
-        }
+        **parse_registry_id(header),
+        "owners": parse_owners(gapgu),
+        "rights": parse_rights(gapgu, eulgu),
+        "land_info": parse_land_info(header, sections.get(SEC_TITLE, "")),
+        "ocr": stats,
     }
-    
-    return result
 
 
 def main():
     """메인 함수"""
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="NPLogic 등기부등본 OCR 프로세서")
+    parser.add_argument("pdf_path", nargs="?", help="PDF 파일 경로")
+    parser.add_argument(
+        "--mode",
+        default=MODE_SECTIONS,
+        choices=[MODE_SECTIONS, MODE_FULL],
+        help="OCR 범위 (sections=표제부/갑구/을구만, full=전체 문서)",
+    )
+    args = parser.parse_args()
+
+    if not args.pdf_path:
         error = {
             "success": False,
             "error": "PDF 파일 경로가 제공되지 않았습니다."
         }
         print(json.dumps(error, ensure_ascii=False))
         sys.exit(1)
-    
-    pdf_path = sys.argv[1]
-    
+
+    pdf_path = args.pdf_path
+
     # 파일 존재 확인
     if not Path(pdf_path).exists():
         error = {
@@ -88,14 +313,14 @@ def main():
         }
         print(json.dumps(error, ensure_ascii=False))
         sys.exit(1)
-    
+
     try:
         # OCR 처리
-        result = process_pdf(pdf_path)
-        
+        result = process_pdf(pdf_path, mode=args.mode)
+
         # JSON 출력
         print(json.dumps(result, ensure_ascii=False, indent=2))
-        
+
     except Exception as e:
         error = {
             "success": False,
@@ -107,4 +332,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -3,21 +3,45 @@
 NPLogic 유사물건 추천 모듈
 
 경매 낙찰 사례 기반으로 유사한 물건을 추천하는 규칙 기반 엔진
+
+pandas/yaml import 비용이 커서 하위 모듈은 처음 접근할 때 로드한다.
 """
 
-from .recommend import recommend_by_rule, recommend_all_rules, load_config
-from .utils import (
-    category_from_usage,
-    haversine_distance_m,
-    derive_fields,
-)
+import importlib
+
+_EXPORTS = {
+    "recommend_by_rule": ".recommend",
+    "recommend_all_rules": ".recommend",
+    "iter_recommend_all_rules": ".recommend",
+    "recommend_batch": ".batch",
+    "iter_recommend_batch": ".batch",
+    "export_batch_xlsx": ".export",
+    "load_config": ".recommend",
+    "category_from_usage": ".utils",
+    "categorize_usage": ".utils",
+    "haversine_distance_m": ".utils",
+    "derive_fields": ".utils",
+}
 
 __all__ = [
     "recommend_by_rule",
     "recommend_all_rules",
+    "iter_recommend_all_rules",
+    "recommend_batch",
+    "iter_recommend_batch",
+    "export_batch_xlsx",
     "load_config",
     "category_from_usage",
+    "categorize_usage",
     "haversine_distance_m",
     "derive_fields",
 ]
 
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
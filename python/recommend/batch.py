@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+batch.py
+
+여러 대상 물건(풀 전체) 일괄 추천
+- 지역/용도 키가 같은 대상 물건끼리 묶어 후보 부분집합을 한 번만 만든다
+- 대상 × 후보 하버사인 거리를 후보 블록 단위로 브로드캐스팅 계산
+  (한 번에 만드는 거리 행렬은 BLOCK_SUBJECTS × BLOCK_CANDIDATES 칸 이하, 후보가 더 많으면 대상 1건 × 후보 수)
+- 후보를 위도순 블록(위도 띠)으로 나누고, 대상별 규칙 최대 반경 바운딩 박스와 겹치지 않는 블록은 계산 생략
+  (생략된 후보는 모든 규칙의 반경 밖이므로 소속/정렬 결과에 영향 없음)
+- 블록 거리 행을 그대로 소속 행렬/정렬에 사용 → recommend_all_rules_matrix와 같은 결과
+- iter_recommend_batch: 대상별 결과를 만들어지는 즉시 내보냄 (대량 내보내기에서 결과를 쌓아두지 않음)
+"""
+
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .matrix import (
+    base_mask,
+    evaluate_rules,
+    prepare_candidates,
+    region_key,
+    rule_bounds,
+    subject_coords,
+)
+from .recommend import get_rules_for_category, prepare_subject
+from .utils import (
+    bbox_margin_deg,
+    category_from_usage,
+    haversine_distance_m_matrix,
+    to_float_array,
+)
+
+
+# -----------------------
+# 설정
+# -----------------------
+BLOCK_SUBJECTS = 256        # 블록당 대상 물건 수
+BLOCK_CANDIDATES = 4096     # 블록당 후보 수 (거리 행렬 상한 = 256 × 4096 float64 ≈ 8MB)
+
+
+# -----------------------
+# 블록 거리 계산
+# -----------------------
+def blocked_distances(
+    subj_lat: np.ndarray,
+    subj_lon: np.ndarray,
+    cand_lat: np.ndarray,
+    cand_lon: np.ndarray,
+    max_radius: float = math.inf,
+    block_candidates: int = BLOCK_CANDIDATES,
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    대상 × 후보 전체 거리 행렬(미터)을 후보 블록 단위로 채운다.
+
+    결과 행렬은 len(subj) × len(cand)이므로 호출하는 쪽에서 대상 수를 제한한다
+    (subject_block_size). max_radius가 유한하면 후보를 위도순으로 블록화(위도 띠)하고,
+    대상마다 최대 반경만큼 확장한 바운딩 박스와 겹치는 후보 블록만 계산한다.
+    계산하지 않은 칸은 NaN (어떤 규칙의 반경에도 들지 않음).
+
+    Args:
+        subj_lat, subj_lon: 대상 좌표 (NaN 없음)
+        cand_lat, cand_lon: 후보 좌표 (NaN 허용 → 거리 NaN)
+        max_radius: 규칙 최대 반경 (inf면 생략 없이 전부 계산)
+        block_candidates: 후보 블록 크기
+
+    Returns:
+        (len(subj) × len(cand) 거리 행렬, {"blocks": 전체 블록 수, "skipped": 모든 대상이 생략한 블록 수})
+    """
+    n = len(cand_lat)
+    out = np.full((len(subj_lat), n), np.nan)
+    stats = {"blocks": 0, "skipped": 0}
+    if n == 0 or len(subj_lat) == 0:
+        return out, stats
+
+    if not math.isfinite(max_radius):
+        for start in range(0, n, block_candidates):
+            sl = slice(start, start + block_candidates)
+            out[:, sl] = haversine_distance_m_matrix(subj_lat, subj_lon, cand_lat[sl], cand_lon[sl])
+            stats["blocks"] += 1
+        return out, stats
+
+    # 대상별 바운딩 박스 (경도 여유는 위도에 따라 다름)
+    margins = np.array([bbox_margin_deg(max_radius, float(lat)) for lat in subj_lat])
+    lat_lo, lat_hi = subj_lat - margins[:, 0], subj_lat + margins[:, 0]
+    lon_lo, lon_hi = subj_lon - margins[:, 1], subj_lon + margins[:, 1]
+
+    # 위도순 정렬 (좌표 없는 후보는 뒤로 → 해당 블록은 전부 NaN이라 생략)
+    by_lat = np.argsort(cand_lat, kind="stable")
+    for start in range(0, n, block_candidates):
+        idx = by_lat[start:start + block_candidates]
+        stats["blocks"] += 1
+        blat, blon = cand_lat[idx], cand_lon[idx]
+        ok = ~(np.isnan(blat) | np.isnan(blon))
+        if not ok.any():
+            stats["skipped"] += 1
+            continue
+        hit = ~(
+            (blat[ok].max() < lat_lo) | (blat[ok].min() > lat_hi)
+            | (blon[ok].max() < lon_lo) | (blon[ok].min() > lon_hi)
+        )
+        rows = np.flatnonzero(hit)
+        if rows.size == 0:
+            stats["skipped"] += 1
+        elif rows.size == len(subj_lat):
+            out[:, idx] = haversine_distance_m_matrix(subj_lat, subj_lon, blat, blon)
+        else:
+            out[np.ix_(rows, idx)] = haversine_distance_m_matrix(subj_lat[rows], subj_lon[rows], blat, blon)
+    return out, stats
+
+
+def subject_block_size(
+    n_candidates: int,
+    block_subjects: int = BLOCK_SUBJECTS,
+    block_candidates: int = BLOCK_CANDIDATES,
+) -> int:
+    """
+    한 번에 거리 행렬을 만들 대상 수.
+
+    대상 × 후보 행렬이 block_subjects × block_candidates 칸을 넘지 않도록 줄인다
+    (후보가 그보다 많으면 대상 1건씩, 행렬 크기 = 후보 수).
+    """
+    return max(1, min(block_subjects, (block_subjects * block_candidates) // max(n_candidates, 1)))
+
+
+# -----------------------
+# 일괄 추천
+# -----------------------
+def recommend_batch(
+    subjects: List[Dict[str, Any]],
+    candidates_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    similar_land: bool = False,
+    region_scope: str = "big",
+    topk: int = 10,
+    block_subjects: int = BLOCK_SUBJECTS,
+    block_candidates: int = BLOCK_CANDIDATES,
+    stats: Optional[Dict[str, int]] = None,
+) -> Dict[Any, Dict[int, List[Dict[str, Any]]]]:
+    """
+    대상 물건 목록 전체에 대해 모든 규칙 추천 (대상별 recommend_all_rules와 같은 결과).
+
+    Args:
+        subjects: 대상 물건 목록 (property_id 필수)
+        candidates_df: 후보군 DataFrame
+        cfg: 설정 dict
+        similar_land, region_scope, topk: recommend_all_rules와 동일
+        block_subjects, block_candidates: 거리 블록 크기 (거리 행렬 상한 = 두 값의 곱, subject_block_size)
+        stats: 넘기면 블록 수/생략 블록 수를 누적 기록
+
+    Returns:
+        {property_id: {rule_index: [추천결과]}}
+    """
+    return dict(iter_recommend_batch(
+        subjects, candidates_df, cfg,
+        similar_land=similar_land,
+        region_scope=region_scope,
+        topk=topk,
+        block_subjects=block_subjects,
+        block_candidates=block_candidates,
+        stats=stats,
+    ))
+
+
+def iter_recommend_batch(
+    subjects: List[Dict[str, Any]],
+    candidates_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    similar_land: bool = False,
+    region_scope: str = "big",
+    topk: int = 10,
+    block_subjects: int = BLOCK_SUBJECTS,
+    block_candidates: int = BLOCK_CANDIDATES,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[Tuple[Any, Dict[int, List[Dict[str, Any]]]]]:
+    """
+    recommend_batch의 스트리밍 버전 (인자 동일).
+
+    대상은 지역/용도 묶음 → 위도순 블록 순서로 처리되므로 입력 순서와 다를 수 있다.
+
+    Yields:
+        (property_id, {rule_index: [추천결과]}) — 대상마다 한 번
+    """
+    if stats is None:
+        stats = {}
+    for k in ("subjects", "groups", "blocks", "skipped"):
+        stats.setdefault(k, 0)
+
+    df = prepare_candidates(candidates_df)
+    has_coords = "latitude" in df.columns and "longitude" in df.columns
+
+    # 1) 지역/용도 + 카테고리로 묶기
+    groups: Dict[Tuple[Any, ...], List[Tuple[Any, Dict[str, Any]]]] = {}
+    for subject in subjects:
+        subj = prepare_subject(subject)
+        category = category_from_usage(subj.get("usage", ""), similar_land)
+        key = region_key(subj, region_scope) + (category,)
+        groups.setdefault(key, []).append((subject.get("property_id"), subj))
+
+    for key, members in groups.items():
+        category = key[-1]
+        rules = get_rules_for_category(cfg, category, similar_land)
+        stats["groups"] += 1
+        stats["subjects"] += len(members)
+        if not rules:
+            for pid, _ in members:
+                yield pid, {}
+            continue
+        indices = list(range(1, len(rules) + 1))
+
+        # 2) 그룹 공통 후보 부분집합 (base_mask는 키 조건만 보므로 첫 대상 기준)
+        sub = df.iloc[np.flatnonzero(base_mask(df, members[0][1], region_scope))]
+        days = to_float_array(sub["auction_days"]) if "auction_days" in sub.columns else None
+        if has_coords:
+            cand_lat = to_float_array(sub["latitude"])
+            cand_lon = to_float_array(sub["longitude"])
+        max_radius, _ = rule_bounds(rules)
+
+        # 좌표 없는 대상은 거리 없이 평가 (candidate_distances가 None인 경우와 동일)
+        located: List[Tuple[Any, Dict[str, Any], float, float]] = []
+        for pid, subj in members:
+            lat, lon = subject_coords(subj)
+            if lat is None or lon is None:
+                yield pid, evaluate_rules(sub, subj, rules, indices, days, None, topk, category)
+            elif not has_coords:
+                dist = np.full(len(sub), np.nan)
+                yield pid, evaluate_rules(sub, subj, rules, indices, days, dist, topk, category)
+            else:
+                located.append((pid, subj, lat, lon))
+        if not located:
+            continue
+
+        # 3) 위도순 대상 블록 → 블록 거리 행렬 → 대상별 규칙 평가
+        located.sort(key=lambda m: m[2])
+        step = subject_block_size(len(sub), block_subjects, block_candidates)
+        for start in range(0, len(located), step):
+            block = located[start:start + step]
+            slat = np.array([m[2] for m in block])
+            slon = np.array([m[3] for m in block])
+            dist, bstats = blocked_distances(
+                slat, slon, cand_lat, cand_lon, max_radius, block_candidates
+            )
+            stats["blocks"] += bstats["blocks"]
+            stats["skipped"] += bstats["skipped"]
+            for row, (pid, subj, _, _) in enumerate(block):
+                yield pid, evaluate_rules(sub, subj, rules, indices, days, dist[row], topk, category)
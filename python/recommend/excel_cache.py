@@ -0,0 +1,500 @@
+# -*- coding: utf-8 -*-
+"""
+excel_cache.py
+
+데이터디스크(Excel) 스트리밍 적재 + 컬럼형(Parquet) 캐시
+- openpyxl read_only 모드로 행 단위 스트리밍 (시트 전체를 메모리에 올리지 않음)
+- 헤더는 기본 1행 (pd.read_excel(header=0)과 동일), header_row=None이면 자동 탐지 (데이터디스크는 보통 10행)
+- 시트별 타입 지정 Parquet 파일로 변환, 워크북 해시 + mtime 기준 캐시
+- 같은 데이터디스크 재적재 시 Parquet만 읽음
+- 워크북이 바뀌거나 사라지면 더 이상 참조되지 않는 캐시 디렉토리/index 항목 정리
+- index 갱신(읽기-수정-쓰기)은 락 파일로 프로세스 간 직렬화
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+
+# -----------------------
+# 설정
+# -----------------------
+CACHE_DIR_ENV = "NPLOGIC_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "nplogic", "excel")
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+
+DEFAULT_HEADER_ROW = 1    # pd.read_excel(header=0)과 같은 1행 헤더
+HEADER_SCAN_ROWS = 30     # 헤더 자동 탐지 시 검사할 최대 행 수
+BATCH_ROWS = 20000        # Parquet 기록 단위 (행)
+HASH_CHUNK = 1 << 20
+
+# 시트 캐시 조회 통계 (프로세스 누적, 지표 collector가 읽음)
+CACHE_STATS = {"hit": 0, "miss": 0}
+
+
+def get_cache_dir(cache_dir: Optional[str] = None) -> str:
+    """캐시 디렉토리 경로 (인자 > 환경변수 > 기본값)."""
+    path = cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# -----------------------
+# 워크북 식별 (해시 + mtime)
+# -----------------------
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load_index(cache_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _atomic_write_json(path: str, data: Any) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _index_lock(cache_dir: str) -> Iterator[None]:
+    """index 갱신 구간 배타 락 (다른 프로세스가 같은 캐시 디렉토리를 동시에 갱신하지 않도록)."""
+    with open(os.path.join(cache_dir, LOCK_FILE), "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)   # 약 10초 대기 후 OSError
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def workbook_key(excel_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    워크북 캐시 키 (내용 해시 앞 20자).
+
+    경로/크기/mtime이 index에 기록된 것과 같으면 해시를 다시 계산하지 않는다.
+    해시가 바뀌면 락 안에서 index를 다시 읽어 갱신하고, 이 워크북의 이전 캐시
+    (및 사라진 워크북의 캐시) 중 더 이상 참조되지 않는 것만 정리한다.
+    """
+    cache_dir = get_cache_dir(cache_dir)
+    abs_path = os.path.abspath(excel_path)
+    st = os.stat(abs_path)
+
+    entry = _load_index(cache_dir).get(abs_path)
+    if entry and entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size:
+        return entry["hash"]
+
+    key = _file_sha256(abs_path)[:20]
+    with _index_lock(cache_dir):
+        # 해시 계산 중에 다른 프로세스가 쓴 항목도 보존하도록 최신 index 기준으로 갱신
+        index = _load_index(cache_dir)
+        old = (index.get(abs_path) or {}).get("hash")
+        index[abs_path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "hash": key}
+        _evict_stale(cache_dir, index, candidates=[old] if old and old != key else [])
+        _atomic_write_json(os.path.join(cache_dir, INDEX_FILE), index)
+    return key
+
+
+_KEY_DIR_RE = re.compile(r"^[0-9a-f]{20}$")
+
+
+def _evict_stale(
+    cache_dir: str,
+    index: Dict[str, Any],
+    candidates: Optional[Sequence[str]] = None,
+) -> List[str]:
+    """
+    사라진 워크북의 index 항목과, 어떤 항목도 참조하지 않는 캐시 디렉토리 삭제 (index는 제자리 수정).
+
+    _index_lock 안에서 방금 읽은 index로 호출해야 한다.
+
+    Args:
+        candidates: 삭제를 검토할 캐시 키 (사라진 워크북의 키는 항상 포함).
+            None이면 캐시 디렉토리 전체를 훑는다 (prune_cache).
+
+    Returns:
+        삭제한 캐시 키 목록
+    """
+    stale = set(candidates or ())
+    for path in [p for p in index if not os.path.exists(p)]:
+        stale.add(index.pop(path).get("hash"))
+
+    live = {e.get("hash") for e in index.values()}
+    names = os.listdir(cache_dir) if candidates is None else stale
+    removed = []
+    for name in sorted(n for n in names if n):
+        path = os.path.join(cache_dir, name)
+        if _KEY_DIR_RE.match(name) and name not in live and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(name)
+    return removed
+
+
+def prune_cache(cache_dir: Optional[str] = None) -> List[str]:
+    """오래된 캐시 정리 (사라졌거나 내용이 바뀐 워크북의 Parquet). 삭제한 캐시 키 목록 반환."""
+    cache_dir = get_cache_dir(cache_dir)
+    with _index_lock(cache_dir):
+        index = _load_index(cache_dir)
+        for path, entry in list(index.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if entry.get("mtime_ns") != st.st_mtime_ns or entry.get("size") != st.st_size:
+                # 바뀐 워크북: 다음 적재 때 새 해시로 다시 변환되므로 항목을 지움
+                del index[path]
+        removed = _evict_stale(cache_dir, index)
+        _atomic_write_json(os.path.join(cache_dir, INDEX_FILE), index)
+    return removed
+
+
+def _sheet_slug(sheet: str) -> str:
+    return re.sub(r"[^\w\-]+", "_", str(sheet)).strip("_") or "sheet"
+
+
+def sheet_cache_path(cache_dir: str, key: str, sheet: str, header_row: Optional[int]) -> str:
+    """시트 캐시 파일 경로 (헤더 행 번호, None이면 자동 탐지도 키에 포함)."""
+    suffix = f"h{header_row}" if header_row else "auto"
+    return os.path.join(cache_dir, key, f"{_sheet_slug(sheet)}__{suffix}.parquet")
+
+
+# -----------------------
+# 헤더 탐지 / 컬럼명 정리
+# -----------------------
+def _is_blank(v: Any) -> bool:
+    return v is None or (isinstance(v, str) and not v.strip())
+
+
+def detect_header_row(rows: Sequence[Sequence[Any]]) -> int:
+    """
+    앞부분 행들 중 헤더 행 번호(1-based) 탐지.
+
+    제목/작성일 등 상단 행은 채워진 셀이 적으므로, 문자열 셀이 가장 많은 행을
+    헤더로 본다 (동률이면 앞쪽 행).
+    """
+    best_row, best_score = 1, -1
+    for idx, row in enumerate(rows, 1):
+        score = sum(1 for v in row if isinstance(v, str) and v.strip())
+        if score > best_score:
+            best_row, best_score = idx, score
+    return best_row
+
+
+def clean_header(values: Sequence[Any]) -> List[str]:
+    """헤더 셀 값을 컬럼명으로 정리 (개행 제거, 빈 칸/중복 처리)."""
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for idx, v in enumerate(values, 1):
+        name = "" if v is None else str(v).replace("\r", "").replace("\n", " ").strip()
+        if not name:
+            name = f"col_{idx}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+# -----------------------
+# 스트리밍 읽기
+# -----------------------
+def _open_sheet(excel_path: str, sheet_name: Union[int, str]):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    if isinstance(sheet_name, int):
+        ws = wb.worksheets[sheet_name]
+    else:
+        ws = wb[sheet_name]
+    return wb, ws
+
+
+def iter_sheet_rows(
+    excel_path: str,
+    sheet_name: Union[int, str] = 0,
+    header_row: Optional[int] = DEFAULT_HEADER_ROW,
+) -> Tuple[str, List[str], Iterator[Tuple[Any, ...]]]:
+    """
+    시트를 행 단위로 스트리밍.
+
+    header_row: 헤더 행 번호 (1-based), None이면 앞 HEADER_SCAN_ROWS행에서 자동 탐지
+
+    Returns:
+        (시트 이름, 컬럼명 목록, 데이터 행 iterator) - 빈 행은 건너뜀
+    """
+    wb, ws = _open_sheet(excel_path, sheet_name)
+    rows = ws.iter_rows(values_only=True)
+
+    head: List[Tuple[Any, ...]] = []
+    for row in rows:
+        head.append(row)
+        if len(head) >= (header_row or HEADER_SCAN_ROWS):
+            break
+
+    hdr = header_row or detect_header_row(head)
+    columns = clean_header(head[hdr - 1]) if len(head) >= hdr else []
+    width = len(columns)
+
+    def gen() -> Iterator[Tuple[Any, ...]]:
+        try:
+            for row in (*head[hdr:], *rows):
+                if all(_is_blank(v) for v in row):
+                    continue
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                yield row
+        finally:
+            wb.close()
+
+    return ws.title, columns, gen()
+
+
+# -----------------------
+# 타입 추론 / Arrow 변환
+# -----------------------
+T_INT, T_FLOAT, T_BOOL, T_DATETIME, T_STRING = "int", "float", "bool", "datetime", "string"
+
+
+def _value_kind(v: Any) -> Optional[str]:
+    if _is_blank(v):
+        return None
+    if isinstance(v, bool):
+        return T_BOOL
+    if isinstance(v, int):
+        return T_INT
+    if isinstance(v, float):
+        return T_FLOAT
+    if isinstance(v, date):
+        return T_DATETIME
+    return T_STRING
+
+
+def _merge_kind(cur: Optional[str], new: Optional[str]) -> Optional[str]:
+    if new is None or cur == new:
+        return cur
+    if cur is None:
+        return new
+    if {cur, new} == {T_INT, T_FLOAT}:
+        return T_FLOAT
+    return T_STRING
+
+
+def infer_column_kinds(rows: Iterator[Tuple[Any, ...]], width: int) -> List[str]:
+    """전체 행을 한 번 훑어 컬럼별 타입 결정 (행을 보관하지 않음)."""
+    kinds: List[Optional[str]] = [None] * width
+    for row in rows:
+        for i, v in enumerate(row):
+            if kinds[i] != T_STRING:
+                kinds[i] = _merge_kind(kinds[i], _value_kind(v))
+    return [k or T_STRING for k in kinds]
+
+
+def _arrow_type(kind: str):
+    import pyarrow as pa
+
+    return {
+        T_INT: pa.int64(),
+        T_FLOAT: pa.float64(),
+        T_BOOL: pa.bool_(),
+        T_DATETIME: pa.timestamp("us"),
+        T_STRING: pa.string(),
+    }[kind]
+
+
+def _coerce(v: Any, kind: str) -> Any:
+    if _is_blank(v):
+        return None
+    if kind == T_STRING:
+        return v if isinstance(v, str) else str(v)
+    if kind == T_FLOAT:
+        return float(v)
+    if kind == T_DATETIME and not isinstance(v, datetime):
+        return datetime(v.year, v.month, v.day)
+    return v
+
+
+def _write_batch(writer, schema, kinds: List[str], buffers: List[List[Any]]) -> None:
+    import pyarrow as pa
+
+    arrays = [
+        pa.array([_coerce(v, k) for v in buf], type=_arrow_type(k))
+        for buf, k in zip(buffers, kinds)
+    ]
+    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+
+def convert_sheet(
+    excel_path: str,
+    out_path: str,
+    sheet_name: Union[int, str] = 0,
+    header_row: Optional[int] = DEFAULT_HEADER_ROW,
+    batch_rows: int = BATCH_ROWS,
+) -> Dict[str, Any]:
+    """
+    시트 하나를 타입 지정 Parquet 파일로 변환 (2-pass 스트리밍).
+
+    1차: 컬럼 타입 추론, 2차: BATCH_ROWS 단위로 기록.
+    메모리는 batch_rows 행 분량만 사용한다.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    title, columns, rows = iter_sheet_rows(excel_path, sheet_name, header_row)
+    kinds = infer_column_kinds(rows, len(columns))
+    schema = pa.schema([pa.field(c, _arrow_type(k)) for c, k in zip(columns, kinds)])
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out_path), suffix=".tmp")
+    os.close(fd)
+
+    row_count = 0
+    try:
+        with pq.ParquetWriter(tmp, schema) as writer:
+            _, _, rows = iter_sheet_rows(excel_path, sheet_name, header_row)
+            buffers: List[List[Any]] = [[] for _ in columns]
+            pending = 0
+            for row in rows:
+                for buf, v in zip(buffers, row):
+                    buf.append(v)
+                row_count += 1
+                pending += 1
+                if pending >= batch_rows:
+                    # 컬럼이 없는 시트(빈 헤더)는 기록할 값이 없으므로 건너뜀
+                    if columns:
+                        _write_batch(writer, schema, kinds, buffers)
+                    buffers = [[] for _ in columns]
+                    pending = 0
+            if pending and columns:
+                _write_batch(writer, schema, kinds, buffers)
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    return {"sheet": title, "path": out_path, "rows": row_count, "columns": columns}
+
+
+# -----------------------
+# 캐시 적재
+# -----------------------
+def convert_workbook(
+    excel_path: str,
+    cache_dir: Optional[str] = None,
+    sheets: Optional[Sequence[Union[int, str]]] = None,
+    header_row: Optional[int] = DEFAULT_HEADER_ROW,
+) -> Dict[str, str]:
+    """
+    워크북의 시트들을 Parquet 캐시로 변환 (이미 있으면 건너뜀).
+
+    Returns:
+        {시트명: parquet 경로}
+    """
+    from openpyxl import load_workbook
+
+    cache_dir = get_cache_dir(cache_dir)
+    key = workbook_key(excel_path, cache_dir)
+
+    if sheets is None:
+        wb = load_workbook(excel_path, read_only=True)
+        sheets = list(wb.sheetnames)
+        wb.close()
+
+    paths = {}
+    for sheet in sheets:
+        path = cached_sheet_path(excel_path, sheet, header_row, cache_dir, key)
+        paths[str(sheet)] = path
+    return paths
+
+
+def cached_sheet_path(
+    excel_path: str,
+    sheet_name: Union[int, str] = 0,
+    header_row: Optional[int] = DEFAULT_HEADER_ROW,
+    cache_dir: Optional[str] = None,
+    key: Optional[str] = None,
+) -> str:
+    """시트 캐시 경로 반환 (없으면 변환해서 생성)."""
+    cache_dir = get_cache_dir(cache_dir)
+    key = key or workbook_key(excel_path, cache_dir)
+
+    # 시트 번호로 요청된 경우도 같은 캐시를 쓰도록 이름으로 정규화
+    if isinstance(sheet_name, int):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(excel_path, read_only=True)
+        sheet_name = wb.sheetnames[sheet_name]
+        wb.close()
+
+    path = sheet_cache_path(cache_dir, key, sheet_name, header_row)
+    if os.path.exists(path):
+        CACHE_STATS["hit"] += 1
+    else:
+        CACHE_STATS["miss"] += 1
+        convert_sheet(excel_path, path, sheet_name, header_row)
+    return path
+
+
+def load_excel_cached(
+    excel_path: str,
+    sheet_name: Union[int, str] = 0,
+    header_row: Optional[int] = DEFAULT_HEADER_ROW,
+    columns: Optional[List[str]] = None,
+    cache_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Excel 시트를 캐시 경유로 DataFrame 로드.
+
+    Args:
+        excel_path: 워크북 경로
+        sheet_name: 시트 이름 또는 번호 (0-based)
+        header_row: 헤더 행 번호 (1-based, 기본 1행 = pd.read_excel(header=0)).
+            None이면 자동 탐지 (데이터디스크처럼 제목 행이 위에 있는 시트)
+        columns: 읽을 컬럼 (None이면 전체)
+        cache_dir: 캐시 디렉토리
+
+    Returns:
+        DataFrame
+    """
+    path = cached_sheet_path(excel_path, sheet_name, header_row, cache_dir)
+    if columns:
+        import pyarrow.parquet as pq
+
+        available = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in available]
+    return pd.read_parquet(path, columns=columns)
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+export.py
+
+풀 전체 추천 결과 Excel 내보내기 (대량, 결과 행 수와 무관한 메모리)
+- iter_recommend_batch가 대상별 결과를 내보내는 즉시 xlsx 행으로 기록 (결과 dict/DataFrame을 쌓지 않음)
+- xlsxwriter constant_memory 모드: 시트마다 현재 행만 메모리에 두고 나머지는 임시 파일로 흘려보냄
+  (그 외 고정 비용: 후보군 전처리 복사본 + 거리 행렬, 후자는 batch.subject_block_size로 상한)
+- 시트 헤더는 후보군 컬럼 전체(또는 지정 컬럼)로 모든 시트에 같게 고정
+- 날짜/시각은 문자열이 아니라 Excel 날짜 셀로 기록
+- 시트는 카테고리별(sheet_by="category") 또는 규칙 순위별(sheet_by="rule")
+- 시트 행 한도(1,048,576)를 넘으면 "이름 (2)" 시트로 이어서 기록
+"""
+
+import math
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .batch import iter_recommend_batch
+from .recommend import KEY_COLUMNS
+from .utils import DERIVED_COLUMNS
+
+
+# -----------------------
+# 설정
+# -----------------------
+SHEET_BY = ("category", "rule")
+MAX_SHEET_ROWS = 1048576            # xlsx 시트당 최대 행 (헤더 포함)
+MAX_SHEET_NAME = 31
+SHEET_NAME_INVALID = set('[]:*?/\\')
+
+# 앞쪽에 고정으로 두는 컬럼 (대상 물건 + 규칙 메타)
+LEAD_COLUMNS = ["property_id", "_rule_index", "_rule_name", "_category"]
+DATE_FORMAT = "yyyy-mm-dd"
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+
+# -----------------------
+# 셀 값 / 시트 이름
+# -----------------------
+def cell_value(value: Any) -> Any:
+    """
+    xlsx 셀 값으로 변환 (None/NaN/inf/NaT는 빈 칸, numpy 스칼라는 파이썬 값,
+    날짜/시각은 date/datetime 그대로, 그 외는 문자열).
+    """
+    if value is None:
+        return None
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value)
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool) or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        if pd.isna(value):
+            return None
+        return value.to_pydatetime() if isinstance(value, pd.Timestamp) else value
+    return str(value)
+
+
+def sheet_name(key: Any, sheet_by: str) -> str:
+    """시트 이름 (rule: "1순위", category: 카테고리명). xlsx 금지 문자 제거, 31자 제한."""
+    name = f"{key}순위" if sheet_by == "rule" else str(key or "미분류")
+    name = "".join("_" if ch in SHEET_NAME_INVALID else ch for ch in name).strip("'")
+    return name[:MAX_SHEET_NAME] or "Sheet"
+
+
+# -----------------------
+# 시트 기록기
+# -----------------------
+class _SheetWriter:
+    """시트 하나의 순차 기록 (constant_memory 모드는 행을 위에서 아래로만 쓸 수 있음)."""
+
+    def __init__(self, workbook, name: str, columns: List[str], max_rows: int, formats: Dict[str, Any]):
+        self.workbook = workbook
+        self.formats = formats
+        self.name = name
+        self.columns = columns
+        self.max_rows = max_rows
+        self.part = 0
+        self.rows = 0
+        self.sheets: Dict[str, int] = {}
+        self._open()
+
+    def _open(self) -> None:
+        self.part += 1
+        title = self.name if self.part == 1 else f"{self.name[:MAX_SHEET_NAME - 5]} ({self.part})"
+        self.sheet = self.workbook.add_worksheet(title)
+        self.sheet.write_row(0, 0, self.columns)
+        self.sheet.freeze_panes(1, 0)
+        self.row = 1
+        self.title = title
+        self.sheets[title] = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.row >= self.max_rows:
+            self._open()
+        for col, name in enumerate(self.columns):
+            value = cell_value(record.get(name))
+            if isinstance(value, datetime):
+                has_time = value.time() != datetime.min.time()
+                fmt = self.formats["datetime" if has_time else "date"]
+                self.sheet.write_datetime(self.row, col, value, fmt)
+            elif isinstance(value, date):
+                self.sheet.write_datetime(self.row, col, value, self.formats["date"])
+            elif value is not None:
+                self.sheet.write(self.row, col, value)
+        self.row += 1
+        self.rows += 1
+        self.sheets[self.title] += 1
+
+
+def result_columns(candidates_df: pd.DataFrame) -> List[str]:
+    """
+    추천 결과 행의 후보 컬럼 전체 (prepare_candidates 후 컬럼 순서, 주소 키 컬럼 제외).
+
+    원본 컬럼 + 없으면 덧붙는 파생 컬럼 + auction_date에서 만드는 auction_days.
+    """
+    cols = [str(c) for c in candidates_df.columns]
+    cols += [c for c in DERIVED_COLUMNS if c not in cols]
+    if "auction_days" not in cols and "auction_date" in cols:
+        cols.append("auction_days")
+    return [c for c in cols if c not in KEY_COLUMNS]
+
+
+def _header(columns: List[str]) -> List[str]:
+    """시트 헤더: 고정 컬럼 + 후보 컬럼."""
+    return LEAD_COLUMNS + [c for c in columns if c not in LEAD_COLUMNS]
+
+
+# -----------------------
+# 내보내기
+# -----------------------
+def write_recommendations_xlsx(
+    path: str,
+    results: Iterable[Tuple[Any, Dict[int, List[Dict[str, Any]]]]],
+    sheet_by: str = "category",
+    columns: Optional[List[str]] = None,
+    max_sheet_rows: int = MAX_SHEET_ROWS,
+) -> Dict[str, Any]:
+    """
+    (property_id, {rule_index: [추천결과]}) 스트림을 xlsx로 기록.
+
+    결과는 하나씩 읽고 바로 기록하므로 기록 메모리는 행 수와 무관하다 (시트 수 × 현재 행).
+    constant_memory 모드는 헤더를 먼저 써야 하므로 헤더는 columns로 정하고 모든 시트에 같게 쓴다.
+    행에 없는 컬럼은 빈 칸, 헤더에 없는 키는 기록하지 않는다.
+
+    Args:
+        path: 출력 xlsx 경로
+        results: iter_recommend_batch 출력 (또는 같은 모양의 이터러블)
+        sheet_by: "category"(카테고리별 시트) 또는 "rule"(규칙 순위별 시트)
+        columns: 기록할 후보 컬럼 (후보군 전체면 result_columns(candidates_df)).
+            None이면 첫 결과 행의 키 — 행마다 키가 다를 수 있는 입력이면 반드시 지정
+        max_sheet_rows: 시트당 최대 행 (헤더 포함, 넘으면 다음 시트로)
+
+    Returns:
+        {"path", "subjects", "rows", "sheets": {시트명: 행 수}, "seconds"}
+    """
+    import xlsxwriter
+
+    if sheet_by not in SHEET_BY:
+        raise ValueError(f"sheet_by는 {SHEET_BY} 중 하나여야 합니다: {sheet_by}")
+
+    t = time.perf_counter()
+    writers: Dict[Any, _SheetWriter] = {}
+    subjects = 0
+    header = _header(columns) if columns is not None else None
+    # 후보 데이터 문자열은 그대로 기록 ("="로 시작해도 수식/URL로 해석하지 않음)
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+        "remove_timezone": True,
+    })
+    formats = {
+        "date": workbook.add_format({"num_format": DATE_FORMAT}),
+        "datetime": workbook.add_format({"num_format": DATETIME_FORMAT}),
+    }
+    try:
+        for pid, by_rule in results:
+            subjects += 1
+            for rule_index in sorted(by_rule):
+                for r in by_rule[rule_index]:
+                    record = dict(r, property_id=pid)
+                    if header is None:
+                        header = _header(list(record))
+                    key = rule_index if sheet_by == "rule" else r.get("_category")
+                    writer = writers.get(key)
+                    if writer is None:
+                        writer = writers[key] = _SheetWriter(
+                            workbook, sheet_name(key, sheet_by), header, max_sheet_rows, formats
+                        )
+                    writer.write(record)
+    finally:
+        workbook.close()
+
+    sheets = {title: count for w in writers.values() for title, count in w.sheets.items()}
+    return {
+        "path": path,
+        "subjects": subjects,
+        "rows": sum(w.rows for w in writers.values()),
+        "sheets": sheets,
+        "seconds": round(time.perf_counter() - t, 3),
+    }
+
+
+def export_batch_xlsx(
+    path: str,
+    subjects: List[Dict[str, Any]],
+    candidates_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    similar_land: bool = False,
+    region_scope: str = "big",
+    topk: int = 10,
+    sheet_by: str = "category",
+    columns: Optional[List[str]] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """
+    대상 물건 목록 전체 추천 → xlsx (recommend_batch 결과를 메모리에 모으지 않고 바로 기록).
+
+    Args:
+        path: 출력 xlsx 경로
+        subjects, candidates_df, cfg, similar_land, region_scope, topk, stats: recommend_batch와 동일
+        sheet_by: write_recommendations_xlsx와 동일
+        columns: 기록할 후보 컬럼 (None이면 result_columns(candidates_df) = 후보군 컬럼 전체)
+
+    Returns:
+        write_recommendations_xlsx 요약
+    """
+    results = iter_recommend_batch(
+        subjects, candidates_df, cfg,
+        similar_land=similar_land,
+        region_scope=region_scope,
+        topk=topk,
+        stats=stats,
+    )
+    if columns is None:
+        columns = result_columns(candidates_df)
+    return write_recommendations_xlsx(path, results, sheet_by=sheet_by, columns=columns)
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+incremental.py
+
+신규/변경 낙찰 사례(delta) 기반 추천 결과 증분 갱신
+- 규칙 전체 중 최대 반경/최대 시간 윈도우만으로 delta가 영향을 줄 수 있는 대상 물건 탐색
+  (지역/용도 키로 묶고, 반경·기간 밖이면 제외)
+- 영향 받는 (대상 물건, 규칙)만 다시 계산
+  - 신규 사례만 들어온 규칙: 기존 topk + 신규 소속 사례를 합쳐 다시 정렬 (전체 재계산과 동일)
+  - 기존 결과에 있던 사례가 변경된 규칙: 해당 규칙만 전체 후보군으로 재계산
+"""
+
+import math
+from typing import Any, Dict, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .matrix import (
+    base_mask,
+    build_membership_matrix,
+    candidate_distances,
+    prepare_candidates,
+    recency_distance_order,
+    recommend_all_rules_matrix,
+    region_key,
+    rule_bounds,
+)
+from .recommend import get_rules_for_category, prepare_subject, subject_days
+from .utils import category_from_usage, to_float_array
+
+
+# -----------------------
+# delta 병합
+# -----------------------
+def merge_delta(
+    candidates_df: pd.DataFrame,
+    delta_df: pd.DataFrame,
+    key: str = "id",
+) -> Tuple[pd.DataFrame, Set[Any], Set[Any]]:
+    """
+    후보군에 delta 반영. 기존 사례는 제자리에서 교체, 신규 사례는 뒤에 추가.
+
+    Returns:
+        (병합된 후보군, 신규 key 집합, 변경 key 집합)
+    """
+    delta_df = delta_df.drop_duplicates(subset=[key], keep="last")
+    positions = pd.Index(candidates_df[key]).get_indexer(delta_df[key])
+    is_changed = positions >= 0
+
+    merged = pd.concat(
+        [candidates_df, delta_df[~is_changed]], ignore_index=True, sort=False
+    )
+    if is_changed.any():
+        changed = delta_df[is_changed]
+        rows = positions[is_changed]
+        for col in changed.columns:
+            merged.iloc[rows, merged.columns.get_loc(col)] = changed[col].to_numpy()
+
+    new_keys = set(delta_df.loc[~is_changed, key])
+    changed_keys = set(delta_df.loc[is_changed, key])
+    return merged, new_keys, changed_keys
+
+
+# -----------------------
+# 영향 대상 탐색
+# -----------------------
+def find_affected_rows(
+    subjects: List[Dict[str, Any]],
+    delta_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    similar_land: bool = False,
+    region_scope: str = "big",
+) -> Dict[Any, np.ndarray]:
+    """
+    대상 물건별로 영향을 줄 수 있는 delta 행 위치.
+
+    지역/용도 키가 같은 delta 행만 보고, 그중 카테고리 규칙들의 최대 시간 윈도우와
+    최대 반경 안에 있는 행만 남긴다 (규칙별 세부 조건은 이후 소속 행렬에서 판정).
+
+    Returns:
+        {property_id: delta 행 위치 배열} (영향 없는 대상은 제외)
+    """
+    affected: Dict[Any, np.ndarray] = {}
+    if delta_df.empty:
+        return affected
+
+    days = to_float_array(delta_df["auction_days"]) if "auction_days" in delta_df.columns else None
+    masks: Dict[Tuple[Any, ...], np.ndarray] = {}
+
+    for subject in subjects:
+        subj = prepare_subject(subject)
+        category = category_from_usage(subj.get("usage", ""), similar_land)
+        rules = get_rules_for_category(cfg, category, similar_land)
+        if not rules:
+            continue
+
+        # 1) 지역/용도 키 (같은 키의 대상들은 마스크 공유)
+        region = region_key(subj, region_scope)
+        if region not in masks:
+            masks[region] = base_mask(delta_df, subj, region_scope)
+        rows = np.flatnonzero(masks[region])
+        if rows.size == 0:
+            continue
+
+        max_radius, max_window = rule_bounds(rules)
+
+        # 2) 최대 시간 윈도우
+        if days is not None and math.isfinite(max_window):
+            sd = subject_days(subj)
+            d = days[rows]
+            with np.errstate(invalid="ignore"):
+                rows = rows[(d >= sd - max_window) & (d <= sd)]
+
+        # 3) 최대 반경
+        if rows.size and math.isfinite(max_radius):
+            dist = candidate_distances(delta_df.iloc[rows], subj, max_radius)
+            if dist is not None:
+                with np.errstate(invalid="ignore"):
+                    rows = rows[dist <= max_radius]
+
+        if rows.size:
+            affected[subject.get("property_id")] = rows
+
+    return affected
+
+
+# -----------------------
+# 증분 갱신
+# -----------------------
+def _merge_topk(
+    subj: Dict[str, Any],
+    stored: List[Dict[str, Any]],
+    new_rows: pd.DataFrame,
+    topk: int,
+) -> List[Dict[str, Any]]:
+    """기존 topk + 신규 소속 행을 합쳐 최신순 + 가까운 순 topk (auction_days가 있으면 동률은 기존 행 우선)."""
+    old = pd.DataFrame([{k: v for k, v in r.items() if not k.startswith("_")} for r in stored])
+    merged = pd.concat([old, new_rows], ignore_index=True, sort=False) if len(old) else new_rows
+    merged = merged.reset_index(drop=True)
+
+    days = to_float_array(merged["auction_days"]) if "auction_days" in merged.columns else None
+    dist = candidate_distances(merged, subj)
+    order = recency_distance_order(merged, subj, days, dist)[:topk]
+    return merged.iloc[order].to_dict(orient="records")
+
+
+def refresh_recommendations(
+    subjects: List[Dict[str, Any]],
+    stored: Dict[Any, Dict[int, List[Dict[str, Any]]]],
+    candidates_df: pd.DataFrame,
+    delta_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    key: str = "id",
+    similar_land: bool = False,
+    region_scope: str = "big",
+    topk: int = 10,
+) -> Tuple[pd.DataFrame, Dict[Any, Dict[int, List[Dict[str, Any]]]], Dict[str, int]]:
+    """
+    delta 반영 후 영향 받는 대상 물건/규칙만 다시 계산.
+
+    Args:
+        subjects: 풀의 대상 물건 목록 (property_id 필수)
+        stored: 기존 결과 {property_id: {rule_index: [추천결과]}} (recommend_all_rules 반환 형식)
+        candidates_df: 기존 후보군 (이전 호출이 반환한 병합 후보군을 그대로 넘기면 전처리 생략)
+        delta_df: 신규/변경 사례
+        cfg: 설정 dict
+        key: 사례 식별 컬럼
+        similar_land, region_scope, topk: recommend_all_rules와 동일 (저장 결과와 같은 값)
+
+    Returns:
+        (병합된 후보군, 갱신된 결과, 통계 dict)
+    """
+    candidates = prepare_candidates(candidates_df)
+    delta = prepare_candidates(delta_df.drop_duplicates(subset=[key], keep="last"))
+    merged, new_keys, changed_keys = merge_delta(candidates, delta, key)
+
+    results = dict(stored)
+    stats = {"subjects": len(subjects), "affected": 0, "rules_recomputed": 0, "rules_merged": 0}
+
+    # 변경 사례가 들어 있던 (대상, 규칙)
+    stale: Dict[Any, Set[int]] = {}
+    if changed_keys:
+        for pid, rule_results in stored.items():
+            for idx, rows in rule_results.items():
+                if any(r.get(key) in changed_keys for r in rows):
+                    stale.setdefault(pid, set()).add(idx)
+
+    affected = find_affected_rows(subjects, delta, cfg, similar_land, region_scope)
+    delta_is_new = delta[key].isin(new_keys).to_numpy()
+
+    for subject in subjects:
+        pid = subject.get("property_id")
+        rows = affected.get(pid)
+        if pid in stored and rows is None and pid not in stale:
+            continue
+        stats["affected"] += 1
+
+        # 저장 결과가 없는 대상은 전체 계산
+        if pid not in stored:
+            results[pid] = recommend_all_rules_matrix(
+                subject, merged, cfg, similar_land=similar_land,
+                region_scope=region_scope, topk=topk, prepared=True,
+            )
+            stats["rules_recomputed"] += len(results[pid])
+            continue
+
+        subj = prepare_subject(subject)
+        category = category_from_usage(subj.get("usage", ""), similar_land)
+        rules = get_rules_for_category(cfg, category, similar_land)
+
+        recompute = set(stale.get(pid, set()))
+        merge_rows: Dict[int, np.ndarray] = {}
+        if rows is not None:
+            sub = delta.iloc[rows]
+            days = to_float_array(sub["auction_days"]) if "auction_days" in sub.columns else None
+            dist = candidate_distances(sub, subj, rule_bounds(rules)[0])
+            member = build_membership_matrix(sub, subj, rules, days, dist)
+            for col in range(len(rules)):
+                hit = member[:, col]
+                if not hit.any():
+                    continue
+                idx = col + 1
+                if (hit & ~delta_is_new[rows]).any():
+                    recompute.add(idx)   # 변경 사례가 새로 소속 → 위치 보존 위해 재계산
+                else:
+                    merge_rows[idx] = rows[hit]
+
+        updated = dict(results[pid])
+        if recompute:
+            updated.update(recommend_all_rules_matrix(
+                subject, merged, cfg, similar_land=similar_land, region_scope=region_scope,
+                topk=topk, rule_indices=recompute, prepared=True,
+            ))
+            stats["rules_recomputed"] += len(recompute)
+        for idx, delta_rows in merge_rows.items():
+            if idx in recompute:
+                continue
+            rule = rules[idx - 1]
+            stored_rows = updated.get(idx, [])
+            new_rows = delta.iloc[delta_rows]
+            merged_rows = _merge_topk(subj, stored_rows, new_rows, topk)
+            for r in merged_rows:
+                r["_rule_name"] = rule.get("name")
+                r["_rule_index"] = idx
+                r["_category"] = category
+            updated[idx] = merged_rows
+            stats["rules_merged"] += 1
+        results[pid] = updated
+
+    return merged, results, stats
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+json_stream.py
+
+후보군 JSON/NDJSON 스트리밍 로더
+- 큰 JSON 배열/NDJSON 파일을 한 번에 json.load 하지 않고 레코드 단위로 파싱
+- 레코드를 컬럼 버퍼에 모았다가 chunk 단위로 DataFrame 변환 (피크 메모리 제한)
+- 필요한 컬럼만 남기는 projection, region_big 필터 지원
+  (Supabase 조회와 같은 조건 → 테스트/벤치마크용 오프라인 대체 소스)
+"""
+
+import itertools
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------
+# 설정
+# -----------------------
+READ_CHUNK_CHARS = 1 << 20   # 파일 읽기 단위 (문자)
+CHUNK_ROWS = 50000           # DataFrame 변환 단위 (행)
+
+
+# -----------------------
+# 레코드 스트리밍
+# -----------------------
+def _iter_array_items(f, first: str) -> Iterator[Any]:
+    """'[' 로 시작하는 JSON 배열의 원소를 하나씩 디코딩."""
+    decoder = json.JSONDecoder()
+    buf = first
+    pos = buf.index("[") + 1
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos
+        data = f.read(READ_CHUNK_CHARS)
+        if not data:
+            return False
+        buf = buf[pos:] + data
+        pos = 0
+        return True
+
+    while True:
+        # 공백/쉼표 건너뛰기
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            eof = not fill()
+
+        if pos >= len(buf):
+            raise ValueError("JSON 배열이 닫히지 않았습니다.")
+        if buf[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            eof = not fill()
+            continue
+        # 버퍼 끝에서 잘린 원소일 수 있으면 더 읽고 재시도
+        if end >= len(buf) and not eof:
+            eof = not fill()
+            continue
+
+        pos = end
+        yield item
+
+
+def _iter_ndjson(f, first: str) -> Iterator[Any]:
+    """
+    NDJSON (한 줄에 레코드 하나) 디코딩.
+
+    첫 줄이 완결된 JSON이 아니거나 파일 전체가 레코드 하나뿐이면 단일 JSON 객체 파일로 보고
+    빈 결과 (json.load 후 list가 아니면 빈 DataFrame이던 기존 동작과 동일).
+    """
+    pending = ""
+    first_record: Optional[Any] = None
+    count = 0
+    for piece in itertools.chain(first.splitlines(keepends=True), f):
+        pending += piece
+        if not pending.endswith("\n"):
+            continue
+        line, pending = pending, ""
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # 여러 줄에 걸친 단일 객체 → 기존 동작과 같이 빈 결과
+            if count == 0:
+                return
+            raise
+        count += 1
+        if count == 1:
+            # 두 번째 레코드가 나와야 NDJSON으로 확정
+            first_record = record
+            continue
+        if count == 2:
+            yield first_record
+        yield record
+    if pending.strip():
+        record = json.loads(pending)
+        if count == 0:
+            return
+        if count == 1:
+            yield first_record
+        yield record
+
+
+def iter_json_records(json_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    JSON 배열 또는 NDJSON 파일의 레코드를 순서대로 yield.
+
+    첫 글자가 '['면 배열, '{'면 NDJSON으로 본다. 레코드가 아닌 원소(dict 외)는 건너뛴다.
+    단일 JSON 객체(배열 아님) 파일은 레코드 없음으로 처리한다. 레코드가 하나뿐인 NDJSON은
+    단일 객체 파일과 구분할 수 없으므로 마찬가지로 빈 결과.
+    """
+    with open(json_path, "r", encoding="utf-8-sig") as f:
+        head = f.read(READ_CHUNK_CHARS)
+        while head and not head.strip():
+            head = f.read(READ_CHUNK_CHARS)
+        head = head.lstrip()
+
+        if head.startswith("["):
+            items = _iter_array_items(f, head)
+        elif head.startswith("{"):
+            items = _iter_ndjson(f, head)
+        else:
+            return
+
+        for item in items:
+            if isinstance(item, dict):
+                yield item
+
+
+# -----------------------
+# 컬럼 버퍼 → DataFrame
+# -----------------------
+def _align_chunk_dtypes(frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """
+    값이 모두 None인 chunk 컬럼을 다른 chunk에서 정해진 dtype에 맞춤.
+
+    그대로 concat하면 결과 dtype이 chunk 경계에 따라 달라지고 pandas FutureWarning이 난다.
+    전체를 한 번에 pd.DataFrame(records)로 만든 것과 같게: 숫자는 float64(NaN), bool/문자열은 object(None).
+    """
+    targets: Dict[str, Any] = {}
+    for c in {c for df in frames for c in df.columns}:
+        dtypes = [df[c].dtype for df in frames if c in df.columns and not df[c].isna().all()]
+        if not dtypes:
+            continue
+        numeric = all(dt.kind in "iuf" for dt in dtypes)
+        targets[c] = np.dtype("float64") if numeric else np.dtype(object)
+
+    out = []
+    for df in frames:
+        cast = {
+            c: targets[c] for c in df.columns
+            if c in targets and df[c].dtype != targets[c] and df[c].isna().all()
+        }
+        out.append(df.astype(cast) if cast else df)
+    return out
+
+
+def records_to_frame(
+    records: Iterable[Dict[str, Any]],
+    columns: Optional[List[str]] = None,
+    region_big: Optional[str] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> pd.DataFrame:
+    """
+    레코드 스트림을 컬럼 버퍼에 모아 chunk 단위로 DataFrame 변환 후 결합.
+
+    Args:
+        records: dict 레코드 iterable
+        columns: 남길 컬럼 (None이면 전체, 처음 등장한 순서 유지)
+        region_big: 지정 시 region_big이 같은 레코드만 (Supabase eq 필터와 동일)
+        chunk_rows: 변환 단위 행 수
+
+    Returns:
+        DataFrame
+    """
+    keep = set(columns) if columns else None
+    order: List[str] = list(columns) if columns else []
+    buffers: Dict[str, List[Any]] = {c: [] for c in order}
+    n = 0
+    frames: List[pd.DataFrame] = []
+
+    def flush() -> None:
+        nonlocal buffers, n
+        if n:
+            frames.append(pd.DataFrame({c: buffers[c] for c in order}))
+        buffers = {c: [] for c in order}
+        n = 0
+
+    for rec in records:
+        if region_big and rec.get("region_big") != region_big:
+            continue
+        for k, v in rec.items():
+            if keep is not None and k not in keep:
+                continue
+            col = buffers.get(k)
+            if col is None:
+                # 새 컬럼: 이전 행은 None으로 채움
+                order.append(k)
+                col = buffers[k] = [None] * n
+            col.append(v)
+        n += 1
+        for col in buffers.values():
+            if len(col) < n:
+                col.append(None)
+        if n >= chunk_rows:
+            flush()
+    flush()
+
+    if not frames:
+        return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+    if len(frames) == 1:
+        df = frames[0]
+    else:
+        df = pd.concat(_align_chunk_dtypes(frames), ignore_index=True, sort=False)
+    return df[[c for c in order if c in df.columns]]
+
+
+def load_json_candidates(
+    json_path: str,
+    columns: Optional[List[str]] = None,
+    region_big: Optional[str] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> pd.DataFrame:
+    """JSON 배열/NDJSON 파일에서 후보군 DataFrame 스트리밍 로드."""
+    return records_to_frame(
+        iter_json_records(json_path),
+        columns=columns,
+        region_big=region_big,
+        chunk_rows=chunk_rows,
+    )
+
+
+def dump_ndjson(records: Iterable[Dict[str, Any]], json_path: str) -> int:
+    """레코드를 NDJSON으로 저장 (Supabase 조회 결과를 오프라인 소스로 보관할 때)."""
+    count = 0
+    with open(json_path, "w", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False, default=str))
+            f.write("\n")
+            count += 1
+    return count
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+matrix.py
+
+전체 규칙 일괄 평가 (후보 × 규칙 소속 행렬)
+- 한 카테고리의 규칙들은 같은 술어(시간 윈도우, 반경, 동일 단지/건물, 값 범위)에
+  임계값만 다른 조합이므로, 술어별 원시값(낙찰일, 거리, 비교값)은 후보당 한 번만 계산
+- 규칙별 임계값을 브로드캐스팅해 후보 × 규칙 boolean 행렬을 한 번에 생성
+- 정렬(최신순 + 가까운 순)은 규칙과 무관하므로 한 번만 하고,
+  규칙별 topk는 정렬된 행렬의 열에서 앞쪽 True만 골라 만든다
+"""
+
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .recommend import (
+    KEY_COLUMNS,
+    drop_key_columns,
+    extract_apt_name,
+    extract_building_base,
+    get_rules_for_category,
+    prepare_subject,
+    recency_distance_positions,
+    sort_distances,
+    subject_days,
+)
+from .utils import (
+    category_from_usage,
+    ensure_auction_days,
+    ensure_derived_columns,
+    haversine_distance_m_within,
+    map_unique,
+    safe_float,
+    to_float_array,
+)
+
+
+# -----------------------
+# 후보군 전처리 / 공통 마스크 (규칙 무관)
+# -----------------------
+def prepare_candidates(candidates_df: pd.DataFrame) -> pd.DataFrame:
+    """후보군 복사 + 파생 컬럼/auction_days 보강 (recommend_by_rule 4단계와 동일)."""
+    df = candidates_df.copy()
+    df = ensure_derived_columns(df)
+    df = ensure_auction_days(df)
+    return df
+
+
+def base_mask(df: pd.DataFrame, subj: Dict[str, Any], region_scope: str = "big") -> np.ndarray:
+    """지역 + 동일 용도 필터 (filter_by_region, filter_by_usage와 동일 조건)."""
+    mask = np.ones(len(df), dtype=bool)
+    region_big = subj.get("region_big")
+    if region_scope == "big":
+        if region_big:
+            mask &= (df["region_big"] == region_big).to_numpy()
+    elif region_scope == "mid":
+        region_mid = subj.get("region_mid")
+        if region_big and region_mid:
+            mask &= ((df["region_big"] == region_big) & (df["region_mid"] == region_mid)).to_numpy()
+
+    usage = subj.get("usage")
+    if usage:
+        mask &= (df["usage"] == usage).to_numpy()
+    return mask
+
+
+def region_key(row: Dict[str, Any], region_scope: str) -> Tuple[Any, ...]:
+    """base_mask와 같은 조건의 묶음 키 (키가 같은 대상 물건은 같은 후보 부분집합을 본다)."""
+    region_big = row.get("region_big") or None
+    region_mid = row.get("region_mid") or None
+    if region_scope == "big":
+        region = (region_big,)
+    elif region_scope == "mid" and region_big and region_mid:
+        region = (region_big, region_mid)
+    else:
+        region = (None,)
+    return region + (row.get("usage") or None,)
+
+
+def rule_bounds(rules: List[Dict[str, Any]]) -> Tuple[float, float]:
+    """
+    규칙들 중 최대 반경(m)과 최대 시간 윈도우(일).
+
+    반경 0(거리 무시)이나 윈도우 없는 규칙이 하나라도 있으면 해당 값은 inf.
+    """
+    if not rules:
+        return 0.0, 0.0
+    radii = [r.get("radius_m", 0) or 0 for r in rules]
+    windows = [r.get("time_window_days") or 0 for r in rules]
+    max_radius = math.inf if min(radii) <= 0 else float(max(radii))
+    max_window = math.inf if min(windows) <= 0 else float(max(windows))
+    return max_radius, max_window
+
+
+# -----------------------
+# 술어별 원시값
+# -----------------------
+def subject_coords(subj: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    return safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
+
+
+def candidate_distances(
+    df: pd.DataFrame,
+    subj: Dict[str, Any],
+    max_radius: float = math.inf,
+) -> Optional[np.ndarray]:
+    """
+    대상 물건 → 후보 거리(미터). 대상 좌표가 없으면 None.
+
+    max_radius가 유한하면(모든 규칙에 반경이 있으면) 바운딩 박스 밖 후보는 계산하지 않고
+    NaN으로 둔다. 그런 후보는 어떤 규칙에도 소속되지 않으므로 결과는 같다.
+    """
+    lat, lon = subject_coords(subj)
+    if lat is None or lon is None:
+        return None
+    if "latitude" not in df.columns or "longitude" not in df.columns:
+        return np.full(len(df), np.nan)
+    return haversine_distance_m_within(
+        lat, lon, to_float_array(df["latitude"]), to_float_array(df["longitude"]), max_radius
+    )
+
+
+def same_key_mask(df: pd.DataFrame, subj: Dict[str, Any], extract) -> Optional[np.ndarray]:
+    """
+    주소에서 뽑은 키(단지명/건물)가 대상과 같은지. 대상 키가 없으면 None(필터 없음).
+
+    스냅샷 등에서 키 컬럼(KEY_COLUMNS)이 미리 계산돼 있으면 그 컬럼과 비교한다.
+    """
+    key = extract(subj.get("address", ""))
+    if not key:
+        return None
+    for col, fn in KEY_COLUMNS.items():
+        if fn is extract and col in df.columns:
+            return (df[col] == key).to_numpy()
+    if "address" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return map_unique(df["address"], extract) == key
+
+
+def recency_distance_order(
+    sub: pd.DataFrame,
+    subj: Dict[str, Any],
+    days: Optional[np.ndarray],
+    dist: Optional[np.ndarray],
+) -> np.ndarray:
+    """
+    최신순 + 가까운 순 정렬 위치 (sort_by_recency_then_distance와 같은 순서).
+
+    정렬용 거리는 recommend.sort_distances, 정렬은 recency_distance_positions로 recommend_by_rule과
+    같은 경로를 쓴다 (변환 불가 좌표/0은 inf, float NaN 좌표는 NaN으로 맨 뒤).
+
+    Args:
+        sub, subj: 후보 / 대상 물건 (좌표 원래 값으로 변환 불가와 NaN을 구분)
+        days, dist: sub 행 순서의 auction_days / candidate_distances 결과 (없으면 None)
+    """
+    if dist is None or "latitude" not in sub.columns or "longitude" not in sub.columns:
+        sort_dist = sort_distances(None, len(sub), subj)
+    else:
+        sort_dist = sort_distances(dist, len(sub), subj, sub["latitude"], sub["longitude"])
+    return recency_distance_positions(days, sort_dist)
+
+
+# -----------------------
+# 후보 × 규칙 소속 행렬
+# -----------------------
+def build_membership_matrix(
+    df: pd.DataFrame,
+    subj: Dict[str, Any],
+    rules: List[Dict[str, Any]],
+    days: Optional[np.ndarray],
+    dist: Optional[np.ndarray],
+) -> np.ndarray:
+    """
+    후보(df 행) × 규칙 boolean 행렬.
+
+    M[i, r] = 후보 i가 규칙 r의 시간 윈도우/동일 단지·건물/값 범위/반경 조건을 모두 만족.
+    """
+    n, n_rules = len(df), len(rules)
+    member = np.ones((n, n_rules), dtype=bool)
+    if n == 0 or n_rules == 0:
+        return member
+
+    # 시간 윈도우
+    windows = np.array([r.get("time_window_days") or 0 for r in rules], dtype=float)
+    active = windows > 0
+    if days is not None and active.any():
+        sd = subject_days(subj)
+        with np.errstate(invalid="ignore"):
+            cond = (days[:, None] >= sd - windows[None, active]) & (days[:, None] <= sd)
+        member[:, active] &= cond
+
+    # 동일 아파트 / 건물
+    for flag, extract in (
+        ("require_same_apartment", extract_apt_name),
+        ("require_same_building", extract_building_base),
+    ):
+        cols = np.array([bool(r.get(flag)) for r in rules])
+        if cols.any():
+            same = same_key_mask(df, subj, extract)
+            if same is not None:
+                member[:, cols] &= same[:, None]
+
+    # 값 범위 (키별 후보값은 한 번만 변환)
+    keys = sorted({k for r in rules for k in (r.get("filters") or {})})
+    for key in keys:
+        col = key.replace("_pct", "")
+        center = safe_float(subj.get(col))
+        if center is None:
+            continue
+        pcts = np.array([(r.get("filters") or {}).get(key, np.nan) for r in rules], dtype=float)
+        cols = ~np.isnan(pcts)
+        values = to_float_array(df[col]) if col in df.columns else np.full(n, np.nan)
+        lo = center * (1 - pcts[cols])
+        hi = center * (1 + pcts[cols])
+        with np.errstate(invalid="ignore"):
+            member[:, cols] &= (values[:, None] >= lo[None, :]) & (values[:, None] <= hi[None, :])
+
+    # 거리 반경
+    radii = np.array([r.get("radius_m", 0) or 0 for r in rules], dtype=float)
+    active = radii > 0
+    if dist is not None and active.any():
+        with np.errstate(invalid="ignore"):
+            member[:, active] &= dist[:, None] <= radii[None, active]
+
+    return member
+
+
+def recommend_all_rules_matrix(
+    subject: Dict[str, Any],
+    candidates_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    similar_land: bool = False,
+    category_override: Optional[str] = None,
+    region_scope: str = "big",
+    topk: int = 10,
+    rule_indices: Optional[Iterable[int]] = None,
+    prepared: bool = False,
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    모든 규칙을 소속 행렬 한 번으로 평가 (recommend_by_rule을 규칙마다 부른 것과 같은 결과).
+
+    Args:
+        rule_indices: 평가할 규칙 번호 (1-based, None이면 전체)
+        prepared: candidates_df가 이미 prepare_candidates를 거친 경우 True (복사/보강 생략)
+
+    Returns:
+        {rule_index: [추천결과]} dict
+    """
+    inputs = _rule_inputs(
+        subject, candidates_df, cfg, similar_land, category_override, region_scope, rule_indices, prepared
+    )
+    if inputs is None:
+        return {}
+    subj, category, rules, indices, sub, days, dist = inputs
+    return evaluate_rules(sub, subj, rules, indices, days, dist, topk, category)
+
+
+def iter_rules_matrix(
+    subject: Dict[str, Any],
+    candidates_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    similar_land: bool = False,
+    category_override: Optional[str] = None,
+    region_scope: str = "big",
+    topk: int = 10,
+    rule_indices: Optional[Iterable[int]] = None,
+    prepared: bool = False,
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    recommend_all_rules_matrix의 규칙별 스트리밍 버전.
+
+    규칙 무관 전처리(지역/용도, 경과일, 거리, 정렬)를 한 번 한 뒤 규칙 번호(우선순위) 순으로
+    (rule_index, 추천결과)를 하나씩 만든다. 첫 규칙까지의 비용은 전처리 + 1순위 평가뿐이다.
+    """
+    inputs = _rule_inputs(
+        subject, candidates_df, cfg, similar_land, category_override, region_scope, rule_indices, prepared
+    )
+    if inputs is None:
+        return
+    subj, category, rules, indices, sub, days, dist = inputs
+    order = recency_distance_order(sub, subj, days, dist)
+    for idx in indices:
+        yield idx, evaluate_rules(sub, subj, rules, [idx], days, dist, topk, category, order)[idx]
+
+
+def _rule_inputs(
+    subject: Dict[str, Any],
+    candidates_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    similar_land: bool,
+    category_override: Optional[str],
+    region_scope: str,
+    rule_indices: Optional[Iterable[int]],
+    prepared: bool,
+) -> Optional[Tuple[Any, ...]]:
+    """규칙 평가 공통 입력 (subj, category, rules, indices, sub, days, dist). 규칙이 없으면 None."""
+    subj = prepare_subject(subject)
+    category = category_override or category_from_usage(subj.get("usage", ""), similar_land)
+    rules = get_rules_for_category(cfg, category, similar_land)
+    if not rules:
+        return None
+
+    if rule_indices is None:
+        rule_indices = range(1, len(rules) + 1)
+    indices = sorted({i for i in rule_indices if 1 <= i <= len(rules)})
+
+    # 후보군 전처리 + 규칙 무관 필터
+    df = candidates_df if prepared else prepare_candidates(candidates_df)
+    base = np.flatnonzero(base_mask(df, subj, region_scope))
+    sub = df.iloc[base]
+
+    days = to_float_array(sub["auction_days"]) if "auction_days" in sub.columns else None
+    max_radius, _ = rule_bounds([rules[i - 1] for i in indices])
+    dist = candidate_distances(sub, subj, max_radius)
+    return subj, category, rules, indices, sub, days, dist
+
+
+def evaluate_rules(
+    sub: pd.DataFrame,
+    subj: Dict[str, Any],
+    rules: List[Dict[str, Any]],
+    indices: List[int],
+    days: Optional[np.ndarray],
+    dist: Optional[np.ndarray],
+    topk: int,
+    category: str,
+    order: Optional[np.ndarray] = None,
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    지역/용도 필터를 거친 후보(sub)와 미리 계산한 경과일/거리로 규칙별 topk 생성.
+
+    Args:
+        indices: 평가할 규칙 번호 (1-based, rules 기준)
+        days, dist: sub 행 순서의 auction_days / 거리 배열 (없으면 None)
+        order: 미리 계산한 recency_distance_order (None이면 여기서 계산)
+    """
+    selected = [rules[i - 1] for i in indices]
+    member = build_membership_matrix(sub, subj, selected, days, dist)
+    if order is None:
+        order = recency_distance_order(sub, subj, days, dist)
+    member = member[order]
+
+    results: Dict[int, List[Dict[str, Any]]] = {}
+    for col, (idx, rule) in enumerate(zip(indices, selected)):
+        picks = order[np.flatnonzero(member[:, col])[:topk]]
+        rows = drop_key_columns(sub.iloc[picks]).to_dict(orient="records")
+        for r in rows:
+            r["_rule_name"] = rule.get("name")
+            r["_rule_index"] = idx
+            r["_category"] = category
+        results[idx] = rows
+
+    return results
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+range_index.py
+
+값 범위 필터용 컬럼별 정렬 인덱스
+- 큰 후보군에서 같은 후보군으로 여러 대상/규칙을 반복 조회할 때 사용
+- 컬럼별로 값을 한 번 정렬해 두고, ±pct 구간은 이진 탐색(searchsorted)으로 위치 범위를 구한다
+- 가장 좁은 구간의 후보만 꺼낸 뒤 나머지 컬럼 조건은 그 후보들에서만 확인 (교집합)
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .utils import safe_float, to_float_array
+
+
+# -----------------------
+# 설정
+# -----------------------
+DEFAULT_COLUMNS = [
+    "building_area",
+    "land_area",
+    "building_unit_price",
+    "land_unit_price",
+    "total_appraisal_price",
+]
+
+
+# -----------------------
+# 인덱스 생성 / 조회
+# -----------------------
+def build_range_index(df: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    컬럼별 정렬 인덱스 생성.
+
+    Args:
+        df: 후보군 DataFrame (index 라벨이 유일해야 함)
+        columns: 인덱스할 컬럼 (None이면 DEFAULT_COLUMNS 중 df에 있는 것)
+
+    Returns:
+        {"labels": 행 라벨 배열, "columns": {컬럼: {"values", "order", "sorted"}}}
+    """
+    if not df.index.is_unique:
+        raise ValueError("range index를 만들려면 DataFrame index가 유일해야 합니다.")
+
+    columns = DEFAULT_COLUMNS if columns is None else list(columns)
+    indexed: Dict[str, Dict[str, np.ndarray]] = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+        values = to_float_array(df[col])
+        order = np.argsort(values, kind="stable")   # NaN은 뒤로
+        indexed[col] = {"values": values, "order": order, "sorted": values[order]}
+
+    return {"labels": df.index.to_numpy(), "columns": indexed}
+
+
+def range_index_lookup(
+    index: Dict[str, Any],
+    subj: Dict[str, Any],
+    filters: Dict[str, float],
+) -> Optional[np.ndarray]:
+    """
+    인덱스된 컬럼의 값 범위 조건을 모두 만족하는 행 위치 (인덱스 생성 시 df 기준).
+
+    조건 계산은 within_pct와 같다 (lo = c*(1-p), hi = c*(1+p), 양끝 포함, NaN 제외).
+    대상 값이 없는 키, pct가 None인 키, 인덱스에 없는 컬럼은 건너뛴다. 대상 값이 NaN이면 빈 배열.
+
+    Returns:
+        위치 배열 (적용할 인덱스 조건이 하나도 없으면 None)
+    """
+    bands = []
+    for key, pct in (filters or {}).items():
+        col = key.replace("_pct", "")
+        entry = index["columns"].get(col)
+        center = safe_float(subj.get(col))
+        if entry is None or center is None or pct is None:
+            continue
+        if np.isnan(center):
+            # within_pct와 같이 NaN 기준값은 어떤 행과도 맞지 않음 (정렬 끝의 NaN 블록을 잡지 않도록)
+            return entry["order"][:0]
+        lo, hi = center * (1 - pct), center * (1 + pct)
+        start = np.searchsorted(entry["sorted"], lo, side="left")
+        stop = np.searchsorted(entry["sorted"], hi, side="right")
+        bands.append((max(stop - start, 0), start, stop, lo, hi, entry))
+
+    if not bands:
+        return None
+
+    # 가장 좁은 구간에서 시작해 나머지 조건으로 좁힌다
+    bands.sort(key=lambda b: b[0])
+    _, start, stop, _, _, entry = bands[0]
+    positions = entry["order"][start:stop]
+    for _, _, _, lo, hi, other in bands[1:]:
+        if positions.size == 0:
+            break
+        v = other["values"][positions]
+        with np.errstate(invalid="ignore"):
+            positions = positions[(v >= lo) & (v <= hi)]
+    return positions
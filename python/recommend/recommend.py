@@ -8,23 +8,25 @@ recommend.py
 - 최신 + 가까운 순으로 정렬하여 topk 반환
 """
 
+import math
 import os
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import yaml
 
 from .utils import (
     category_from_usage,
     derive_fields,
-    haversine_distance_m,
+    haversine_distance_m_within,
+    parsed_mask,
     safe_float,
     to_days_from_epoch,
-    within_pct,
-    ensure_derived_columns,
-    ensure_auction_days,
+    to_float_array,
+    within_pct_mask,
     CAT_PLANT_WAREHOUSE_ETC,
     CAT_OTHER_BIG,
 )
@@ -98,6 +100,57 @@ def extract_building_base(address: str) -> Optional[str]:
     return cleaned if cleaned else None
 
 
+# 주소 키 사전 계산 컬럼 (스냅샷 게시 시 추가, 추천 결과에서는 제외)
+KEY_COLUMNS = {
+    "_apt_name": extract_apt_name,
+    "_building_base": extract_building_base,
+}
+
+
+def add_key_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """단지명/건물 키를 주소 고유값마다 한 번만 추출해 컬럼으로 추가."""
+    if "address" not in df.columns:
+        return df
+    from .utils import map_unique
+
+    df = df.copy()
+    for col, extract in KEY_COLUMNS.items():
+        df[col] = map_unique(df["address"], extract)
+    return df
+
+
+def drop_key_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """사전 계산 키 컬럼 제거 (결과 반환 직전)."""
+    cols = [c for c in KEY_COLUMNS if c in df.columns]
+    return df.drop(columns=cols) if cols else df
+
+
+# -----------------------
+# 대상 물건 보강
+# -----------------------
+def prepare_subject(subject: Dict[str, Any]) -> Dict[str, Any]:
+    """대상 물건 dict 복사 후 파생값(단가/총감정가)과 auction_days 보강."""
+    subj = {**subject}
+    derived = derive_fields(subj)
+    for k, v in derived.items():
+        if subj.get(k) is None:
+            subj[k] = v
+    if subj.get("auction_days") is None:
+        subj["auction_days"] = to_days_from_epoch(subj.get("auction_date"))
+    return subj
+
+
+def subject_days(subj: Dict[str, Any]) -> int:
+    """시간 윈도우 기준일 (auction_days → auction_date → 오늘)."""
+    subj_days = subj.get("auction_days")
+    if subj_days is None:
+        subj_days = to_days_from_epoch(subj.get("auction_date"))
+    if subj_days is None:
+        # 기준일이 없으면 오늘 기준
+        subj_days = to_days_from_epoch(datetime.now())
+    return subj_days
+
+
 # -----------------------
 # 필터링 함수들
 # -----------------------
@@ -125,12 +178,7 @@ def filter_by_usage(df: pd.DataFrame, subj: Dict[str, Any]) -> pd.DataFrame:
 
 def filter_by_time_window(df: pd.DataFrame, subj: Dict[str, Any], days: int) -> pd.DataFrame:
     """시간 윈도우 필터링 (낙찰일 기준)."""
-    subj_days = subj.get("auction_days")
-    if subj_days is None:
-        subj_days = to_days_from_epoch(subj.get("auction_date"))
-    if subj_days is None:
-        # 기준일이 없으면 오늘 기준
-        subj_days = to_days_from_epoch(datetime.now())
+    subj_days = subject_days(subj)
 
     if "auction_days" in df.columns:
         return df[(df["auction_days"] >= subj_days - days) & (df["auction_days"] <= subj_days)]
@@ -138,20 +186,20 @@ def filter_by_time_window(df: pd.DataFrame, subj: Dict[str, Any], days: int) ->
 
 
 def filter_by_radius(df: pd.DataFrame, subj: Dict[str, Any], radius_m: float) -> pd.DataFrame:
-    """거리 반경 필터링."""
+    """거리 반경 필터링 (바운딩 박스로 1차 선별 후 박스 안의 후보만 하버사인 계산)."""
     if radius_m <= 0:
         return df
     lat, lon = safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
     if lat is None or lon is None:
         return df
+    if "latitude" not in df.columns or "longitude" not in df.columns:
+        return df.iloc[0:0]
 
-    def in_radius(row):
-        r_lat, r_lon = safe_float(row.get("latitude")), safe_float(row.get("longitude"))
-        dist = haversine_distance_m(lat, lon, r_lat, r_lon)
-        return dist is not None and dist <= radius_m
-
-    mask = df.apply(in_radius, axis=1)
-    return df[mask]
+    dist = haversine_distance_m_within(
+        lat, lon, to_float_array(df["latitude"]), to_float_array(df["longitude"]), radius_m
+    )
+    with np.errstate(invalid="ignore"):
+        return df[dist <= radius_m]
 
 
 def filter_by_same_apartment(df: pd.DataFrame, subj: Dict[str, Any]) -> pd.DataFrame:
@@ -159,6 +207,8 @@ def filter_by_same_apartment(df: pd.DataFrame, subj: Dict[str, Any]) -> pd.DataF
     apt_name = extract_apt_name(subj.get("address", ""))
     if not apt_name:
         return df
+    if "_apt_name" in df.columns:
+        return df[(df["_apt_name"] == apt_name).to_numpy()]
 
     def same_apt(row):
         row_apt = extract_apt_name(row.get("address", ""))
@@ -173,6 +223,8 @@ def filter_by_same_building(df: pd.DataFrame, subj: Dict[str, Any]) -> pd.DataFr
     building_base = extract_building_base(subj.get("address", ""))
     if not building_base:
         return df
+    if "_building_base" in df.columns:
+        return df[(df["_building_base"] == building_base).to_numpy()]
 
     def same_building(row):
         row_base = extract_building_base(row.get("address", ""))
@@ -182,55 +234,141 @@ def filter_by_same_building(df: pd.DataFrame, subj: Dict[str, Any]) -> pd.DataFr
     return df[mask]
 
 
-def filter_by_value_range(df: pd.DataFrame, subj: Dict[str, Any], filters: Dict[str, float]) -> pd.DataFrame:
-    """값 범위 필터링 (면적, 단가, 감정가 등)."""
-    if not filters:
-        return df
-
-    for key, pct in filters.items():
+def value_range_mask(df: pd.DataFrame, subj: Dict[str, Any], filters: Dict[str, float]) -> np.ndarray:
+    """값 범위 조건 전체를 하나의 boolean 마스크로 (키마다 컬럼을 한 번만 float 변환)."""
+    mask = np.ones(len(df), dtype=bool)
+    for key, pct in (filters or {}).items():
         # key 형식: building_area_pct -> building_area
         col = key.replace("_pct", "")
         subj_val = safe_float(subj.get(col))
         if subj_val is None:
             continue
+        if col not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        if pct is None:
+            # 범위 없음: safe_float 변환만 되면 통과 (float NaN도 통과)
+            mask &= parsed_mask(df[col])
+            continue
+        mask &= within_pct_mask(to_float_array(df[col]), subj_val, pct)
+    return mask
 
-        def in_range(row, c=col, sv=subj_val, p=pct):
-            rv = safe_float(row.get(c))
-            return rv is not None and within_pct(sv, rv, p)
 
-        mask = df.apply(in_range, axis=1)
-        df = df[mask]
+def filter_by_value_range(
+    df: pd.DataFrame,
+    subj: Dict[str, Any],
+    filters: Dict[str, float],
+    index: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """
+    값 범위 필터링 (면적, 단가, 감정가 등).
 
-    return df
+    Args:
+        index: range_index.build_range_index로 만든 정렬 인덱스 (선택).
+            인덱스에 있는 컬럼은 이진 탐색으로, 나머지(및 pct 없는 키)는 마스크로 판정한다.
+    """
+    if not filters:
+        return df
+
+    if index is None:
+        return df[value_range_mask(df, subj, filters)]
+
+    from .range_index import range_index_lookup
+
+    indexed = index["columns"]
+    rest = {
+        k: p for k, p in filters.items()
+        if p is None or k.replace("_pct", "") not in indexed
+    }
+    mask = value_range_mask(df, subj, rest)
+    positions = range_index_lookup(index, subj, filters)
+    if positions is not None:
+        mask &= df.index.isin(index["labels"][positions])
+    return df[mask]
 
 
 # -----------------------
 # 정렬
 # -----------------------
-def sort_by_recency_then_distance(df: pd.DataFrame, subj: Dict[str, Any]) -> pd.DataFrame:
-    """최신순 + 가까운 순 정렬."""
-    lat, lon = safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
+def sort_distances(
+    dist: Optional[np.ndarray],
+    n: int,
+    subj: Dict[str, Any],
+    lat_values: Optional[pd.Series] = None,
+    lon_values: Optional[pd.Series] = None,
+) -> np.ndarray:
+    """
+    haversine_distance_m_within 결과 → 정렬용 거리.
 
-    # 거리 계산
-    def calc_dist(row):
-        r_lat, r_lon = safe_float(row.get("latitude")), safe_float(row.get("longitude"))
-        return haversine_distance_m(lat, lon, r_lat, r_lon) or float("inf")
+    dist가 None(대상/후보 좌표 컬럼 없음)이면 전부 inf. 변환 불가 좌표/박스 밖/0은 inf,
+    float NaN 좌표는 NaN 유지 (기존 `haversine(...) or inf`와 동일).
+    """
+    if dist is None:
+        return np.full(n, np.inf)
+    dist = dist.copy()
+    nan = np.flatnonzero(np.isnan(dist))
+    if nan.size:
+        lat, lon = safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
+        lat_rows, lon_rows = lat_values.iloc[nan], lon_values.iloc[nan]
+        keep = parsed_mask(lat_rows) & parsed_mask(lon_rows)
+        keep &= (
+            np.isnan(to_float_array(lat_rows)) | np.isnan(to_float_array(lon_rows))
+            | math.isnan(lat) | math.isnan(lon)
+        )
+        dist[nan[~keep]] = np.inf
+    dist[dist == 0] = np.inf
+    return dist
 
-    df = df.copy()
-    df["_distance"] = df.apply(calc_dist, axis=1)
+
+def recency_distance_positions(days: Optional[np.ndarray], dist: np.ndarray) -> np.ndarray:
+    """
+    최신순 + 가까운 순 정렬 위치 (정렬 키 두 개만으로 sort_values, 행 전체는 옮기지 않음).
+
+    Args:
+        days: auction_days 값 (컬럼 dtype 그대로, 없으면 None → 거리만으로 정렬)
+        dist: sort_distances 결과
+    """
+    keys = pd.DataFrame({"_distance": dist})
 
     # auction_days 내림차순 (최신), 거리 오름차순
     sort_cols = []
     sort_asc = []
-    if "auction_days" in df.columns:
+    if days is not None:
+        keys.insert(0, "auction_days", days)
         sort_cols.append("auction_days")
         sort_asc.append(False)  # 내림차순 (최신)
     sort_cols.append("_distance")
     sort_asc.append(True)  # 오름차순 (가까운)
 
-    df = df.sort_values(sort_cols, ascending=sort_asc)
-    df = df.drop(columns=["_distance"])
-    return df
+    return keys.sort_values(sort_cols, ascending=sort_asc).index.to_numpy()
+
+
+def sort_by_recency_then_distance(
+    df: pd.DataFrame,
+    subj: Dict[str, Any],
+    radius_m: float = 0,
+) -> pd.DataFrame:
+    """
+    최신순 + 가까운 순 정렬.
+
+    radius_m > 0이면 반경의 바운딩 박스 밖 행은 거리 계산 없이 inf로 둔다
+    (filter_by_radius를 거친 행은 모두 박스 안이므로 순서는 같다).
+    """
+    lat, lon = safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
+
+    dist = None
+    has_coords = "latitude" in df.columns and "longitude" in df.columns
+    if lat is not None and lon is not None and has_coords:
+        dist = haversine_distance_m_within(
+            lat, lon, to_float_array(df["latitude"]), to_float_array(df["longitude"]),
+            radius_m if radius_m > 0 else math.inf,
+        )
+    if has_coords:
+        dist = sort_distances(dist, len(df), subj, df["latitude"], df["longitude"])
+    else:
+        dist = sort_distances(None, len(df), subj)
+
+    days = df["auction_days"].to_numpy() if "auction_days" in df.columns else None
+    return df.iloc[recency_distance_positions(days, dist)]
 
 
 # -----------------------
@@ -245,31 +383,28 @@ def recommend_by_rule(
     category_override: Optional[str] = None,
     region_scope: str = "big",
     topk: int = 10,
+    value_index: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     """
     규칙 기반 유사물건 추천 수행.
 
     Args:
         subject: 대상 물건 정보 dict
-        candidates_df: 후보군 DataFrame (auction_cases 테이블)
+        candidates_df: 후보군 DataFrame (auction_cases 테이블). 수정하지 않는다.
+            table.CandidateTable을 넘기면 컬럼 변환 결과를 여러 조회가 공유한다.
         cfg: 설정 dict (load_config()로 로드)
         rule_index: 적용할 규칙 순번 (1-based)
         similar_land: 토지 유사 모드 (PLANT_WAREHOUSE_ETC, OTHER_BIG용)
         category_override: 카테고리 수동 지정
         region_scope: 지역 범위 ("big"=시도, "mid"=시군구)
         topk: 반환할 최대 건수
+        value_index: candidates_df로 만든 값 범위 정렬 인덱스 (선택, 큰 후보군 반복 조회용)
 
     Returns:
         추천 결과 리스트 (dict)
     """
     # 1. 대상 물건 보강 (파생값 계산)
-    subj = {**subject}
-    derived = derive_fields(subj)
-    for k, v in derived.items():
-        if subj.get(k) is None:
-            subj[k] = v
-    if subj.get("auction_days") is None:
-        subj["auction_days"] = to_days_from_epoch(subj.get("auction_date"))
+    subj = prepare_subject(subject)
 
     # 2. 카테고리 결정
     category = category_override or category_from_usage(subj.get("usage", ""), similar_land)
@@ -284,43 +419,45 @@ def recommend_by_rule(
 
     rule = rules[rule_index - 1]
 
-    # 4. 후보군 전처리
-    df = candidates_df.copy()
-    df = ensure_derived_columns(df)
-    df = ensure_auction_days(df)
+    # 4. 후보군 테이블 (복사/전처리 없이 읽기 전용으로 공유)
+    from .table import (
+        CandidateTable,
+        radius_positions,
+        region_usage_positions,
+        same_key_positions,
+        time_window_positions,
+        top_positions,
+        value_range_positions,
+    )
 
-    # 5. 필터링 적용
-    # 5.1. 지역 필터
-    df = filter_by_region(df, subj, scope=region_scope)
+    table = candidates_df if isinstance(candidates_df, CandidateTable) else CandidateTable(candidates_df)
 
-    # 5.2. 용도 필터 (동일 용도만)
-    df = filter_by_usage(df, subj)
+    # 5. 필터링 적용 (살아남은 행 위치만 좁혀 나감)
+    # 5.1. 지역 필터 + 5.2. 용도 필터 (동일 용도만)
+    pos = region_usage_positions(table, subj, scope=region_scope)
 
     # 5.3. 시간 윈도우
     time_window = rule.get("time_window_days")
     if time_window:
-        df = filter_by_time_window(df, subj, time_window)
+        pos = time_window_positions(table, subj, pos, time_window)
 
     # 5.4. 동일 아파트/건물
     if rule.get("require_same_apartment"):
-        df = filter_by_same_apartment(df, subj)
+        pos = same_key_positions(table, subj, pos, extract_apt_name)
     if rule.get("require_same_building"):
-        df = filter_by_same_building(df, subj)
+        pos = same_key_positions(table, subj, pos, extract_building_base)
 
     # 5.5. 값 범위 필터
     filters = rule.get("filters", {})
-    df = filter_by_value_range(df, subj, filters)
+    pos = value_range_positions(table, subj, pos, filters, index=value_index)
 
     # 5.6. 거리 반경
     radius_m = rule.get("radius_m", 0)
-    if radius_m > 0:
-        df = filter_by_radius(df, subj, radius_m)
-
-    # 6. 정렬
-    df = sort_by_recency_then_distance(df, subj)
+    pos, dist = radius_positions(table, subj, pos, radius_m)
 
-    # 7. topk 반환
-    results = df.head(topk).to_dict(orient="records")
+    # 6. 정렬 (정렬 키만) + 7. topk 행만 생성
+    top = top_positions(table, subj, pos, topk, radius_m, dist)
+    results = drop_key_columns(table.rows(top)).to_dict(orient="records")
 
     # 결과에 메타 정보 추가
     for r in results:
@@ -339,29 +476,56 @@ def recommend_all_rules(
     category_override: Optional[str] = None,
     region_scope: str = "big",
     topk: int = 10,
+    prepared: bool = False,
 ) -> Dict[int, List[Dict[str, Any]]]:
     """
     모든 규칙에 대해 추천 수행.
 
+    규칙마다 후보군을 다시 거르지 않고 후보 × 규칙 소속 행렬로 한 번에 평가한다
+    (matrix.recommend_all_rules_matrix, 결과는 규칙별 recommend_by_rule과 동일).
+    prepared=True면 후보군 복사/파생 컬럼 보강을 생략한다 (스냅샷 등 전처리 완료 후보군).
+
     Returns:
         {rule_index: [추천결과]} dict
     """
-    category = category_override or category_from_usage(subject.get("usage", ""), similar_land)
-    rule_count = get_rule_count(cfg, category, similar_land)
-
-    results = {}
-    for idx in range(1, rule_count + 1):
-        res = recommend_by_rule(
-            subject,
-            candidates_df,
-            cfg,
-            rule_index=idx,
-            similar_land=similar_land,
-            category_override=category_override,
-            region_scope=region_scope,
-            topk=topk,
-        )
-        results[idx] = res
+    from .matrix import recommend_all_rules_matrix
 
-    return results
+    return recommend_all_rules_matrix(
+        subject,
+        candidates_df,
+        cfg,
+        similar_land=similar_land,
+        category_override=category_override,
+        region_scope=region_scope,
+        topk=topk,
+        prepared=prepared,
+    )
 
+
+def iter_recommend_all_rules(
+    subject: Dict[str, Any],
+    candidates_df: pd.DataFrame,
+    cfg: Dict[str, Any],
+    similar_land: bool = False,
+    category_override: Optional[str] = None,
+    region_scope: str = "big",
+    topk: int = 10,
+    prepared: bool = False,
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    recommend_all_rules의 스트리밍 버전: 규칙 우선순위 순으로 (rule_index, 추천결과)를 만든다.
+
+    각 규칙의 결과는 recommend_all_rules와 같고, 규칙이 평가되는 즉시 받을 수 있다.
+    """
+    from .matrix import iter_rules_matrix
+
+    yield from iter_rules_matrix(
+        subject,
+        candidates_df,
+        cfg,
+        similar_land=similar_land,
+        category_override=category_override,
+        region_scope=region_scope,
+        topk=topk,
+        prepared=prepared,
+    )
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+"""
+snapshot.py
+
+여러 워커가 공유하는 후보군 스냅샷 (메모리 매핑 Arrow 파일)
+- 전처리(파생 컬럼, auction_days)까지 끝난 후보군을 비압축 Arrow IPC 파일로 한 번 게시
+- 워커는 파일을 memory-map으로 열어 복사 없이 참조 (페이지는 OS 페이지 캐시에서 공유)
+- 요청마다 지역/용도 조건에 맞는 행만 골라 pandas로 변환 → 워커 수가 늘어도 전체 RSS는 거의 일정
+- 게시는 버전 디렉토리 작성 후 CURRENT 포인터 파일을 os.replace로 교체 (원자적 스냅샷 교체)
+  열려 있던 이전 버전은 워커가 다음 조회 때 새 버전으로 갈아탈 때까지 그대로 유효
+- 게시 시 미리 만들어 두는 것 (새 프로세스는 열기만 하면 됨, 수 ms)
+  - 반복값이 많은 문자열 컬럼은 dictionary 인코딩
+  - 타입이 섞인 object 컬럼(숫자/문자열/None/NaN)은 값별 JSON으로 저장 → 열 때 원래 타입으로 복원
+  - 주소 키 컬럼 (_apt_name, _building_base)
+  - 지역/용도 그룹 인덱스: (region_big, region_mid, usage)별 행 위치 → 전체 스캔 없이 부분집합
+  - 위도 정렬 인덱스: 규칙 최대 반경 밖 위도 대역의 행은 변환 전에 제외
+
+디렉토리 구조:
+    <snapshot_dir>/CURRENT                  현재 버전 이름
+    <snapshot_dir>/<version>/candidates.arrow
+    <snapshot_dir>/<version>/index.json     그룹 키 → group_rows 구간
+    <snapshot_dir>/<version>/group_rows.npy 그룹별로 모은 행 위치 (그룹 내 원래 순서)
+    <snapshot_dir>/<version>/lat_order.npy  위도순 행 위치 (좌표 없는 행은 뒤)
+    <snapshot_dir>/<version>/lat_sorted.npy 위도순 위도 값
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+
+from .matrix import prepare_candidates
+from .recommend import add_key_columns
+from .utils import bbox_margin_deg, safe_float, to_float_array
+
+
+# -----------------------
+# 설정
+# -----------------------
+CURRENT_FILE = "CURRENT"
+TABLE_FILE = "candidates.arrow"
+INDEX_FILE = "index.json"
+GROUP_ROWS_FILE = "group_rows.npy"
+LAT_ORDER_FILE = "lat_order.npy"
+LAT_SORTED_FILE = "lat_sorted.npy"
+GROUP_COLUMNS = ["region_big", "region_mid", "usage"]
+
+KEEP_VERSIONS = 2        # 게시 후 남겨둘 이전 버전 수 (아직 열고 있는 워커용)
+DICT_MAX_RATIO = 0.5     # 고유값 비율이 이 이하인 문자열 컬럼은 dictionary 인코딩
+TMP_MAX_AGE_SEC = 3600   # 이보다 오래된 .tmp- 항목은 중단된 게시의 잔여물로 보고 삭제
+
+# 필드 메타데이터: 값별 JSON으로 저장한 object 컬럼 표시
+ENCODING_KEY = b"nplogic.encoding"
+ENCODING_JSON = b"json"
+
+
+# -----------------------
+# 게시
+# -----------------------
+def _json_default(v: Any) -> Any:
+    return v.item() if isinstance(v, np.generic) else str(v)
+
+
+def _column_to_arrow(s: pd.Series) -> Tuple[pa.Array, bool]:
+    """
+    컬럼 하나를 Arrow 배열로.
+
+    float NaN은 값 그대로 둔다. object 컬럼은 문자열(+None)만 있으면 문자열로, 그 외(숫자/NaN/bool이
+    섞인 경우)는 값마다 JSON 문자열로 저장해 열 때 원래 파이썬 값으로 복원한다.
+
+    Returns:
+        (배열, JSON 인코딩 여부)
+    """
+    if pd.api.types.is_float_dtype(s.dtype):
+        # null 비트맵 없이 NaN 유지 → to_pandas 시 변환 없이 그대로 사용
+        return pa.array(s.to_numpy(dtype=float), type=pa.float64()), False
+    encoded = False
+    if s.dtype == object:
+        try:
+            arr = pa.array(s, from_pandas=False)
+            if not (pa.types.is_string(arr.type) or pa.types.is_null(arr.type)):
+                raise TypeError(arr.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            values = [json.dumps(v, ensure_ascii=False, default=_json_default) for v in s]
+            arr = pa.array(values, type=pa.string())
+            encoded = True
+    else:
+        arr = pa.array(s, from_pandas=True)
+    if pa.types.is_string(arr.type) and len(arr):
+        dictionary = arr.dictionary_encode()
+        if len(dictionary.dictionary) <= len(arr) * DICT_MAX_RATIO:
+            return dictionary, encoded
+    return arr, encoded
+
+
+def frame_to_table(df: pd.DataFrame) -> pa.Table:
+    """전처리된 후보군 DataFrame → Arrow Table (JSON 인코딩 컬럼은 필드 메타데이터로 표시)."""
+    fields, arrays = [], []
+    for c in df.columns:
+        arr, encoded = _column_to_arrow(df[c])
+        meta = {ENCODING_KEY: ENCODING_JSON} if encoded else None
+        fields.append(pa.field(str(c), arr.type, metadata=meta))
+        arrays.append(arr)
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def _decode_json_column(s: pd.Series) -> pd.Series:
+    """JSON 인코딩 컬럼 → 원래 값의 object 컬럼 (고유값마다 한 번만 디코딩)."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    decoded = np.empty(len(uniques) + 1, dtype=object)
+    for i, u in enumerate(uniques):
+        decoded[i] = json.loads(u)
+    decoded[-1] = None
+    return pd.Series(decoded[codes], index=s.index, name=s.name, dtype=object)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_version(version_dir: str, table: pa.Table) -> None:
+    """버전 디렉토리에 테이블 파일 기록."""
+    with pa.OSFile(os.path.join(version_dir, TABLE_FILE), "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _json_key(v: Any) -> Any:
+    """그룹 키 값 → JSON 값 (결측은 None)."""
+    if v is None or (isinstance(v, float) and np.isnan(v)):
+        return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _write_indexes(version_dir: str, df: pd.DataFrame) -> None:
+    """지역/용도 그룹 인덱스와 위도 정렬 인덱스 기록."""
+    n = len(df)
+    keys = pd.DataFrame({
+        c: df[c].astype(object) if c in df.columns else pd.Series([None] * n, dtype=object)
+        for c in GROUP_COLUMNS
+    })
+    groups = []
+    rows = []
+    start = 0
+    if n:
+        for key, pos in keys.groupby(GROUP_COLUMNS, dropna=False, sort=False).indices.items():
+            rows.append(pos)
+            groups.append([_json_key(k) for k in key] + [start, start + len(pos)])
+            start += len(pos)
+    np.save(
+        os.path.join(version_dir, GROUP_ROWS_FILE),
+        np.concatenate(rows).astype(np.int64) if rows else np.zeros(0, dtype=np.int64),
+    )
+
+    has_coords = "latitude" in df.columns
+    if has_coords:
+        lat = to_float_array(df["latitude"])
+        order = np.argsort(lat, kind="stable")
+        np.save(os.path.join(version_dir, LAT_ORDER_FILE), order.astype(np.int64))
+        np.save(os.path.join(version_dir, LAT_SORTED_FILE), lat[order])
+
+    meta = {"rows": n, "group_columns": GROUP_COLUMNS, "groups": groups, "lat_index": has_coords}
+    with open(os.path.join(version_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def publish_snapshot(
+    candidates_df: pd.DataFrame,
+    snapshot_dir: str,
+    prepared: bool = False,
+) -> str:
+    """
+    후보군을 새 스냅샷 버전으로 게시하고 CURRENT를 교체.
+
+    Args:
+        candidates_df: 후보군 DataFrame
+        snapshot_dir: 스냅샷 루트 디렉토리
+        prepared: 이미 prepare_candidates를 거친 경우 True
+
+    Returns:
+        게시된 버전 이름
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    df = candidates_df if prepared else prepare_candidates(candidates_df)
+    df = add_key_columns(df).reset_index(drop=True)
+    table = frame_to_table(df)
+
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    tmp_dir = tempfile.mkdtemp(dir=snapshot_dir, prefix=".tmp-")
+    try:
+        _write_version(tmp_dir, table)
+        _write_indexes(tmp_dir, df)
+        os.replace(tmp_dir, os.path.join(snapshot_dir, version))
+    finally:
+        # 기록 중 실패하면 작성하던 임시 디렉토리 삭제 (성공 시에는 이미 이름이 바뀜)
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    _write_atomic(os.path.join(snapshot_dir, CURRENT_FILE), version.encode("utf-8"))
+
+    _cleanup_versions(snapshot_dir, keep=KEEP_VERSIONS, current=version)
+    return version
+
+
+def _cleanup_versions(snapshot_dir: str, keep: int, current: str) -> None:
+    """
+    오래된 버전 삭제 (Windows에서 아직 매핑 중인 파일은 삭제 실패 → 다음 게시 때 재시도).
+
+    프로세스가 중간에 죽어 남은 .tmp- 항목도 TMP_MAX_AGE_SEC보다 오래됐으면 삭제한다
+    (다른 프로세스가 게시 중인 최근 항목은 건드리지 않음).
+    """
+    entries = os.listdir(snapshot_dir)
+    versions = sorted((d for d in entries if d.startswith("v") and d != current), reverse=True)
+    for old in versions[keep:]:
+        shutil.rmtree(os.path.join(snapshot_dir, old), ignore_errors=True)
+
+    now = time.time()
+    for name in entries:
+        path = os.path.join(snapshot_dir, name)
+        if not name.startswith(".tmp-"):
+            continue
+        try:
+            stale = now - os.path.getmtime(path) > TMP_MAX_AGE_SEC
+        except OSError:
+            continue
+        if not stale:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# -----------------------
+# 조회
+# -----------------------
+def current_version(snapshot_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(snapshot_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+class CandidateSnapshot:
+    """
+    memory-map으로 연 스냅샷 버전 하나.
+
+    table과 인덱스 배열은 파일 매핑을 그대로 참조하므로 열기 비용이 거의 없고,
+    frame()이 요청 조건에 맞는 행만 pandas로 변환한다 (필요한 페이지만 읽힘).
+    인덱스 파일이 없는 버전은 Arrow compute 스캔으로 같은 조건을 판정한다.
+    """
+
+    def __init__(self, snapshot_dir: str, version: str):
+        self.snapshot_dir = snapshot_dir
+        self.version = version
+        self.path = os.path.join(snapshot_dir, version)
+        source = pa.memory_map(os.path.join(self.path, TABLE_FILE), "r")
+        self.table: pa.Table = ipc.open_file(source).read_all()
+        self.json_columns = {
+            f.name for f in self.table.schema
+            if f.metadata and f.metadata.get(ENCODING_KEY) == ENCODING_JSON
+        }
+
+        self.groups: Optional[List[List[Any]]] = None
+        self.group_rows: Optional[np.ndarray] = None
+        self.lat_order: Optional[np.ndarray] = None
+        self.lat_sorted: Optional[np.ndarray] = None
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.groups = meta["groups"]
+            self.group_rows = np.load(os.path.join(self.path, GROUP_ROWS_FILE), mmap_mode="r")
+            if meta.get("lat_index"):
+                self.lat_order = np.load(os.path.join(self.path, LAT_ORDER_FILE), mmap_mode="r")
+                self.lat_sorted = np.load(os.path.join(self.path, LAT_SORTED_FILE), mmap_mode="r")
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    def has_region(self, region_big: str) -> bool:
+        """region_big이 같은 행이 하나라도 있는지."""
+        if self.groups is not None:
+            return any(g[0] == region_big for g in self.groups)
+        return bool(pc.any(pc.equal(self.table["region_big"], region_big)).as_py())
+
+    def _conditions(self, subj: Dict[str, Any], region_scope: str) -> Dict[str, Any]:
+        """base_mask와 같은 조건 (컬럼 → 값)."""
+        cond: Dict[str, Any] = {}
+        region_big = subj.get("region_big")
+        if region_scope == "big":
+            if region_big:
+                cond["region_big"] = region_big
+        elif region_scope == "mid":
+            region_mid = subj.get("region_mid")
+            if region_big and region_mid:
+                cond["region_big"] = region_big
+                cond["region_mid"] = region_mid
+        usage = subj.get("usage")
+        if usage:
+            cond["usage"] = usage
+        return cond
+
+    def positions(
+        self,
+        subj: Dict[str, Any],
+        region_scope: str = "big",
+        max_radius: float = math.inf,
+    ) -> Optional[np.ndarray]:
+        """
+        matrix.base_mask와 같은 조건의 행 위치 (오름차순, 조건이 없으면 None = 전체).
+
+        max_radius가 유한하고 대상 좌표가 있으면 위도 대역(반경 이내일 수 있는 행)으로 더 좁힌다.
+        규칙이 모두 반경 조건을 갖는 경우에만 넘겨야 결과가 같다.
+        """
+        cond = self._conditions(subj, region_scope)
+        pos: Optional[np.ndarray] = None
+
+        if cond and self.groups is not None:
+            cols = {c: i for i, c in enumerate(GROUP_COLUMNS)}
+            parts = [
+                self.group_rows[g[3]:g[4]]
+                for g in self.groups
+                if all(g[cols[c]] == v for c, v in cond.items())
+            ]
+            pos = np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+        elif cond:
+            mask = None
+            for c, v in cond.items():
+                eq = pc.equal(self.table[c], v)
+                mask = eq if mask is None else pc.and_(mask, eq)
+            pos = np.flatnonzero(mask.to_numpy(zero_copy_only=False) == True)  # noqa: E712 (null → False)
+
+        band = self._lat_band(subj, max_radius)
+        if band is not None:
+            pos = np.sort(band) if pos is None else np.intersect1d(pos, band, assume_unique=True)
+        return pos
+
+    def _lat_band(self, subj: Dict[str, Any], max_radius: float) -> Optional[np.ndarray]:
+        """대상 위도 ± 최대 반경(위도 차만으로도 반경 밖인 행 제외)."""
+        if self.lat_sorted is None or not math.isfinite(max_radius):
+            return None
+        lat, lon = safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
+        if lat is None or lon is None or math.isnan(lat) or math.isnan(lon):
+            return None
+        dlat, _ = bbox_margin_deg(max_radius, lat)
+        lo = np.searchsorted(self.lat_sorted, lat - dlat, side="left")
+        hi = np.searchsorted(self.lat_sorted, lat + dlat, side="right")
+        return np.asarray(self.lat_order[lo:hi])
+
+    def frame(
+        self,
+        subj: Optional[Dict[str, Any]] = None,
+        region_scope: str = "big",
+        columns: Optional[List[str]] = None,
+        max_radius: float = math.inf,
+    ) -> pd.DataFrame:
+        """
+        조건에 맞는 행만 DataFrame으로 (subj가 None이면 전체).
+
+        지역/용도 필터는 추천 엔진과 같으므로 결과를 그대로 넘기면 같은 추천이 나온다.
+        dictionary 컬럼은 일반 문자열로, JSON 인코딩 컬럼은 원래 값으로 풀어서 돌려준다 (다른 소스와 같은 dtype).
+        """
+        table = self.table if columns is None else self.table.select(columns)
+        if subj is not None:
+            pos = self.positions(subj, region_scope, max_radius)
+            if pos is not None:
+                table = table.take(pa.array(pos, type=pa.int64()))
+        table = pa.table({
+            name: col.cast(col.type.value_type) if pa.types.is_dictionary(col.type) else col
+            for name, col in zip(table.column_names, table.columns)
+        })
+        df = table.to_pandas(split_blocks=True)
+        for name in self.json_columns.intersection(df.columns):
+            df[name] = _decode_json_column(df[name])
+        return df
+
+
+# -----------------------
+# 워커용 현재 스냅샷 (교체 감지)
+# -----------------------
+_OPEN: Dict[str, CandidateSnapshot] = {}
+ATTACH_STATS = {"hit": 0, "miss": 0}   # 열린 매핑 재사용 / 새 버전 열기
+
+
+def attach_snapshot(snapshot_dir: str) -> Optional[CandidateSnapshot]:
+    """
+    현재 스냅샷을 열거나, CURRENT가 바뀌었으면 새 버전으로 교체해서 반환.
+
+    같은 프로세스(및 fork된 자식)에서는 열린 매핑을 재사용한다. 게시된 스냅샷이 없으면 None.
+    """
+    version = current_version(snapshot_dir)
+    if version is None:
+        return None
+    key = os.path.abspath(snapshot_dir)
+    snap = _OPEN.get(key)
+    if snap is None or snap.version != version:
+        ATTACH_STATS["miss"] += 1
+        snap = _OPEN[key] = CandidateSnapshot(snapshot_dir, version)
+    else:
+        ATTACH_STATS["hit"] += 1
+    return snap
+
+
+def load_candidates_from_snapshot(
+    snapshot_dir: str,
+    subject: Optional[Dict[str, Any]] = None,
+    region_scope: str = "big",
+    max_radius: float = math.inf,
+) -> Tuple[Optional[str], pd.DataFrame]:
+    """
+    현재 스냅샷에서 후보군 로드.
+
+    다른 소스와 같이 region_big 후보가 하나도 없으면 빈 DataFrame(컬럼 없음)을 돌려주고,
+    있으면 지역/용도 조건에 맞는 행만 (0건이어도 컬럼은 유지) 돌려준다.
+    max_radius: 적용할 규칙들의 최대 반경 (matrix.rule_bounds, 반경 없는 규칙이 있으면 inf)
+
+    Returns:
+        (버전, DataFrame) — 스냅샷이 없으면 (None, 빈 DataFrame)
+    """
+    snap = attach_snapshot(snapshot_dir)
+    if snap is None:
+        return None, pd.DataFrame()
+    if subject is None:
+        return snap.version, snap.frame()
+
+    from .recommend import prepare_subject
+
+    subj = prepare_subject(subject)
+    region_big = subj.get("region_big")
+    if region_big and not snap.has_region(region_big):
+        return snap.version, pd.DataFrame()
+    return snap.version, snap.frame(subj, region_scope, max_radius=max_radius)
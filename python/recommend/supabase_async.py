@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+supabase_async.py
+
+상주 서버용 비동기 후보군 소스 (Supabase PostgREST 직접 조회)
+- 프로세스당 httpx.AsyncClient 하나를 유지 (keep-alive 커넥션 풀, 요청마다 클라이언트 생성 없음)
+- 같은 조건(region_big, 컬럼)의 동시 요청은 진행 중인 조회 하나를 함께 기다림 (coalescing)
+- 요청 타임아웃, 네트워크 오류/5xx/429 재시도 (지수 백오프)
+- Range 헤더로 페이지 단위 조회: order=id로 페이지 경계를 고정하고, Content-Range의 전체 행 수까지 읽음
+  (서버 max-rows 제한으로 페이지가 요청보다 짧게 와도 잘리지 않음)
+- base URL만 바꾸면 로컬 mock 서버로 그대로 테스트 가능
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import pandas as pd
+
+
+# -----------------------
+# 설정
+# -----------------------
+TABLE = "auction_cases"
+TIMEOUT_SEC = 10.0
+CONNECT_TIMEOUT_SEC = 3.0
+RETRIES = 2
+BACKOFF_SEC = 0.2
+MAX_CONNECTIONS = 10
+PAGE_SIZE = 1000
+ORDER_BY = "id"             # 페이지 경계 고정용 정렬 컬럼 (auction_cases 기본키)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class SupabaseFetchError(RuntimeError):
+    """재시도 후에도 후보군 조회에 실패."""
+
+
+# -----------------------
+# 비동기 후보군 소스
+# -----------------------
+class AsyncCandidateSource:
+    """
+    auction_cases 비동기 조회 클라이언트.
+
+    Args:
+        supabase_url: Supabase 프로젝트 URL (mock 서버 URL도 가능, /rest/v1 이하를 흉내내면 됨)
+        supabase_key: Supabase API 키
+        table: 조회 테이블
+        timeout: 요청 전체 타임아웃 (초)
+        retries: 실패 시 재시도 횟수
+        backoff: 첫 재시도 대기 (초, 재시도마다 2배)
+        max_connections: 커넥션 풀 크기
+        page_size: 페이지당 행 수
+        order_by: 페이지 정렬 컬럼 (유일한 컬럼이어야 페이지 사이에 행이 빠지거나 겹치지 않음)
+    """
+
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        table: str = TABLE,
+        timeout: float = TIMEOUT_SEC,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF_SEC,
+        max_connections: int = MAX_CONNECTIONS,
+        page_size: int = PAGE_SIZE,
+        order_by: str = ORDER_BY,
+    ):
+        self.endpoint = f"{supabase_url.rstrip('/')}/rest/v1/{table}"
+        self.retries = retries
+        self.backoff = backoff
+        self.page_size = page_size
+        self.order_by = order_by
+        self._client = httpx.AsyncClient(
+            headers={
+                "apikey": supabase_key,
+                "Authorization": f"Bearer {supabase_key}",
+                "Accept": "application/json",
+            },
+            timeout=httpx.Timeout(timeout, connect=CONNECT_TIMEOUT_SEC),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._inflight: Dict[Tuple[Any, ...], "asyncio.Task[pd.DataFrame]"] = {}
+        self.stats = {"requests": 0, "coalesced": 0, "http_calls": 0, "retries": 0}
+
+    async def __aenter__(self) -> "AsyncCandidateSource":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def fetch(
+        self,
+        region_big: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        후보군 조회 (load_candidates_from_supabase와 같은 조건).
+
+        같은 조건으로 진행 중인 조회가 있으면 그 결과를 함께 받는다.
+        반환 DataFrame은 동시 요청끼리 공유되므로 수정하지 않는다 (변경이 필요하면 호출하는 쪽에서
+        복사). 추천 함수들은 후보군을 읽기만 하므로 그대로 넘겨도 된다.
+        """
+        key = (region_big or None, tuple(columns) if columns else None)
+        self.stats["requests"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_all(region_big, columns))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        else:
+            self.stats["coalesced"] += 1
+        # 한 요청이 취소돼도 공유 조회는 계속되도록 shield
+        return await asyncio.shield(task)
+
+    async def _fetch_all(self, region_big: Optional[str], columns: Optional[List[str]]) -> pd.DataFrame:
+        params = {"select": ",".join(columns) if columns else "*", "order": self.order_by}
+        if region_big:
+            params["region_big"] = f"eq.{region_big}"
+
+        rows: List[Dict[str, Any]] = []
+        total: Optional[int] = None
+        while total is None or len(rows) < total:
+            start = len(rows)
+            page, total = await self._get_page(params, start, start + self.page_size - 1)
+            if not page:
+                break
+            # 서버 max-rows가 page_size보다 작으면 페이지가 짧게 오므로 받은 만큼만 전진
+            rows.extend(page)
+
+        return pd.DataFrame(rows) if rows else pd.DataFrame()
+
+    async def _get_page(
+        self, params: Dict[str, str], first: int, last: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """한 페이지 조회. (행 목록, Content-Range의 전체 행 수 — 없으면 None)."""
+        headers = {"Range-Unit": "items", "Range": f"{first}-{last}", "Prefer": "count=exact"}
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            self.stats["http_calls"] += 1
+            try:
+                resp = await self._client.get(self.endpoint, params=params, headers=headers)
+                if resp.status_code == 416:
+                    # 범위가 전체 행 수를 넘음 (전체 수를 모르고 끝까지 읽은 경우)
+                    return [], content_range_total(resp.headers.get("Content-Range"))
+                if resp.status_code not in RETRY_STATUS:
+                    resp.raise_for_status()
+                    return resp.json() or [], content_range_total(resp.headers.get("Content-Range"))
+                error: Exception = httpx.HTTPStatusError(
+                    f"status {resp.status_code}", request=resp.request, response=resp
+                )
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                error = e
+            if attempt < self.retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+                delay *= 2
+        raise SupabaseFetchError(f"후보군 조회 실패 ({self.endpoint}): {error}")
+
+
+def content_range_total(value: Optional[str]) -> Optional[int]:
+    """Content-Range ("0-999/5000", "*/0", "0-999/*")의 전체 행 수. 모르면 None."""
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+# -----------------------
+# 프로세스 공용 인스턴스
+# -----------------------
+_SOURCES: Dict[Tuple[str, str], AsyncCandidateSource] = {}
+
+
+def get_candidate_source(supabase_url: str, supabase_key: str, **kwargs: Any) -> AsyncCandidateSource:
+    """(url, key)별 공용 소스 (서버 수명 동안 커넥션 풀 재사용). 실행 중인 이벤트 루프 안에서 호출."""
+    key = (supabase_url, supabase_key)
+    source = _SOURCES.get(key)
+    if source is None:
+        source = _SOURCES[key] = AsyncCandidateSource(supabase_url, supabase_key, **kwargs)
+    return source
+
+
+def source_stats() -> Dict[str, int]:
+    """공용 소스 통계 합계 (requests, coalesced, http_calls, retries)."""
+    total = {"requests": 0, "coalesced": 0, "http_calls": 0, "retries": 0}
+    for source in list(_SOURCES.values()):
+        for k in total:
+            total[k] += source.stats.get(k, 0)
+    return total
+
+
+async def close_candidate_sources() -> None:
+    """공용 소스 정리 (서버 종료 시)."""
+    sources = list(_SOURCES.values())
+    _SOURCES.clear()
+    for source in sources:
+        await source.aclose()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+table.py
+
+단일 규칙 추천용 후보군 테이블 + 술어 (recommend_by_rule 필터 파이프라인)
+- 후보군 DataFrame은 복사/수정하지 않고 읽기 전용으로 공유, 필요한 컬럼만 float 배열로 한 번 변환해 캐시
+- 원본에 없는 파생 컬럼(단가/총감정가)과 auction_days는 배열로만 계산 (전처리 복사본을 만들지 않음)
+- 각 필터는 살아남은 행 위치 배열을 받아 더 좁은 위치 배열을 돌려주는 술어 (단계마다 DataFrame을 만들지 않음)
+- 정렬은 살아남은 행의 정렬 키만으로 하고, 실제 행은 최종 topk만 만든다
+"""
+
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .recommend import (
+    KEY_COLUMNS,
+    recency_distance_positions,
+    sort_distances,
+    subject_days,
+)
+from .utils import (
+    DERIVED_COLUMNS,
+    auction_days_column,
+    derived_columns,
+    haversine_distance_m_within,
+    map_unique,
+    parsed_mask,
+    safe_float,
+    to_float_array,
+    within_pct_mask,
+)
+
+
+# -----------------------
+# 후보군 테이블
+# -----------------------
+class CandidateTable:
+    """
+    후보군 읽기 전용 테이블.
+
+    후보군을 복사해 ensure_derived_columns + ensure_auction_days를 적용한 DataFrame과 같은 값을 보이지만 원본은 건드리지 않는다. 컬럼별 배열은 처음 필요할 때
+    만들어 캐시하므로, 같은 테이블을 여러 대상 물건/규칙 조회에 넘겨 재사용할 수 있다.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._added: Optional[Dict[str, np.ndarray]] = None
+        self._floats: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def all_positions(self) -> np.ndarray:
+        return np.arange(len(self.df))
+
+    @property
+    def added(self) -> Dict[str, np.ndarray]:
+        """원본에 없어서 덧붙는 컬럼 {이름: 값 배열} (전처리 복사본에 추가되던 순서)."""
+        if self._added is None:
+            df = self.df
+            added: Dict[str, np.ndarray] = {}
+            if any(c not in df.columns for c in DERIVED_COLUMNS):
+                derived = derived_columns(df)
+                added.update((c, derived[c]) for c in DERIVED_COLUMNS if c not in df.columns)
+            if "auction_days" not in df.columns and "auction_date" in df.columns:
+                added["auction_days"] = auction_days_column(df["auction_date"])
+            self._added = added
+        return self._added
+
+    def has(self, col: str) -> bool:
+        return col in self.df.columns or col in self.added
+
+    def values(self, col: str, positions: np.ndarray) -> np.ndarray:
+        """컬럼 원래 값 (원본 dtype 그대로)."""
+        if col in self.df.columns:
+            return self.df[col].to_numpy()[positions]
+        return self.added[col][positions]
+
+    def series(self, col: str, positions: np.ndarray) -> pd.Series:
+        """위치 부분집합의 단일 컬럼 Series (원본 컬럼이면 dtype 유지)."""
+        if col in self.df.columns:
+            return self.df[col].iloc[positions]
+        return pd.Series(self.added[col][positions])
+
+    def floats(self, col: str) -> np.ndarray:
+        """컬럼 전체의 float 배열 (safe_float 기준, 변환 불가/없음은 NaN). 캐시."""
+        arr = self._floats.get(col)
+        if arr is None:
+            if col in self.df.columns:
+                arr = to_float_array(self.df[col])
+            elif col in self.added:
+                arr = to_float_array(pd.Series(self.added[col]))
+            else:
+                arr = np.full(len(self.df), np.nan)
+            self._floats[col] = arr
+        return arr
+
+    def rows(self, positions: np.ndarray) -> pd.DataFrame:
+        """위치 배열의 행만 DataFrame으로 (덧붙는 컬럼 포함)."""
+        out = self.df.iloc[positions]
+        if self.added:
+            out = out.assign(**{c: v[positions] for c, v in self.added.items()})
+        return out
+
+
+# -----------------------
+# 술어 (위치 배열 → 더 좁은 위치 배열)
+# -----------------------
+def equal_positions(table: CandidateTable, pos: np.ndarray, col: str, value: Any) -> np.ndarray:
+    """컬럼 값이 value와 같은 위치 (pos 부분집합만 비교)."""
+    values = table.df[col]
+    if len(pos) < len(values):
+        values = values.iloc[pos]
+    return pos[(values == value).to_numpy()]
+
+
+def region_usage_positions(table: CandidateTable, subj: Dict[str, Any], scope: str = "big") -> np.ndarray:
+    """지역 + 동일 용도 (filter_by_region, filter_by_usage와 동일 조건, 앞 단계 통과 행만 비교)."""
+    pos = table.all_positions()
+    region_big = subj.get("region_big")
+    if scope == "big":
+        if region_big:
+            pos = equal_positions(table, pos, "region_big", region_big)
+    elif scope == "mid":
+        region_mid = subj.get("region_mid")
+        if region_big and region_mid:
+            pos = equal_positions(table, pos, "region_big", region_big)
+            pos = equal_positions(table, pos, "region_mid", region_mid)
+
+    usage = subj.get("usage")
+    if usage:
+        pos = equal_positions(table, pos, "usage", usage)
+    return pos
+
+
+def time_window_positions(
+    table: CandidateTable, subj: Dict[str, Any], pos: np.ndarray, days: int
+) -> np.ndarray:
+    """시간 윈도우 (filter_by_time_window와 동일 조건)."""
+    if not table.has("auction_days"):
+        return pos
+    subj_days = subject_days(subj)
+    d = table.floats("auction_days")[pos]
+    with np.errstate(invalid="ignore"):
+        return pos[(d >= subj_days - days) & (d <= subj_days)]
+
+
+def same_key_positions(
+    table: CandidateTable, subj: Dict[str, Any], pos: np.ndarray, extract
+) -> np.ndarray:
+    """주소에서 뽑은 키(단지명/건물)가 대상과 같은 행 (filter_by_same_apartment/building과 동일)."""
+    key = extract(subj.get("address", ""))
+    if not key:
+        return pos
+    df = table.df
+    for col, fn in KEY_COLUMNS.items():
+        if fn is extract and col in df.columns:
+            return pos[(df[col].iloc[pos] == key).to_numpy()]
+    if "address" not in df.columns:
+        return pos[:0]
+    return pos[map_unique(df["address"].iloc[pos], extract) == key]
+
+
+def value_range_positions(
+    table: CandidateTable,
+    subj: Dict[str, Any],
+    pos: np.ndarray,
+    filters: Dict[str, float],
+    index: Optional[Dict[str, Any]] = None,
+) -> np.ndarray:
+    """
+    값 범위 (filter_by_value_range와 동일 조건).
+
+    index가 있으면 인덱스 컬럼은 이진 탐색 결과(라벨)로, 나머지(및 pct 없는 키)는 배열로 판정한다.
+    """
+    if not filters:
+        return pos
+
+    rest = filters
+    if index is not None:
+        indexed = index["columns"]
+        rest = {
+            k: p for k, p in filters.items()
+            if p is None or k.replace("_pct", "") not in indexed
+        }
+
+    for key, pct in rest.items():
+        # key 형식: building_area_pct -> building_area
+        col = key.replace("_pct", "")
+        subj_val = safe_float(subj.get(col))
+        if subj_val is None:
+            continue
+        if not table.has(col):
+            return pos[:0]
+        if pct is None:
+            # 범위 없음: safe_float 변환만 되면 통과 (float NaN도 통과)
+            pos = pos[parsed_mask(table.series(col, pos))]
+        else:
+            pos = pos[within_pct_mask(table.floats(col)[pos], subj_val, pct)]
+
+    if index is not None:
+        from .range_index import range_index_lookup
+
+        hits = range_index_lookup(index, subj, filters)
+        if hits is not None:
+            pos = pos[table.df.index[pos].isin(index["labels"][hits])]
+    return pos
+
+
+def radius_positions(
+    table: CandidateTable, subj: Dict[str, Any], pos: np.ndarray, radius_m: float
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    거리 반경 (filter_by_radius와 동일 조건).
+
+    Returns:
+        (남은 위치, 남은 위치의 거리 — 반경 필터를 적용하지 않았으면 None)
+    """
+    if radius_m <= 0:
+        return pos, None
+    lat, lon = safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
+    if lat is None or lon is None:
+        return pos, None
+    if not table.has("latitude") or not table.has("longitude"):
+        return pos[:0], None
+
+    dist = haversine_distance_m_within(
+        lat, lon, table.floats("latitude")[pos], table.floats("longitude")[pos], radius_m
+    )
+    with np.errstate(invalid="ignore"):
+        keep = dist <= radius_m
+    return pos[keep], dist[keep]
+
+
+# -----------------------
+# 정렬 + topk
+# -----------------------
+def top_positions(
+    table: CandidateTable,
+    subj: Dict[str, Any],
+    pos: np.ndarray,
+    topk: int,
+    radius_m: float = 0,
+    dist: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    최신순 + 가까운 순 상위 topk 위치 (sort_by_recency_then_distance(...).head(topk)와 같은 행/순서).
+
+    dist: 반경 필터에서 이미 계산한 pos의 거리 (없으면 여기서 계산).
+    """
+    has_coords = table.has("latitude") and table.has("longitude")
+    if not has_coords:
+        sort_dist = sort_distances(None, len(pos), subj)
+    else:
+        if dist is None:
+            lat, lon = safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
+            if lat is not None and lon is not None:
+                dist = haversine_distance_m_within(
+                    lat, lon, table.floats("latitude")[pos], table.floats("longitude")[pos],
+                    radius_m if radius_m > 0 else math.inf,
+                )
+        sort_dist = sort_distances(
+            dist, len(pos), subj, table.series("latitude", pos), table.series("longitude", pos)
+        )
+    days = table.values("auction_days", pos) if table.has("auction_days") else None
+    return pos[recency_distance_positions(days, sort_dist)[:topk]]
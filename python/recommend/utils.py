@@ -10,7 +10,7 @@ utils.py
 
 import math
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -21,6 +21,8 @@ import pandas as pd
 # -----------------------
 EPOCH = datetime(1970, 1, 1)
 PYEONG = 3.305785  # 1평 = 3.305785㎡
+EARTH_RADIUS_M = 6371000.0
+BBOX_EPS = 1e-9    # 바운딩 박스 여유 (부동소수 오차로 경계의 후보를 잃지 않도록)
 
 
 # -----------------------
@@ -60,6 +62,35 @@ def safe_float(x: Any) -> Optional[float]:
             return None
 
 
+def to_float_array(values: Any) -> np.ndarray:
+    """safe_float를 컬럼 전체에 적용한 float 배열 (변환 실패/None은 NaN).
+
+    숫자 컬럼은 그대로 변환하고, object 컬럼은 고유값마다 한 번만 safe_float 호출.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return s.to_numpy(dtype=float, na_value=np.nan)
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    conv = np.array(
+        [np.nan if (v := safe_float(u)) is None else v for u in uniques],
+        dtype=float,
+    )
+    out = np.full(len(s), np.nan)
+    valid = codes >= 0
+    out[valid] = conv[codes[valid]]
+    return out
+
+
+def map_unique(values: pd.Series, fn) -> np.ndarray:
+    """고유값마다 fn을 한 번만 호출해서 컬럼 전체에 매핑 (object 배열)."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    for i, u in enumerate(uniques):
+        mapped[i] = fn(u)
+    mapped[-1] = fn(None)
+    return mapped[codes]
+
+
 # -----------------------
 # 거리 계산
 # -----------------------
@@ -68,7 +99,7 @@ def haversine_distance_m(lat1, lon1, lat2, lon2) -> Optional[float]:
     try:
         if None in (lat1, lon1, lat2, lon2):
             return None
-        R = 6371000.0
+        R = EARTH_RADIUS_M
         p1, p2 = math.radians(float(lat1)), math.radians(float(lat2))
         dphi = math.radians(float(lat2) - float(lat1))
         dlmb = math.radians(float(lon2) - float(lon1))
@@ -79,6 +110,92 @@ def haversine_distance_m(lat1, lon1, lat2, lon2) -> Optional[float]:
         return None
 
 
+def haversine_distance_m_array(lat1: float, lon1: float, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """기준점 1개 → 여러 점 하버사인 거리(미터) 벡터 계산. 좌표가 NaN이면 NaN."""
+    return haversine_distance_m_matrix(
+        np.array([float(lat1)]), np.array([float(lon1)]), lat2, lon2
+    )[0]
+
+
+def haversine_distance_m_matrix(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """여러 기준점 × 여러 점 하버사인 거리(미터) 행렬 (len(lat1) × len(lat2))."""
+    R = EARTH_RADIUS_M
+    lat1 = np.asarray(lat1, dtype=float)[:, None]
+    lon1 = np.asarray(lon1, dtype=float)[:, None]
+    lat2 = np.asarray(lat2, dtype=float)[None, :]
+    lon2 = np.asarray(lon2, dtype=float)[None, :]
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlmb = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dlmb / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return R * c
+
+
+def bbox_margin_deg(radius_m: float, lat: float) -> Tuple[float, float]:
+    """
+    반경 radius_m 원을 항상 포함하는 위도/경도 여유(도).
+
+    하버사인 식에서 바로 유도한 보수적 경계라 박스 밖의 점은 반드시 반경 밖이다.
+    - 위도: |Δφ| > r/R 이면 거리 > r
+    - 경도: cosφ1·cosφ2·sin²(Δλ/2) > sin²(r/2R) 이면 거리 > r
+      (φ2는 위도 여유 안에서 cos이 가장 작은 쪽으로 잡음)
+
+    Args:
+        radius_m: 반경(미터, inf면 제한 없음)
+        lat: 기준 위도 (여러 기준점이면 절댓값 최대 위도를 넘기면 모두 포함)
+
+    Returns:
+        (dlat, dlon) — dlon이 inf면 경도 제한 없음 (극 근처 등)
+    """
+    if not math.isfinite(radius_m):
+        return math.inf, math.inf
+    ang = radius_m / EARTH_RADIUS_M
+    dlat = math.degrees(ang) * (1 + BBOX_EPS) + BBOX_EPS
+    edge = abs(lat) + dlat
+    if ang >= math.pi or edge >= 90.0:
+        return dlat, math.inf
+    s = math.sin(ang / 2) / math.sqrt(math.cos(math.radians(abs(lat))) * math.cos(math.radians(edge)))
+    if s >= 1.0:
+        return dlat, math.inf
+    dlon = math.degrees(2 * math.asin(s)) * (1 + BBOX_EPS) + BBOX_EPS
+    return dlat, dlon
+
+
+def bbox_mask(lat: float, lon: float, lat2: np.ndarray, lon2: np.ndarray, radius_m: float) -> np.ndarray:
+    """기준점 반경의 바운딩 박스 안(경계 포함)인 점. 좌표가 NaN이면 False."""
+    dlat, dlon = bbox_margin_deg(radius_m, lat)
+    with np.errstate(invalid="ignore"):
+        mask = np.abs(lat2 - lat) <= dlat
+        if lon - dlon < -180.0 or lon + dlon > 180.0:
+            mask &= ~np.isnan(lon2)     # 날짜변경선을 넘는 박스는 경도 제한 생략
+        else:
+            mask &= np.abs(lon2 - lon) <= dlon
+    return mask
+
+
+def haversine_distance_m_within(
+    lat: float,
+    lon: float,
+    lat2: np.ndarray,
+    lon2: np.ndarray,
+    radius_m: float = math.inf,
+) -> np.ndarray:
+    """
+    기준점 → 여러 점 거리(미터), 반경의 바운딩 박스 안인 점만 정확히 계산.
+
+    박스 밖(반경 밖 확정)은 NaN이므로 `dist <= radius_m` 판정과 반경 안 점의 거리는
+    haversine_distance_m_array와 같다. radius_m이 inf면 전부 계산한다.
+    """
+    if not math.isfinite(radius_m):
+        return haversine_distance_m_array(lat, lon, lat2, lon2)
+    out = np.full(len(lat2), np.nan)
+    idx = np.flatnonzero(bbox_mask(lat, lon, lat2, lon2, radius_m))
+    if idx.size:
+        out[idx] = haversine_distance_m_array(lat, lon, lat2[idx], lon2[idx])
+    return out
+
+
 # -----------------------
 # 파생값 계산
 # -----------------------
@@ -132,6 +249,14 @@ CAT_RETAIL_OFFICE_APT_FACTORY = "RETAIL_OFFICE_APT_FACTORY"
 CAT_PLANT_WAREHOUSE_ETC = "PLANT_WAREHOUSE_ETC"
 CAT_OTHER_BIG = "OTHER_BIG"
 
+CATEGORIES = [
+    CAT_APT_OFFICETEL,
+    CAT_ROWHOUSE_MULTI,
+    CAT_RETAIL_OFFICE_APT_FACTORY,
+    CAT_PLANT_WAREHOUSE_ETC,
+    CAT_OTHER_BIG,
+]
+
 
 def category_from_usage(usage_raw: Any, similar_land: bool = False) -> str:
     """물건 용도(usage)에서 카테고리를 판별."""
@@ -187,6 +312,25 @@ def category_from_usage(usage_raw: Any, similar_land: bool = False) -> str:
     return CAT_OTHER_BIG
 
 
+def categorize_usage(values: Any, similar_land: bool = False) -> pd.Categorical:
+    """
+    usage 컬럼 전체의 카테고리 (category_from_usage와 같은 우선순위).
+
+    고유 usage 문자열마다 한 번만 판별하고 행에 펼친다 (결측은 "" 취급 → OTHER_BIG).
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    mapped = map_unique(s, lambda u: category_from_usage(u, similar_land))
+    return pd.Categorical(mapped, categories=CATEGORIES)
+
+
+def ensure_category_column(df: pd.DataFrame, similar_land: bool = False) -> pd.DataFrame:
+    """category 컬럼이 없으면 usage에서 파생 (categorical dtype)."""
+    if "category" not in df.columns and "usage" in df.columns:
+        df = df.copy()
+        df["category"] = categorize_usage(df["usage"], similar_land)
+    return df
+
+
 # -----------------------
 # 범위 체크
 # -----------------------
@@ -203,23 +347,112 @@ def within_pct(center: Any, value: Any, pct: float) -> bool:
     return (v >= lo) and (v <= hi)
 
 
+def within_pct_mask(values: np.ndarray, center: float, pct: Optional[float]) -> np.ndarray:
+    """within_pct의 배열 버전. 값이 NaN이면 False (pct가 None이면 모두 True)."""
+    values = np.asarray(values, dtype=float)
+    if pct is None:
+        return np.ones(len(values), dtype=bool)
+    lo, hi = center * (1 - pct), center * (1 + pct)
+    with np.errstate(invalid="ignore"):
+        return (values >= lo) & (values <= hi)
+
+
 # -----------------------
 # DataFrame 보강
 # -----------------------
+# derive_fields로 만드는 후보군 파생 컬럼
+DERIVED_COLUMNS = ["building_unit_price", "land_unit_price", "total_appraisal_price"]
+
+
+def parsed_mask(values: pd.Series) -> np.ndarray:
+    """safe_float 변환이 되는 값 (float NaN 포함, None/변환 실패 제외)."""
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return np.ones(len(values), dtype=bool)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    ok = np.array([safe_float(u) is not None for u in uniques] + [False], dtype=bool)[codes]
+    # factorize는 None과 float NaN을 같은 결측 코드로 묶으므로 결측 행만 값별로 판정
+    na = np.flatnonzero(codes < 0)
+    if na.size:
+        ok[na] = [safe_float(v) is not None for v in values.to_numpy()[na]]
+    return ok
+
+
+def _column_floats(df: pd.DataFrame, col: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(float 배열, 변환 가능 여부) — 컬럼이 없으면 row.get()이 None인 것과 같이 전부 변환 불가."""
+    if col not in df.columns:
+        return np.full(len(df), np.nan), np.zeros(len(df), dtype=bool)
+    return to_float_array(df[col]), parsed_mask(df[col])
+
+
+def _derived_output(values: np.ndarray, none: np.ndarray) -> np.ndarray:
+    """행별 derive_fields 결과를 DataFrame으로 모은 것과 같은 dtype (전부 None이면 object None)."""
+    if len(values) and none.all():
+        return np.full(len(values), None, dtype=object)
+    return values
+
+
+def derived_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    derive_fields를 컬럼 단위로 계산 (행마다 호출한 것과 같은 값/dtype).
+
+    Returns:
+        {"building_unit_price", "land_unit_price", "total_appraisal_price": 배열}
+    """
+    b_area, b_area_ok = _column_floats(df, "building_area")
+    l_area, l_area_ok = _column_floats(df, "land_area")
+    b_app, b_app_ok = _column_floats(df, "building_appraisal_price")
+    l_app, l_app_ok = _column_floats(df, "land_appraisal_price")
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # `x not in (None, 0)` 조건: NaN은 통과
+        b_area_py = b_area / PYEONG
+        l_area_py = l_area / PYEONG
+        b_py_ok = b_area_ok & (b_area != 0) & (b_area_py != 0)
+        l_py_ok = l_area_ok & (l_area != 0) & (l_area_py != 0)
+        b_ok = b_app_ok & (b_app != 0)
+        l_ok = l_app_ok & (l_app != 0)
+
+        b_unit_ok = b_ok & b_py_ok
+        l_unit_ok = l_ok & l_py_ok
+        total_ok = b_ok & l_ok
+        b_unit = np.where(b_unit_ok, b_app / np.where(b_unit_ok, b_area_py, 1.0), np.nan)
+        l_unit = np.where(l_unit_ok, l_app / np.where(l_unit_ok, l_area_py, 1.0), np.nan)
+        total = np.where(total_ok, b_app + l_app, np.nan)
+
+    return {
+        "building_unit_price": _derived_output(b_unit, ~b_unit_ok),
+        "land_unit_price": _derived_output(l_unit, ~l_unit_ok),
+        "total_appraisal_price": _derived_output(total, ~total_ok),
+    }
+
+
+def auction_days_column(values: pd.Series) -> np.ndarray:
+    """
+    auction_date → auction_days (고유값마다 한 번만 파싱).
+
+    `values.apply(to_days_from_epoch)`와 같은 dtype: 전부 있으면 int64, 일부 없으면 float64(NaN),
+    전부 없으면 object(None).
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    mapped = [to_days_from_epoch(u) for u in uniques] + [to_days_from_epoch(None)]
+    days = np.array([np.nan if d is None else d for d in mapped], dtype=float)[codes]
+    missing = np.isnan(days)
+    if not len(days) or missing.all():
+        return np.full(len(days), None, dtype=object)
+    if not missing.any():
+        return days.astype(np.int64)
+    return days
+
+
 def ensure_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
     """DataFrame에 파생 컬럼이 없으면 일괄 추가."""
-    need = ["building_unit_price", "land_unit_price", "total_appraisal_price"]
-    missing = [c for c in need if c not in df.columns]
+    missing = [c for c in DERIVED_COLUMNS if c not in df.columns]
     if not missing:
         return df
 
-    derived = []
-    for _, row in df.iterrows():
-        derived.append(derive_fields(dict(row)))
-    ddf = pd.DataFrame(derived)
-    for c in need:
-        if c not in df.columns:
-            df[c] = ddf[c]
+    derived = derived_columns(df)
+    for c in missing:
+        df[c] = derived[c]
     return df
 
 
@@ -227,6 +460,5 @@ def ensure_auction_days(df: pd.DataFrame) -> pd.DataFrame:
     """auction_days 컬럼이 없으면 auction_date에서 파생."""
     if "auction_days" not in df.columns and "auction_date" in df.columns:
         df = df.copy()
-        df["auction_days"] = df["auction_date"].apply(to_days_from_epoch)
+        df["auction_days"] = auction_days_column(df["auction_date"])
     return df
-
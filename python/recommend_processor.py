@@ -11,30 +11,62 @@ C#에서 호출하는 진입점
 Usage:
     python recommend_processor.py <subject_json_path>
     python recommend_processor.py --subject-json '{"property_id": "...", ...}'
+    python recommend_processor.py --serve-worker --worker-port 8765   # warm 워커 실행
+    python recommend_processor.py --serve-worker --worker-port 8765 --metrics-port 9108   # + 지표 노출
+    python recommend_processor.py <subject_json_path> --worker-port 8765
+    python recommend_processor.py <subject_json_path> --stream   # 규칙별 NDJSON 스트리밍
+    python recommend_processor.py <subjects_json_path> --export-xlsx pool.xlsx   # 풀 전체 xlsx 내보내기
+
+빠른 시작:
+- pandas/numpy/yaml, recommend 모듈은 실제 추천 직전에 import (인자 오류 등은 즉시 응답)
+- supabase 클라이언트는 candidates_source=supabase일 때만 import
+- --worker-port(또는 NPLOGIC_WORKER_PORT) 지정 시 미리 떠 있는 warm 워커에
+  로컬 소켓으로 요청을 넘기고, 워커가 없으면 현재 프로세스에서 직접 실행
+- 상주 서버에서는 process_recommend_async 사용 (공용 비동기 Supabase 소스, 커넥션 풀 재사용)
+- --stream / stream_recommend_ndjson: 1순위부터 규칙이 평가되는 즉시 NDJSON 레코드 출력
+- --export-xlsx: 대상 물건 목록 전체 추천을 xlsx로 바로 기록 (recommend.export, constant_memory 모드)
 """
 
 import argparse
 import json
 import os
 import sys
-from typing import Any, Dict, List, Optional
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
 
-import pandas as pd
+_T0 = time.perf_counter()
 
 # 환경변수 또는 설정에서 Supabase 연결 정보
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY", "")
 
-# 로컬 모듈 import
-from recommend import load_config, recommend_by_rule, recommend_all_rules
-from recommend.utils import category_from_usage
+# warm 워커 설정
+WORKER_HOST = "127.0.0.1"
+WORKER_PORT = int(os.environ.get("NPLOGIC_WORKER_PORT", "0") or 0)
+METRICS_PORT = int(os.environ.get("NPLOGIC_METRICS_PORT", "0") or 0)
+WORKER_CONNECT_TIMEOUT = 0.2  # 워커 연결 대기 (초), 없으면 바로 직접 실행
+# 워커가 받는 요청 인자 (process_recommend 인자 중 CLI가 넘기는 것만)
+WORKER_REQUEST_KEYS = (
+    "subject", "candidates_source", "candidates_path", "rule_index",
+    "similar_land", "region_scope", "topk", "config_path", "excel_header_row",
+)
+WORKER_PATH_KEYS = ("candidates_path", "config_path")
+
+# Excel 후보군 헤더 행 (1-based, None이면 자동 탐지 = 제목 행이 위에 있는 데이터디스크)
+EXCEL_HEADER_ROW = 1   # recommend.excel_cache.DEFAULT_HEADER_ROW와 같음 (모듈 import 없이 기본값으로 사용)
+
+# 스트리밍 응답 (규칙별 NDJSON)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 
 def load_candidates_from_supabase(
     supabase_url: str,
     supabase_key: str,
     region_big: Optional[str] = None,
-) -> pd.DataFrame:
+) -> "pd.DataFrame":
     """
     Supabase auction_cases 테이블에서 후보군 로드.
 
@@ -46,6 +78,8 @@ def load_candidates_from_supabase(
     Returns:
         후보군 DataFrame
     """
+    import pandas as pd
+
     try:
         from supabase import create_client
     except ImportError:
@@ -70,25 +104,133 @@ def load_candidates_from_supabase(
     return pd.DataFrame()
 
 
-def load_candidates_from_json(json_path: str) -> pd.DataFrame:
+def load_candidates_from_json(
+    json_path: str,
+    region_big: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> "pd.DataFrame":
     """
     JSON 파일에서 후보군 로드 (테스트/백업용).
+
+    JSON 배열과 NDJSON 모두 지원하며 레코드 단위로 스트리밍 파싱한다.
+    region_big 필터는 Supabase 조회와 동일하게 적용 (오프라인 대체 소스).
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if isinstance(data, list):
-        return pd.DataFrame(data)
-    return pd.DataFrame()
+    from recommend.json_stream import load_json_candidates
 
+    return load_json_candidates(json_path, columns=columns, region_big=region_big)
 
-def load_candidates_from_excel(excel_path: str, sheet_name: Any = 0) -> pd.DataFrame:
+
+def load_candidates_from_excel(
+    excel_path: str,
+    sheet_name: Any = 0,
+    header_row: Optional[int] = EXCEL_HEADER_ROW,
+) -> "pd.DataFrame":
     """
     Excel 파일에서 후보군 로드 (테스트/백업용).
+
+    openpyxl 스트리밍으로 변환한 Parquet 캐시를 사용 (같은 파일 재적재 시 즉시 로드).
+    pyarrow가 없으면 pd.read_excel로 직접 읽는다.
+
+    Args:
+        header_row: 헤더 행 번호 (1-based), None이면 자동 탐지 (데이터디스크처럼 헤더가 10행 등에 있는 시트)
     """
-    return pd.read_excel(excel_path, sheet_name=sheet_name)
+    try:
+        from recommend.excel_cache import CACHE_STATS, load_excel_cached
+        _register_cache_collector("excel", lambda: CACHE_STATS)
+        return load_excel_cached(excel_path, sheet_name=sheet_name, header_row=header_row)
+    except ImportError:
+        import pandas as pd
+        from recommend.excel_cache import HEADER_SCAN_ROWS, detect_header_row
 
+        if header_row is None:
+            head = pd.read_excel(excel_path, sheet_name=sheet_name, header=None, nrows=HEADER_SCAN_ROWS)
+            header_row = detect_header_row(head.astype(object).where(head.notna(), None).values.tolist())
+        return pd.read_excel(excel_path, sheet_name=sheet_name, header=header_row - 1)
 
-def process_recommend(
+
+def load_candidates_from_snapshot(
+    snapshot_dir: str,
+    subject: Optional[Dict[str, Any]] = None,
+    region_scope: str = "big",
+    max_radius: float = float("inf"),
+) -> "pd.DataFrame":
+    """
+    게시된 공유 스냅샷(memory-mapped Arrow)에서 후보군 로드.
+
+    전처리가 끝난 테이블이므로 파생 컬럼 계산 없이, 대상 물건의 지역/용도에 맞는 행만 변환한다.
+    max_radius가 유한하면 그 반경 밖 위도 대역의 행은 변환하지 않는다.
+    """
+    from recommend.snapshot import ATTACH_STATS, load_candidates_from_snapshot as load_snapshot
+
+    _register_cache_collector("snapshot", lambda: ATTACH_STATS)
+    _, df = load_snapshot(snapshot_dir, subject, region_scope, max_radius=max_radius)
+    return df
+
+
+def _max_rule_radius(
+    cfg: Dict[str, Any],
+    subject: Dict[str, Any],
+    rule_index: Optional[int],
+    similar_land: bool,
+) -> float:
+    """적용할 규칙들의 최대 반경 (반경 없는 규칙이 있거나 규칙이 없으면 inf)."""
+    from recommend.matrix import rule_bounds
+    from recommend.recommend import get_rules_for_category
+    from recommend.utils import category_from_usage
+
+    category = category_from_usage(subject.get("usage", ""), similar_land)
+    rules = get_rules_for_category(cfg, category, similar_land)
+    if rule_index is not None:
+        rules = rules[rule_index - 1:rule_index] if 1 <= rule_index <= len(rules) else []
+    if not rules:
+        return float("inf")
+    return rule_bounds(rules)[0]
+
+
+# -----------------------
+# 지표 (metrics.py)
+# -----------------------
+_CACHE_COLLECTORS = set()   # 이미 등록한 캐시 collector (프로세스당 1회)
+
+
+def _register_cache_collector(cache: str, stats: Callable[[], Dict[str, int]]) -> None:
+    """
+    {"hit": n, "miss": n}를 돌려주는 모듈 통계를 캐시 지표로 노출 (캐시 이름당 한 번만 등록).
+
+    collector는 지표 조회 시점에 stats()를 읽으므로 요청마다 다시 등록할 필요가 없다.
+    """
+    if cache in _CACHE_COLLECTORS:
+        return
+    import metrics
+
+    metrics.register_collector(
+        f"cache:{cache}",
+        lambda: [
+            ("nplogic_cache_requests_total", "counter", {"cache": cache, "result": k}, v)
+            for k, v in stats().items()
+        ],
+    )
+    _CACHE_COLLECTORS.add(cache)
+
+
+def _supabase_inflight_stats() -> Dict[str, int]:
+    """진행 중인 Supabase 조회에 합류한 요청 = hit, 새로 조회한 요청 = miss."""
+    from recommend.supabase_async import source_stats
+
+    stats = source_stats()
+    return {"hit": stats["coalesced"], "miss": stats["requests"] - stats["coalesced"]}
+
+
+def _record_metrics(timings: Dict[str, float], candidates_source: str) -> None:
+    """process_recommend 후보군 로드 시간과 처리 건수를 지표로 기록 (규칙별 평가 시간은 iter_recommend에서 기록)."""
+    import metrics
+
+    if "candidates" in timings:
+        metrics.observe("nplogic_candidate_load_seconds", timings["candidates"], source=candidates_source)
+    metrics.inc("nplogic_recommend_total", source=candidates_source)
+
+
+def iter_recommend(
     subject: Dict[str, Any],
     candidates_source: str = "supabase",
     candidates_path: Optional[str] = None,
@@ -97,78 +239,143 @@ def process_recommend(
     region_scope: str = "big",
     topk: int = 10,
     config_path: Optional[str] = None,
-) -> Dict[str, Any]:
+    timings: Optional[Dict[str, float]] = None,
+    candidates_df: Optional["pd.DataFrame"] = None,
+    excel_header_row: Optional[int] = EXCEL_HEADER_ROW,
+) -> Iterator[Dict[str, Any]]:
     """
-    추천 프로세스 실행.
+    추천 실행 (스트리밍).
 
-    Args:
-        subject: 대상 물건 정보 dict
-        candidates_source: "supabase", "json", "excel"
-        candidates_path: JSON/Excel 파일 경로 (source가 json/excel일 때)
-        rule_index: 특정 규칙만 적용 (None이면 전체)
-        similar_land: 토지 유사 모드
-        region_scope: 지역 범위 ("big", "mid")
-        topk: 반환할 최대 건수
-        config_path: 설정 파일 경로
+    규칙을 우선순위(1순위부터) 순으로 평가하면서 규칙마다 레코드를 하나씩 내보내고,
+    마지막에 요약 레코드를 내보낸다. 인자는 process_recommend와 동일.
 
-    Returns:
-        추천 결과 dict
+    Yields:
+        {"type": "rule", "rule_index", "rule_name", "count", "results"} (규칙별)
+        {"type": "summary", "success", "subject", "total_count", "config"} (마지막 1회,
+        후보군이 없으면 "results": [], "message" 포함)
     """
+    timings = timings if timings is not None else {}
+    t = time.perf_counter()
+
+    # 0. 무거운 모듈은 여기서 import (CLI 인자 처리/워커 경로는 import 없이 동작)
+    import metrics
+    import pandas as pd
+    from recommend import iter_recommend_all_rules, load_config, recommend_by_rule
+    from recommend.recommend import get_rules_for_category
+    from recommend.utils import category_from_usage
+
+    timings["imports"] = time.perf_counter() - t
+    t = time.perf_counter()
+
     # 1. 설정 로드
     cfg = load_config(config_path)
+    timings["config"] = time.perf_counter() - t
+    t = time.perf_counter()
 
     # 2. 후보군 로드
-    if candidates_source == "supabase":
+    prepared = False
+    if candidates_df is not None:
+        pass
+    elif candidates_source == "snapshot" and candidates_path:
+        candidates_df = load_candidates_from_snapshot(
+            candidates_path, subject, region_scope,
+            max_radius=_max_rule_radius(cfg, subject, rule_index, similar_land),
+        )
+        prepared = True
+    elif candidates_source == "supabase":
         region_big = subject.get("region_big")
         candidates_df = load_candidates_from_supabase(
             SUPABASE_URL, SUPABASE_KEY, region_big
         )
     elif candidates_source == "json" and candidates_path:
-        candidates_df = load_candidates_from_json(candidates_path)
+        candidates_df = load_candidates_from_json(
+            candidates_path, region_big=subject.get("region_big")
+        )
     elif candidates_source == "excel" and candidates_path:
-        candidates_df = load_candidates_from_excel(candidates_path)
+        candidates_df = load_candidates_from_excel(candidates_path, header_row=excel_header_row)
     else:
         candidates_df = pd.DataFrame()
 
-    if candidates_df.empty:
-        return {
+    timings.setdefault("candidates", time.perf_counter() - t)
+    t = time.perf_counter()
+
+    config = {
+        "rule_index": rule_index,
+        "similar_land": similar_land,
+        "region_scope": region_scope,
+        "topk": topk,
+    }
+
+    # 스냅샷은 지역/용도 필터까지 끝난 상태라 0건이어도 (컬럼이 있으면) 규칙별 빈 결과로 응답
+    if candidates_df.empty and not (prepared and len(candidates_df.columns)):
+        _record_metrics(timings, candidates_source)
+        yield {
+            "type": "summary",
             "success": True,
             "subject": subject,
             "results": [],
             "message": "후보군 데이터가 없습니다.",
+            "total_count": 0,
+            "config": config,
         }
+        return
 
     # 3. 카테고리 판별
     category = category_from_usage(subject.get("usage", ""), similar_land)
+    rules = get_rules_for_category(cfg, category, similar_land)
 
-    # 4. 추천 실행
+    # 4. 추천 실행 (규칙별로 평가되는 즉시 내보냄)
     if rule_index is not None:
-        # 특정 규칙만
-        results = recommend_by_rule(
-            subject=subject,
-            candidates_df=candidates_df,
-            cfg=cfg,
-            rule_index=rule_index,
-            similar_land=similar_land,
-            region_scope=region_scope,
-            topk=topk,
-        )
-        recommendations = {rule_index: results}
+        # 특정 규칙만 (평가도 아래 루프에서 시간을 잴 수 있게 지연)
+        def single_rule() -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+            yield rule_index, recommend_by_rule(
+                subject=subject,
+                candidates_df=candidates_df,
+                cfg=cfg,
+                rule_index=rule_index,
+                similar_land=similar_land,
+                region_scope=region_scope,
+                topk=topk,
+            )
+
+        recommendations = single_rule()
     else:
         # 전체 규칙
-        recommendations = recommend_all_rules(
+        recommendations = iter_recommend_all_rules(
             subject=subject,
             candidates_df=candidates_df,
             cfg=cfg,
             similar_land=similar_land,
             region_scope=region_scope,
             topk=topk,
+            prepared=prepared,
         )
 
-    # 5. 결과 정리
-    total_count = sum(len(v) for v in recommendations.values())
+    # 규칙별 평가 시간 = 다음 결과를 받기까지 걸린 시간 (yield 뒤 소비자가 읽는 시간은 제외,
+    # 1순위에는 규칙 공통 전처리 포함)
+    total_count = 0
+    timings["recommend"] = 0.0
+    t_rule = time.perf_counter()
+    for idx, results in recommendations:
+        now = time.perf_counter()
+        timings.setdefault("first_rule", now - t)
+        timings["recommend"] += now - t_rule
+        metrics.observe("nplogic_rule_eval_seconds", now - t_rule, category=category, rule=idx)
+        total_count += len(results)
+        yield {
+            "type": "rule",
+            "rule_index": idx,
+            "rule_name": rules[idx - 1].get("name") if 1 <= idx <= len(rules) else None,
+            "count": len(results),
+            "results": results,
+        }
+        t_rule = time.perf_counter()
+
+    _record_metrics(timings, candidates_source)
 
-    return {
+    # 5. 요약
+    yield {
+        "type": "summary",
         "success": True,
         "subject": {
             "property_id": subject.get("property_id"),
@@ -176,19 +383,469 @@ def process_recommend(
             "usage": subject.get("usage"),
             "category": category,
         },
-        "rule_results": {
-            str(k): v for k, v in recommendations.items()
-        },
         "total_count": total_count,
-        "config": {
-            "rule_index": rule_index,
-            "similar_land": similar_land,
-            "region_scope": region_scope,
-            "topk": topk,
-        },
+        "config": config,
+    }
+
+
+def process_recommend(
+    subject: Dict[str, Any],
+    candidates_source: str = "supabase",
+    candidates_path: Optional[str] = None,
+    rule_index: Optional[int] = None,
+    similar_land: bool = False,
+    region_scope: str = "big",
+    topk: int = 10,
+    config_path: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    candidates_df: Optional["pd.DataFrame"] = None,
+    excel_header_row: Optional[int] = EXCEL_HEADER_ROW,
+) -> Dict[str, Any]:
+    """
+    추천 프로세스 실행 (iter_recommend 레코드를 모아 한 번에 응답).
+
+    Args:
+        subject: 대상 물건 정보 dict
+        candidates_source: "supabase", "json", "excel", "snapshot"
+        candidates_path: JSON/Excel 파일 경로 또는 스냅샷 디렉토리
+        rule_index: 특정 규칙만 적용 (None이면 전체)
+        similar_land: 토지 유사 모드
+        region_scope: 지역 범위 ("big", "mid")
+        topk: 반환할 최대 건수
+        config_path: 설정 파일 경로
+        timings: 지정 시 단계별 소요 시간(초)을 기록
+        candidates_df: 이미 로드한 후보군 (지정 시 candidates_source 조회 생략)
+        excel_header_row: excel 소스의 헤더 행 번호 (1-based, None이면 자동 탐지)
+
+    Returns:
+        추천 결과 dict
+    """
+    rule_results: Dict[str, List[Dict[str, Any]]] = {}
+    summary: Dict[str, Any] = {}
+    for record in iter_recommend(
+        subject,
+        candidates_source=candidates_source,
+        candidates_path=candidates_path,
+        rule_index=rule_index,
+        similar_land=similar_land,
+        region_scope=region_scope,
+        topk=topk,
+        config_path=config_path,
+        timings=timings,
+        candidates_df=candidates_df,
+        excel_header_row=excel_header_row,
+    ):
+        if record["type"] == "rule":
+            rule_results[str(record["rule_index"])] = record["results"]
+        else:
+            summary = record
+
+    if "message" in summary:
+        return {
+            "success": True,
+            "subject": summary["subject"],
+            "results": [],
+            "message": summary["message"],
+        }
+
+    return {
+        "success": True,
+        "subject": summary["subject"],
+        "rule_results": rule_results,
+        "total_count": summary["total_count"],
+        "config": summary["config"],
     }
 
 
+async def _fetch_candidates_async(
+    subject: Dict[str, Any],
+    candidates_source: str,
+    supabase_url: Optional[str],
+    supabase_key: Optional[str],
+    timings: Dict[str, float],
+) -> Optional["pd.DataFrame"]:
+    """비동기 경로의 후보군 조회 (supabase만, 그 외 소스는 None → process_recommend가 로드)."""
+    if candidates_source != "supabase":
+        return None
+
+    import pandas as pd
+
+    url = supabase_url or SUPABASE_URL
+    key = supabase_key or SUPABASE_KEY
+    t = time.perf_counter()
+    try:
+        from recommend.supabase_async import get_candidate_source
+    except ImportError:
+        # httpx가 없으면 동기 경로와 같이 빈 후보군
+        candidates_df = pd.DataFrame()
+    else:
+        if url and key:
+            _register_cache_collector("supabase_inflight", _supabase_inflight_stats)
+            source = get_candidate_source(url, key)
+            candidates_df = await source.fetch(subject.get("region_big"))
+        else:
+            candidates_df = pd.DataFrame()
+    timings["candidates"] = time.perf_counter() - t
+    return candidates_df
+
+
+async def process_recommend_async(
+    subject: Dict[str, Any],
+    candidates_source: str = "supabase",
+    supabase_url: Optional[str] = None,
+    supabase_key: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    상주 서버(비동기)용 추천 실행.
+
+    Supabase 후보군은 공용 비동기 소스(커넥션 풀 + 동시 요청 coalescing)로 조회하고,
+    추천 계산은 스레드에서 실행해 이벤트 루프를 막지 않는다.
+    나머지 인자는 process_recommend와 동일.
+    """
+    import asyncio
+
+    timings = timings if timings is not None else {}
+    candidates_df = await _fetch_candidates_async(
+        subject, candidates_source, supabase_url, supabase_key, timings
+    )
+
+    return await asyncio.to_thread(
+        process_recommend,
+        subject,
+        candidates_source=candidates_source,
+        timings=timings,
+        candidates_df=candidates_df,
+        **kwargs,
+    )
+
+
+async def iter_recommend_async(
+    subject: Dict[str, Any],
+    candidates_source: str = "supabase",
+    supabase_url: Optional[str] = None,
+    supabase_key: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    **kwargs: Any,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    상주 서버(비동기)용 스트리밍 추천 (iter_recommend 레코드를 규칙마다 바로 내보냄).
+
+    규칙 평가는 레코드 하나씩 스레드에서 진행해 이벤트 루프를 막지 않는다.
+    오류가 나면 {"type": "summary", "success": False, "error"}로 끝낸다.
+    클라이언트가 끊겨 중간에 닫히거나 취소되면 iter_recommend 제너레이터도 닫는다
+    (스레드에서 평가 중이던 규칙이 있으면 그 평가가 끝난 뒤).
+    """
+    import asyncio
+
+    timings = timings if timings is not None else {}
+    loop = asyncio.get_running_loop()
+    records = None
+    pending = None
+    try:
+        candidates_df = await _fetch_candidates_async(
+            subject, candidates_source, supabase_url, supabase_key, timings
+        )
+        records = iter_recommend(
+            subject,
+            candidates_source=candidates_source,
+            timings=timings,
+            candidates_df=candidates_df,
+            **kwargs,
+        )
+        done = object()
+        while True:
+            # shield: 취소돼도 스레드의 next()가 끝날 때까지 pending이 남아 있도록
+            pending = loop.run_in_executor(None, next, records, done)
+            record = await asyncio.shield(pending)
+            pending = None
+            if record is done:
+                break
+            yield record
+    except Exception as e:
+        yield {"type": "summary", "success": False, "error": str(e)}
+    finally:
+        if records is not None:
+            if pending is not None and not pending.done():
+                # 실행 중인 제너레이터는 닫을 수 없으므로 next()가 끝나면 닫음
+                pending.add_done_callback(lambda _f, gen=records: gen.close())
+            else:
+                records.close()
+
+
+async def stream_recommend_ndjson(**kwargs: Any) -> AsyncIterator[bytes]:
+    """
+    HTTP 스트리밍 응답 본문 (NDJSON, 레코드당 한 줄).
+
+    서버에서 StreamingResponse(stream_recommend_ndjson(**request), media_type=NDJSON_MEDIA_TYPE)로 사용.
+    """
+    records = iter_recommend_async(**kwargs)
+    try:
+        async for record in records:
+            yield _ndjson_line(record)
+    finally:
+        # 응답이 중간에 끊기면 내부 스트림도 바로 닫음 (가비지 컬렉션을 기다리지 않음)
+        await records.aclose()
+
+
+def _ndjson_line(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+# -----------------------
+# warm 워커
+# -----------------------
+def _warm_up(snapshot_dir: Optional[str] = None) -> None:
+    """무거운 모듈을 미리 import (워커 시작 시 1회). 스냅샷이 있으면 미리 매핑."""
+    import pandas  # noqa: F401
+    import recommend.recommend  # noqa: F401
+    from recommend import load_config
+
+    load_config()
+
+    if snapshot_dir:
+        from recommend.snapshot import attach_snapshot
+
+        attach_snapshot(snapshot_dir)
+
+
+def serve_worker(
+    port: int,
+    host: str = WORKER_HOST,
+    snapshot_dir: Optional[str] = None,
+    metrics_port: Optional[int] = None,
+) -> None:
+    """
+    warm 워커 실행.
+
+    모듈을 미리 로드한 뒤 로컬 소켓에서 요청(JSON 한 줄 = process_recommend 인자, WORKER_REQUEST_KEYS만 허용)을 받는다.
+    fork 가능한 OS에서는 요청마다 warm 상태의 프로세스를 fork해서 처리하고,
+    그 외(Windows)에는 스레드로 처리한다.
+    snapshot_dir를 주면 공유 스냅샷을 미리 매핑해 두고 fork된 프로세스가 그대로 공유한다.
+    metrics_port를 주면 워커 프로세스에서 지표를 노출하고(serve_metrics),
+    fork된 프로세스가 기록한 지표는 요청이 끝날 때 워커 프로세스로 합친다.
+    """
+    import socketserver
+
+    import metrics
+
+    _warm_up(snapshot_dir)
+
+    forking = hasattr(os, "fork")
+    collector = None
+    if metrics_port:
+        metrics.serve_metrics(metrics_port)
+        if forking:
+            collector = metrics.ForkCollector()
+            collector.start()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            if collector is None:
+                self._handle()
+                return
+            with collector.child():
+                self._handle()
+
+        def _handle(self):
+            with metrics.timer("nplogic_worker_request_seconds"):
+                self._respond()
+
+        def _respond(self):
+            line = self.rfile.readline()
+            stream = False
+            try:
+                kwargs = json.loads(line.decode("utf-8"))
+                stream = kwargs.pop("stream", False)
+                unknown = sorted(set(kwargs) - set(WORKER_REQUEST_KEYS))
+                if unknown:
+                    raise ValueError(f"허용되지 않는 요청 인자: {', '.join(unknown)}")
+                if stream:
+                    # 규칙별 레코드를 평가되는 즉시 한 줄씩 전송
+                    for record in iter_recommend(**kwargs):
+                        self.wfile.write(_ndjson_line(record))
+                        self.wfile.flush()
+                    return
+                result = process_recommend(**kwargs)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+                if stream:
+                    result = {"type": "summary", **result}
+            payload = json.dumps(result, ensure_ascii=False, default=str)
+            self.wfile.write(payload.encode("utf-8") + b"\n")
+
+    base = socketserver.ForkingTCPServer if forking else socketserver.ThreadingTCPServer
+
+    class Server(base):
+        allow_reuse_address = True
+        daemon_threads = True
+
+    with Server((host, port), Handler) as server:
+        ready = {
+            "success": True,
+            "message": f"worker listening on {host}:{server.server_address[1]}",
+        }
+        print(json.dumps(ready, ensure_ascii=False), flush=True)
+        server.serve_forever()
+
+
+def _worker_payload(kwargs: Dict[str, Any], **extra: Any) -> bytes:
+    """워커 요청 한 줄. 파일 경로는 워커의 작업 디렉토리와 무관하도록 절대 경로로 바꿔 보낸다."""
+    payload = dict(kwargs, **extra)
+    for key in WORKER_PATH_KEYS:
+        if payload.get(key):
+            payload[key] = os.path.abspath(payload[key])
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def request_worker(
+    kwargs: Dict[str, Any],
+    port: int,
+    host: str = WORKER_HOST,
+) -> Optional[Dict[str, Any]]:
+    """
+    warm 워커에 추천 요청. 워커가 없거나 응답이 끊기면 None.
+    """
+    import socket
+
+    try:
+        sock = socket.create_connection((host, port), timeout=WORKER_CONNECT_TIMEOUT)
+    except OSError:
+        return None
+
+    try:
+        with sock:
+            sock.settimeout(None)
+            sock.sendall(_worker_payload(kwargs))
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    return json.loads(line.decode("utf-8")) if line else None
+
+
+def stream_worker(
+    kwargs: Dict[str, Any],
+    port: int,
+    host: str = WORKER_HOST,
+) -> Optional[Iterator[Dict[str, Any]]]:
+    """
+    warm 워커에 스트리밍 추천 요청. 워커가 없으면 None, 있으면 레코드 iterator.
+
+    연결이 중간에 끊기면 iterator는 요약 레코드 없이 끝난다.
+    """
+    import socket
+
+    try:
+        sock = socket.create_connection((host, port), timeout=WORKER_CONNECT_TIMEOUT)
+    except OSError:
+        return None
+
+    def records() -> Iterator[Dict[str, Any]]:
+        try:
+            with sock:
+                sock.settimeout(None)
+                sock.sendall(_worker_payload(kwargs, stream=True))
+                with sock.makefile("rb") as f:
+                    for line in f:
+                        record = json.loads(line.decode("utf-8"))
+                        yield record
+                        if record.get("type") == "summary":
+                            return
+        except OSError:
+            return
+
+    return records()
+
+
+def _load_all_candidates(args: argparse.Namespace) -> Optional["pd.DataFrame"]:
+    """CLI 인자의 후보군 소스 전체 (지역 조건 없음). 소스가 없으면 None."""
+    if args.candidates_source == "json" and args.candidates_path:
+        return load_candidates_from_json(args.candidates_path)
+    if args.candidates_source == "excel" and args.candidates_path:
+        return load_candidates_from_excel(args.candidates_path, header_row=args.excel_header_row)
+    if args.candidates_source == "supabase":
+        return load_candidates_from_supabase(SUPABASE_URL, SUPABASE_KEY)
+    return None
+
+
+def publish_candidates(args: argparse.Namespace) -> Dict[str, Any]:
+    """CLI 인자의 후보군 소스를 읽어 공유 스냅샷으로 게시."""
+    from recommend.snapshot import publish_snapshot
+
+    df = _load_all_candidates(args)
+    if df is None:
+        return {"success": False, "error": "게시할 후보군 소스가 없습니다."}
+
+    if df.empty:
+        return {"success": False, "error": "후보군 데이터가 없습니다."}
+    version = publish_snapshot(df, args.publish_snapshot)
+    return {"success": True, "version": version, "rows": len(df)}
+
+
+def export_pool(args: argparse.Namespace, subjects: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """대상 물건 목록 전체 추천 결과를 xlsx로 내보내기 (--export-xlsx)."""
+    from recommend import load_config
+    from recommend.export import export_batch_xlsx
+
+    df = _load_all_candidates(args)
+    if df is None:
+        return {"success": False, "error": "내보낼 후보군 소스가 없습니다."}
+    if df.empty:
+        return {"success": False, "error": "후보군 데이터가 없습니다."}
+
+    stats: Dict[str, int] = {}
+    summary = export_batch_xlsx(
+        args.export_xlsx,
+        subjects,
+        df,
+        load_config(args.config),
+        similar_land=args.similar_land,
+        region_scope=args.region_scope,
+        topk=args.topk,
+        sheet_by=args.sheet_by,
+        stats=stats,
+    )
+    return {"success": True, **summary, "batch": stats}
+
+
+def _stream_main(args: argparse.Namespace, kwargs: Dict[str, Any], timings: Dict[str, float]) -> None:
+    """--stream: 규칙별 레코드를 NDJSON으로 바로 출력 (마지막 줄이 요약 레코드)."""
+    summary = None
+    try:
+        records = stream_worker(kwargs, args.worker_port) if args.worker_port else None
+        if records is None:
+            records = iter_recommend(**kwargs, timings=timings)
+        for record in records:
+            if record.get("type") == "summary":
+                summary = record
+            sys.stdout.buffer.write(_ndjson_line(record))
+            sys.stdout.flush()
+        if summary is None:
+            raise RuntimeError("워커 응답이 중간에 끊겼습니다.")
+    except Exception as e:
+        summary = {"type": "summary", "success": False, "error": str(e)}
+        sys.stdout.buffer.write(_ndjson_line(summary))
+        sys.stdout.flush()
+
+    if args.profile:
+        timings["total"] = time.perf_counter() - _T0
+        print(json.dumps({k: round(v, 4) for k, v in timings.items()}), file=sys.stderr)
+    if not summary.get("success"):
+        sys.exit(1)
+
+
+def _header_row_arg(value: str) -> Optional[int]:
+    """--excel-header-row 값: 양의 정수 또는 auto(None)."""
+    if value.strip().lower() == "auto":
+        return None
+    row = int(value)
+    if row < 1:
+        raise argparse.ArgumentTypeError("헤더 행 번호는 1 이상이어야 합니다.")
+    return row
+
+
 def main():
     """메인 진입점"""
     parser = argparse.ArgumentParser(
@@ -207,12 +864,19 @@ def main():
     parser.add_argument(
         "--candidates-source",
         default="supabase",
-        choices=["supabase", "json", "excel"],
+        choices=["supabase", "json", "excel", "snapshot"],
         help="후보군 데이터 소스 (기본: supabase)",
     )
     parser.add_argument(
         "--candidates-path",
-        help="후보군 JSON/Excel 파일 경로",
+        help="후보군 JSON/Excel 파일 경로 또는 스냅샷 디렉토리",
+    )
+    parser.add_argument(
+        "--excel-header-row",
+        type=_header_row_arg,
+        default=EXCEL_HEADER_ROW,
+        metavar="N|auto",
+        help="excel 후보군 헤더 행 번호 (기본: 1, auto=자동 탐지 — 헤더가 10행 등에 있는 데이터디스크)",
     )
     parser.add_argument(
         "--rule-index",
@@ -240,9 +904,65 @@ def main():
         "--config",
         help="설정 파일 경로",
     )
+    parser.add_argument(
+        "--worker-port",
+        type=int,
+        default=WORKER_PORT,
+        help="warm 워커 포트 (기본: NPLOGIC_WORKER_PORT, 0이면 사용 안 함)",
+    )
+    parser.add_argument(
+        "--serve-worker",
+        action="store_true",
+        help="warm 워커로 실행 (--worker-port에서 요청 대기)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help="--serve-worker 지표 포트 (/metrics, /metrics.json; 기본: NPLOGIC_METRICS_PORT, 0이면 사용 안 함)",
+    )
+    parser.add_argument(
+        "--publish-snapshot",
+        metavar="SNAPSHOT_DIR",
+        help="후보군(--candidates-source/--candidates-path)을 전처리해 공유 스냅샷으로 게시",
+    )
+    parser.add_argument(
+        "--export-xlsx",
+        metavar="XLSX_PATH",
+        help="대상 물건 목록(JSON 배열) 전체의 규칙별 추천을 xlsx로 내보내기 (메모리 상한 고정)",
+    )
+    parser.add_argument(
+        "--sheet-by",
+        default="category",
+        choices=["category", "rule"],
+        help="--export-xlsx 시트 구분 (category=카테고리별, rule=규칙 순위별)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="규칙별 결과를 평가되는 즉시 NDJSON으로 출력 (마지막 줄: total_count/config 요약)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="단계별 소요 시간을 stderr에 JSON으로 출력",
+    )
 
     args = parser.parse_args()
 
+    if args.serve_worker:
+        snapshot_dir = args.candidates_path if args.candidates_source == "snapshot" else None
+        serve_worker(args.worker_port, snapshot_dir=snapshot_dir, metrics_port=args.metrics_port)
+        return
+
+    if args.publish_snapshot:
+        try:
+            print(json.dumps(publish_candidates(args), ensure_ascii=False))
+        except Exception as e:
+            print(json.dumps({"success": False, "error": str(e)}, ensure_ascii=False))
+            sys.exit(1)
+        return
+
     # 대상 물건 정보 로드
     subject = None
     if args.subject_json_str:
@@ -281,22 +1001,57 @@ def main():
         print(json.dumps(error, ensure_ascii=False))
         sys.exit(1)
 
+    if args.export_xlsx:
+        subjects = subject.get("subjects") if isinstance(subject, dict) else subject
+        if not isinstance(subjects, list):
+            error = {
+                "success": False,
+                "error": "--export-xlsx에는 대상 물건 목록(JSON 배열)이 필요합니다.",
+            }
+            print(json.dumps(error, ensure_ascii=False))
+            sys.exit(1)
+        try:
+            print(json.dumps(export_pool(args, subjects), ensure_ascii=False, default=str))
+        except Exception as e:
+            print(json.dumps({"success": False, "error": str(e)}, ensure_ascii=False))
+            sys.exit(1)
+        return
+
+    kwargs = {
+        "subject": subject,
+        "candidates_source": args.candidates_source,
+        "candidates_path": args.candidates_path,
+        "rule_index": args.rule_index,
+        "similar_land": args.similar_land,
+        "region_scope": args.region_scope,
+        "topk": args.topk,
+        "config_path": args.config,
+        "excel_header_row": args.excel_header_row,
+    }
+    timings: Dict[str, float] = {"startup": time.perf_counter() - _T0}
+
+    if args.stream:
+        _stream_main(args, kwargs, timings)
+        return
+
     try:
-        # 추천 실행
-        result = process_recommend(
-            subject=subject,
-            candidates_source=args.candidates_source,
-            candidates_path=args.candidates_path,
-            rule_index=args.rule_index,
-            similar_land=args.similar_land,
-            region_scope=args.region_scope,
-            topk=args.topk,
-            config_path=args.config,
-        )
+        # warm 워커가 있으면 위임, 없으면 직접 실행
+        result = None
+        if args.worker_port:
+            t = time.perf_counter()
+            result = request_worker(kwargs, args.worker_port)
+            if result is not None:
+                timings["worker"] = time.perf_counter() - t
+        if result is None:
+            result = process_recommend(**kwargs, timings=timings)
 
         # JSON 출력
         print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
 
+        if args.profile:
+            timings["total"] = time.perf_counter() - _T0
+            print(json.dumps({k: round(v, 4) for k, v in timings.items()}), file=sys.stderr)
+
     except Exception as e:
         error = {
             "success": False,
@@ -305,6 +1060,10 @@ def main():
         print(json.dumps(error, ensure_ascii=False))
         sys.exit(1)
 
+    # 워커가 돌려준 실패 응답도 직접 실행 시 예외와 같이 종료 코드 1
+    if not result.get("success"):
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+registry_parser.py
+
+등기부등본 구간 텍스트 → process_pdf 출력 필드 파싱
+- 입력: ocr_processor가 나눈 머리말/표제부/갑구/을구 텍스트 (텍스트 레이어 또는 OCR 결과)
+- 출력 형식은 C# 쪽(RegistryOcrService/RegistryRepository)이 받는 owners/rights/land_info 계약을 따름
+- 기존 process_pdf는 고정 샘플 데이터를 돌려주는 stub이었으므로, 이 파서는 기존 출력을 옮긴 것이 아닌 신규 구현
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# -----------------------
+# 구간 텍스트 파싱
+# -----------------------
+_ENTRY_RE = re.compile(r"^\s*(\d{1,3}(?:-\d{1,3})?)\s+([가-힣].*)$")
+_DATE_RE = re.compile(r"(\d{4})\s*년\s*(\d{1,2})\s*월\s*(\d{1,2})\s*일")
+_RECEIPT_RE = re.compile(r"제\s*([\d,]+)\s*호")
+_AMOUNT_RE = re.compile(r"(?:채권최고액|청구금액|전세금|보증금)\s*금?\s*([\d,]+)\s*원")
+_REGNO_RE = re.compile(r"(\d{6}-[\d*]{7})")
+_SHARE_RE = re.compile(r"(\d+)\s*분의\s*(\d+)")
+
+# 권리 등기목적 (갑구/을구 공통)
+RIGHT_TYPES = {
+    "근저당권설정": "근저당",
+    "저당권설정": "저당",
+    "전세권설정": "전세권",
+    "지상권설정": "지상권",
+    "지역권설정": "지역권",
+    "임차권설정": "임차권",
+    "주택임차권": "임차권",
+    "가압류": "가압류",
+    "압류": "압류",
+    "가처분": "가처분",
+    "임의경매개시결정": "임의경매",
+    "강제경매개시결정": "강제경매",
+    "소유권이전청구권가등기": "가등기",
+}
+_HOLDER_KEYS = ("근저당권자", "저당권자", "전세권자", "지상권자", "임차권자", "채권자", "권리자", "가등기권자")
+
+
+def _split_entries(text: str) -> List[Tuple[str, str, str]]:
+    """순위번호로 시작하는 줄 기준으로 (순위번호, 등기목적+이후 텍스트(공백 제거), 본문) 목록 분리."""
+    entries: List[Tuple[str, str, str]] = []
+    for line in (text or "").splitlines():
+        m = _ENTRY_RE.match(line)
+        if m:
+            entries.append((m.group(1), re.sub(r"\s+", "", m.group(2)), line))
+        elif entries:
+            no, purpose, body = entries[-1]
+            entries[-1] = (no, purpose, body + "\n" + line)
+    return entries
+
+
+def _name_after(body: str, keys: Tuple[str, ...]) -> Optional[str]:
+    for key in keys:
+        m = re.search(key + r"\s+([^\s\d]+)", body)
+        if m:
+            return m.group(1)
+    return None
+
+
+def _entry_date(body: str) -> Optional[str]:
+    m = _DATE_RE.search(body)
+    if not m:
+        return None
+    return f"{m.group(1)}-{int(m.group(2)):02d}-{int(m.group(3)):02d}"
+
+
+def _entry_number(body: str) -> Optional[str]:
+    m = _RECEIPT_RE.search(body)
+    d = _DATE_RE.search(body)
+    if not m:
+        return None
+    year = d.group(1) if d else ""
+    return f"{year}-접수-{m.group(1).replace(',', '')}"
+
+
+def parse_owners(gapgu_text: str) -> List[Dict[str, Any]]:
+    """갑구에서 현재 소유자 목록 추출 (마지막 소유권 등기 기준)."""
+    owners: List[Dict[str, Any]] = []
+    for _, purpose, body in _split_entries(gapgu_text):
+        if not purpose.startswith("소유권") or purpose.startswith("소유권이전청구권가등기"):
+            continue
+        found = []
+        for m in re.finditer(r"(?:소유자|공유자)\s+(?:지분\s*(\d+)\s*분의\s*(\d+)\s+)?([^\s\d]+)\s*(\d{6}-[\d*]{7})?", body):
+            share = f"{m.group(2)}/{m.group(1)}" if m.group(1) else None
+            found.append({"name": m.group(3), "regno": m.group(4), "share_ratio": share})
+        if found:
+            owners = found
+    if len(owners) == 1 and owners[0]["share_ratio"] is None:
+        owners[0]["share_ratio"] = "1/1"
+    return owners
+
+
+def parse_rights(gapgu_text: str, eulgu_text: str) -> List[Dict[str, Any]]:
+    """
+    갑구(가압류/압류 등)와 을구(근저당 등)에서 권리 목록 추출.
+
+    순위(order)는 갑구/을구를 합쳐 접수일 → 접수번호 순 (같은 부동산의 권리 간 순위).
+    """
+    rights: List[Dict[str, Any]] = []
+    for text in (gapgu_text, eulgu_text):
+        for _, purpose, body in _split_entries(text):
+            right_type = next((v for k, v in RIGHT_TYPES.items() if purpose.startswith(k)), None)
+            if right_type is None:
+                continue
+            amount = _AMOUNT_RE.search(body)
+            receipt = _RECEIPT_RE.search(body)
+            rights.append({
+                "type": right_type,
+                "order": None,
+                "holder": _name_after(body, _HOLDER_KEYS),
+                "amount": int(amount.group(1).replace(",", "")) if amount else None,
+                "date": _entry_date(body),
+                "number": _entry_number(body),
+                "_receipt": int(receipt.group(1).replace(",", "")) if receipt else 0,
+            })
+
+    # 접수일 없는 항목은 뒤로 (같은 키는 갑구 → 을구, 기재 순서 유지)
+    rights.sort(key=lambda r: (r["date"] is None, r["date"] or "", r["_receipt"]))
+    for i, r in enumerate(rights, start=1):
+        r["order"] = i
+        del r["_receipt"]
+    return rights
+
+
+def parse_land_info(header_text: str, title_text: str) -> Dict[str, Any]:
+    """머리말/표제부에서 소재지, 면적, 지목 추출."""
+    m = re.search(r"\[(?:토지|건물|집합건물)\]\s*(.+?)(?:\s*고유번호|$)", header_text or "", re.M)
+    area = re.findall(r"([\d,]+(?:\.\d+)?)\s*㎡", title_text or "")
+    category = re.search(r"(?:^|\s)(대|전|답|과수원|목장용지|임야|잡종지|공장용지|학교용지|주차장|도로|창고용지)\s+[\d,.]+\s*㎡", title_text or "", re.M)
+    return {
+        "address": m.group(1).strip() if m else None,
+        "area": float(area[-1].replace(",", "")) if area else None,
+        "land_category": category.group(1) if category else None,
+    }
+
+
+def parse_registry_id(header_text: str) -> Dict[str, Optional[str]]:
+    """머리말에서 등기 종류([토지]/[건물]/[집합건물])와 고유번호 추출."""
+    registry_type = re.search(r"\[(토지|건물|집합건물)\]", header_text or "")
+    registry_number = re.search(r"고유번호\s*([\d-]+)", header_text or "")
+    return {
+        "registry_type": registry_type.group(1) if registry_type else None,
+        "registry_number": registry_number.group(1) if registry_number else None,
+    }
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""python/ 아래 모듈(ocr_processor, recommend 등)을 테스트에서 import할 수 있도록 경로 추가."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
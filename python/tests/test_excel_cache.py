@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+데이터디스크 Excel Parquet 캐시 테스트
+
+- 같은 워크북 재적재는 캐시 hit, 워크북이 바뀌면 새로 변환하고 이전 캐시는 정리
+- header_row=None(--excel-header-row auto)이면 제목 행 아래 10행 헤더를 찾음
+- 여러 프로세스가 동시에 다른 워크북을 적재해도 서로의 캐시/index 항목을 지우지 않음
+"""
+
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pyarrow")
+openpyxl = pytest.importorskip("openpyxl")
+
+from recommend import excel_cache  # noqa: E402
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADER = ["id", "usage", "region_big", "latitude", "longitude", "building_area"]
+
+
+def _write_disk(path, rows, header_row=10):
+    """데이터디스크 형태: 1행 제목, 2행 작성일, 5행 단위 표기, header_row행 헤더, 그 아래 데이터."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "물건목록"
+    if header_row > 1:
+        ws.cell(row=1, column=1, value="매각 물건 목록")
+        ws.cell(row=2, column=1, value="작성일: 2024-01-01")
+    if header_row > 5:
+        ws.cell(row=5, column=6, value="(단위: ㎡)")
+    for col, name in enumerate(HEADER, 1):
+        ws.cell(row=header_row, column=col, value=name)
+    for r, row in enumerate(rows, header_row + 1):
+        for col, v in enumerate(row, 1):
+            ws.cell(row=r, column=col, value=v)
+    wb.save(path)
+
+
+ROWS = [
+    (1, "아파트", "서울", 37.5, 127.0, 84.9),
+    (2, "아파트", "서울", 37.51, 127.01, 59.9),
+    (3, "오피스텔", "부산", 35.1, 129.0, 30.2),
+]
+
+
+def test_auto_header_finds_row_10(tmp_path):
+    path = str(tmp_path / "disk.xlsx")
+    _write_disk(path, ROWS)
+    cache = str(tmp_path / "cache")
+
+    df = excel_cache.load_excel_cached(path, header_row=None, cache_dir=cache)
+    assert list(df.columns) == HEADER
+    assert df["id"].tolist() == [1, 2, 3]
+    assert df["building_area"].tolist() == [84.9, 59.9, 30.2]
+
+    # 기본(1행 헤더)은 pd.read_excel(header=0)과 같이 제목 행을 헤더로 읽음
+    assert "id" not in excel_cache.load_excel_cached(path, cache_dir=cache).columns
+    assert excel_cache.load_excel_cached(path, header_row=10, cache_dir=cache)["id"].tolist() == [1, 2, 3]
+
+
+def test_cli_excel_header_row_auto(tmp_path):
+    path = str(tmp_path / "disk.xlsx")
+    _write_disk(path, ROWS)
+    subject = {"property_id": "S", "usage": "아파트", "region_big": "서울", "latitude": 37.5, "longitude": 127.0}
+    env = dict(os.environ, NPLOGIC_CACHE_DIR=str(tmp_path / "cache"), NPLOGIC_WORKER_PORT="0")
+    out = subprocess.run(
+        [sys.executable, "recommend_processor.py", "--subject-json", json.dumps(subject),
+         "--candidates-source", "excel", "--candidates-path", path, "--excel-header-row", "auto"],
+        cwd=PYTHON_DIR, env=env, capture_output=True, check=True,
+    )
+    result = json.loads(out.stdout)
+    assert result["success"]
+    ids = {r["id"] for rows in result["rule_results"].values() for r in rows}
+    assert ids and ids <= {1, 2}
+
+
+def test_cache_hit_and_invalidation_on_change(tmp_path):
+    path = str(tmp_path / "disk.xlsx")
+    cache = str(tmp_path / "cache")
+    _write_disk(path, ROWS, header_row=1)
+
+    stats = dict(excel_cache.CACHE_STATS)
+    assert len(excel_cache.load_excel_cached(path, cache_dir=cache)) == 3
+    old_key = excel_cache.workbook_key(path, cache)
+    assert len(excel_cache.load_excel_cached(path, cache_dir=cache)) == 3
+    assert excel_cache.CACHE_STATS["miss"] - stats["miss"] == 1
+    assert excel_cache.CACHE_STATS["hit"] - stats["hit"] == 1
+
+    _write_disk(path, ROWS[:2], header_row=1)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+    assert excel_cache.load_excel_cached(path, cache_dir=cache)["id"].tolist() == [1, 2]
+    new_key = excel_cache.workbook_key(path, cache)
+    assert new_key != old_key
+    assert not os.path.exists(os.path.join(cache, old_key))
+    assert excel_cache.CACHE_STATS["miss"] - stats["miss"] == 2
+
+
+def test_rekey_keeps_other_workbooks(tmp_path):
+    cache = str(tmp_path / "cache")
+    a, b = str(tmp_path / "a.xlsx"), str(tmp_path / "b.xlsx")
+    _write_disk(a, ROWS, header_row=1)
+    _write_disk(b, ROWS[:1], header_row=1)
+    excel_cache.load_excel_cached(a, cache_dir=cache)
+    key_a = excel_cache.workbook_key(a, cache)
+
+    # 다른 워크북의 키 갱신은 a의 캐시를 건드리지 않음 (index에 없는 디렉토리도 정리 대상이 아님)
+    os.makedirs(os.path.join(cache, "0" * 20))
+    excel_cache.load_excel_cached(b, cache_dir=cache)
+    assert os.path.isdir(os.path.join(cache, key_a))
+    assert os.path.isdir(os.path.join(cache, "0" * 20))
+
+    # 명시적 정리는 참조되지 않는 디렉토리까지 지움
+    assert excel_cache.prune_cache(cache) == ["0" * 20]
+    assert os.path.isdir(os.path.join(cache, key_a))
+
+
+def _load_ids(args):
+    path, cache = args
+    return excel_cache.load_excel_cached(path, cache_dir=cache)["id"].tolist()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork 컨텍스트 전용")
+def test_concurrent_loads_keep_every_entry(tmp_path):
+    cache = str(tmp_path / "cache")
+    paths = []
+    for i in range(8):
+        path = str(tmp_path / f"disk{i}.xlsx")
+        _write_disk(path, [(i, "아파트", "서울", 37.5, 127.0, float(i))], header_row=1)
+        paths.append(path)
+
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        results = pool.map(_load_ids, [(p, cache) for p in paths], chunksize=1)
+    assert results == [[i] for i in range(8)]
+
+    index = excel_cache._load_index(cache)
+    assert sorted(index) == sorted(paths)
+    for entry in index.values():
+        assert os.path.isdir(os.path.join(cache, entry["hash"]))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+풀 전체 추천 결과 xlsx 내보내기 테스트
+
+- 시트 헤더는 첫 행이 아니라 후보군 컬럼 전체(또는 지정 컬럼)로 모든 시트에 같아야 한다
+- 날짜/시각은 문자열이 아니라 날짜 셀로 기록되어야 한다
+"""
+
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from recommend import export
+from recommend.batch import recommend_batch
+
+openpyxl = pytest.importorskip("openpyxl")
+
+CFG = {"rules": {"APT_OFFICETEL": [{"name": "1순위", "radius_m": 0}]}}
+SUBJECTS = [
+    {"property_id": "S1", "usage": "아파트", "region_big": "서울", "latitude": 37.5, "longitude": 127.0},
+    {"property_id": "S2", "usage": "아파트", "region_big": "서울", "latitude": 37.6, "longitude": 127.1},
+]
+
+
+def _candidates():
+    return pd.DataFrame({
+        "id": [1, 2, 3],
+        "usage": "아파트",
+        "region_big": "서울",
+        "latitude": [37.5, 37.51, 37.52],
+        "longitude": [127.0, 127.01, 127.02],
+        "auction_date": pd.to_datetime(["2024-03-01 00:00", "2024-02-01 10:30", None]),
+    })
+
+
+def _read(path):
+    wb = openpyxl.load_workbook(path)
+    return {ws.title: [list(r) for r in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
+
+
+def test_header_is_candidate_union_and_dates_are_cells(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    df = _candidates()
+    export.export_batch_xlsx(path, SUBJECTS, df, CFG, topk=10)
+    sheets = _read(path)
+
+    expected = recommend_batch(SUBJECTS, df, CFG, topk=10)
+    rows = [r for rows in sheets.values() for r in rows[1:]]
+    assert len(rows) == sum(len(r) for by_rule in expected.values() for r in by_rule.values())
+
+    for rows in sheets.values():
+        header = rows[0]
+        assert header[:4] == export.LEAD_COLUMNS
+        assert header[4:] == export.result_columns(df)
+        assert "auction_days" in header and "_apt_name" not in header
+        col = header.index("auction_date")
+        values = {r[header.index("id")]: r[col] for r in rows[1:]}
+        assert values[1] == datetime(2024, 3, 1)
+        assert values[2] == datetime(2024, 2, 1, 10, 30)
+        assert values[3] is None
+
+
+def test_later_keys_are_written_when_columns_given(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    results = [
+        ("S1", {1: [{"_rule_index": 1, "_rule_name": "1순위", "_category": "A", "id": 1}]}),
+        ("S2", {1: [{"_rule_index": 1, "_rule_name": "1순위", "_category": "A", "id": 2,
+                     "sale_date": date(2024, 5, 6)}]}),
+    ]
+    export.write_recommendations_xlsx(path, results, columns=["id", "sale_date"])
+    rows = _read(path)["A"]
+    assert rows[0] == export.LEAD_COLUMNS + ["id", "sale_date"]
+    assert rows[2][-1] == datetime(2024, 5, 6)
+    assert rows[1][-1] is None
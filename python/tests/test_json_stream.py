@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+json_stream 스트리밍 로더 테스트
+
+- chunk 크기와 무관하게 pd.DataFrame(json.load(...))와 같은 dtype/값
+- 단일 JSON 객체 파일은 기존 load_candidates_from_json과 같이 빈 결과
+"""
+
+import json
+import warnings
+
+import pandas as pd
+import pytest
+
+from recommend.json_stream import load_json_candidates
+
+
+def _records():
+    recs = []
+    for i in range(40):
+        rec = {
+            "id": i,
+            "price": None if i < 15 else i * 1.5,   # 앞 chunk는 전부 None
+            "flag": None if i < 20 else i % 2 == 0,
+            "name": None if i < 30 else f"n{i}",
+            "cnt": None if i < 10 else i,
+        }
+        if i >= 25:
+            rec["late"] = i                          # 뒤에서 처음 등장하는 컬럼
+        recs.append(rec)
+    return recs
+
+
+@pytest.mark.parametrize("chunk_rows", [5, 10, 16, 1000])
+def test_chunked_frame_matches_single_frame(tmp_path, chunk_rows):
+    recs = _records()
+    path = tmp_path / "cands.json"
+    path.write_text(json.dumps(recs), encoding="utf-8")
+    expected = pd.DataFrame(recs)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        df = load_json_candidates(str(path), chunk_rows=chunk_rows)
+
+    assert list(df.columns) == list(expected.columns)
+    assert df.dtypes.to_dict() == expected.dtypes.to_dict()
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_single_object_file_is_empty(tmp_path):
+    rec = _records()[0]
+    one_line = tmp_path / "one.json"
+    one_line.write_text(json.dumps(rec) + "\n", encoding="utf-8")
+    pretty = tmp_path / "pretty.json"
+    pretty.write_text(json.dumps(rec, indent=2), encoding="utf-8")
+    ndjson = tmp_path / "two.ndjson"
+    ndjson.write_text("\n".join(json.dumps(r) for r in _records()[:2]), encoding="utf-8")
+
+    assert load_json_candidates(str(one_line)).empty
+    assert load_json_candidates(str(pretty)).empty
+    assert len(load_json_candidates(str(ndjson))) == 2
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+추천 지표 기록 테스트
+
+- 규칙 평가 시간은 규칙마다(rule=규칙 번호) 기록되고, 스트림 소비자가 읽는 시간은 빠져야 한다
+- fork 방식 warm 워커에서 자식 프로세스가 기록한 지표가 워커의 --metrics-port로 조회되어야 한다
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pandas as pd
+import pytest
+
+import metrics
+import recommend_processor as rp
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SUBJECT = {"property_id": "S", "usage": "아파트", "region_big": "서울", "latitude": 37.5, "longitude": 127.0}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    metrics.REGISTRY.reset()
+    yield
+    metrics.REGISTRY.reset()
+
+
+def _candidates():
+    return pd.DataFrame({
+        "id": [1, 2, 3],
+        "usage": "아파트",
+        "region_big": "서울",
+        "latitude": [37.5, 37.51, 37.52],
+        "longitude": [127.0, 127.01, 127.02],
+    })
+
+
+def _rule_eval_series():
+    rows = metrics.snapshot()["histograms"].get("nplogic_rule_eval_seconds", [])
+    return {row["labels"]["rule"]: row for row in rows}
+
+
+def test_rule_eval_seconds_per_rule_without_consumer_time():
+    timings = {}
+    rules = 0
+    for record in rp.iter_recommend(SUBJECT, candidates_df=_candidates(), timings=timings):
+        if record["type"] == "rule":
+            rules += 1
+            time.sleep(0.2)
+
+    series = _rule_eval_series()
+    assert sorted(series, key=int) == [str(i) for i in range(1, rules + 1)]
+    assert all(row["count"] == 1 and row["labels"]["category"] == "APT_OFFICETEL" for row in series.values())
+    assert sum(row["sum"] for row in series.values()) < 0.2
+    assert timings["recommend"] < 0.2
+
+
+def test_single_rule_is_labeled_with_its_index():
+    list(rp.iter_recommend(SUBJECT, candidates_df=_candidates(), rule_index=2))
+    series = _rule_eval_series()
+    assert list(series) == ["2"] and series["2"]["count"] == 1
+
+
+def test_registry_merge_state_adds_child_delta():
+    metrics.inc("nplogic_recommend_total", source="json")
+    child = metrics.Registry()
+    child.register_collector("c", lambda: [("nplogic_cache_requests_total", "counter", {"cache": "x"}, 5)])
+    before = child.export_state()
+    child.observe("nplogic_rule_eval_seconds", 0.02, rule=1)
+    child.inc("nplogic_recommend_total", source="json")
+    child.register_collector("c", lambda: [("nplogic_cache_requests_total", "counter", {"cache": "x"}, 7)])
+
+    metrics.REGISTRY.merge_state(json.loads(json.dumps(metrics.state_delta(child.export_state(), before))))
+    snap = metrics.snapshot()
+    assert snap["counters"]["nplogic_recommend_total"][0]["value"] == 2
+    assert snap["counters"]["nplogic_cache_requests_total"][0]["value"] == 2
+    assert snap["histograms"]["nplogic_rule_eval_seconds"][0]["count"] == 1
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork 방식 워커 전용")
+def test_forking_worker_exposes_child_metrics(tmp_path):
+    cases = tmp_path / "cases.json"
+    cases.write_text(_candidates().to_json(orient="records", force_ascii=False), encoding="utf-8")
+    port, metrics_port = _free_port(), _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "recommend_processor.py", "--serve-worker",
+         "--worker-port", str(port), "--metrics-port", str(metrics_port)],
+        cwd=PYTHON_DIR, stdout=subprocess.PIPE,
+    )
+    try:
+        assert json.loads(proc.stdout.readline())["success"]
+        kwargs = {"subject": SUBJECT, "candidates_source": "json", "candidates_path": str(cases)}
+        assert rp.request_worker(kwargs, port)["success"]
+        assert list(rp.stream_worker(kwargs, port))[-1]["success"]
+
+        url = f"http://127.0.0.1:{metrics_port}/metrics.json"
+        for _ in range(50):
+            with urllib.request.urlopen(url) as resp:
+                snap = json.loads(resp.read())
+            # 자식 프로세스 증분은 요청이 끝난 뒤 비동기로 합쳐짐
+            if [row["value"] for row in snap["counters"].get("nplogic_recommend_total", [])] == [2]:
+                break
+            time.sleep(0.05)
+        assert snap["counters"]["nplogic_recommend_total"] == [{"labels": {"source": "json"}, "value": 2}]
+        assert snap["histograms"]["nplogic_worker_request_seconds"][0]["count"] == 2
+        assert {row["labels"]["rule"] for row in snap["histograms"]["nplogic_rule_eval_seconds"]} >= {"1"}
+        with urllib.request.urlopen(f"http://127.0.0.1:{metrics_port}/metrics") as resp:
+            assert b"nplogic_recommend_total" in resp.read()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        proc.stdout.close()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+ocr_processor 구간 분리 / process_pdf 출력 테스트
+
+- fixtures/registry_expected.json은 C# 쪽(RegistryOcrService/RegistryRepository)이 받는
+  process_pdf 출력 형식 (owners: name/regno/share_ratio, rights: type/order/holder/amount/date/number)
+"""
+
+import json
+import os
+
+import ocr_processor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _fixture_sections():
+    with open(os.path.join(FIXTURES, "registry_text_layer.txt"), encoding="utf-8") as f:
+        return ocr_processor.split_sections(f.read().splitlines())
+
+
+def _expected():
+    with open(os.path.join(FIXTURES, "registry_expected.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_split_sections_finds_target_sections():
+    sections = _fixture_sections()
+    assert set(ocr_processor.TARGET_SECTIONS) <= set(sections)
+    assert sections[ocr_processor.SEC_HEADER].startswith("등기사항전부증명서")
+
+
+def test_process_pdf_text_layer_output(monkeypatch):
+    sections = _fixture_sections()
+    monkeypatch.setattr(ocr_processor, "extract_text_layer", lambda path: (1, sections))
+
+    result = ocr_processor.process_pdf("registry.pdf")
+
+    assert result["success"] is True
+    assert result["ocr"]["mode"] == ocr_processor.MODE_TEXT
+    assert result["ocr"]["pages_ocr"] == 0
+    for key, value in _expected().items():
+        assert result[key] == value
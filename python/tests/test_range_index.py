@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+값 범위 정렬 인덱스 테스트
+
+- 인덱스 조회 결과는 인덱스 없이 마스크로 판정한 결과와 같아야 한다
+- 대상 값이 NaN("nan")이면 후보의 NaN 블록을 잡지 않고 아무 행도 맞지 않아야 한다
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommend.range_index import build_range_index, range_index_lookup
+from recommend.recommend import filter_by_value_range
+from recommend.table import CandidateTable, value_range_positions
+
+FILTERS = {"building_area_pct": 0.2, "land_area_pct": 0.5}
+
+
+def _frame():
+    return pd.DataFrame({
+        "id": range(1, 9),
+        "building_area": pd.Series([10, np.nan, np.nan, 12, "11", None, "abc", 9], dtype=object),
+        "land_area": [30.0, 31.0, np.nan, 29.0, 100.0, 30.0, 30.0, np.nan],
+    })
+
+
+SUBJECTS = [
+    {"building_area": "nan", "land_area": 30},
+    {"building_area": float("nan")},
+    {"building_area": 10, "land_area": "nan"},
+    {"building_area": 10, "land_area": 30},
+    {"building_area": "11"},
+    {"land_area": 30},
+    {"building_area": None, "land_area": None},
+]
+
+
+def test_nan_subject_value_matches_nothing():
+    df = pd.DataFrame({"area": [10, np.nan, np.nan, 12]})
+    index = build_range_index(df, ["area"])
+    assert range_index_lookup(index, {"area": "nan"}, {"area_pct": 0.1}).tolist() == []
+
+
+@pytest.mark.parametrize("subj", SUBJECTS)
+def test_index_matches_mask(subj):
+    df = _frame()
+    index = build_range_index(df)
+    expected = filter_by_value_range(df, subj, FILTERS)["id"].tolist()
+    assert filter_by_value_range(df, subj, FILTERS, index=index)["id"].tolist() == expected
+
+    table = CandidateTable(df)
+    pos = value_range_positions(table, subj, table.all_positions(), FILTERS, index=index)
+    assert df["id"].iloc[pos].tolist() == expected
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+최신순 + 가까운 순 정렬 회귀 테스트
+
+- 기준: 행마다 `haversine_distance_m(...) or inf`로 거리를 구해 sort_values 하던 기존 구현
+- 좌표 컬럼이 object(숫자/문자열/None/float NaN 혼합)여도 같은 순서여야 한다
+  (변환 불가/None/0 → inf, float NaN → NaN으로 맨 뒤)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommend.batch import recommend_batch
+from recommend.recommend import recommend_all_rules, recommend_by_rule, sort_by_recency_then_distance
+from recommend.utils import haversine_distance_m, safe_float
+
+CFG = {"rules": {"APT_OFFICETEL": [{"name": "1순위", "radius_m": 0}]}}
+SUBJECT = {
+    "property_id": "S",
+    "usage": "아파트",
+    "region_big": "서울",
+    "latitude": 37.5,
+    "longitude": 127.0,
+}
+
+
+def _rowwise_ids(df, subj):
+    """기존 행 단위 정렬 결과의 id 순서."""
+    lat, lon = safe_float(subj.get("latitude")), safe_float(subj.get("longitude"))
+
+    def calc_dist(row):
+        r_lat, r_lon = safe_float(row.get("latitude")), safe_float(row.get("longitude"))
+        return haversine_distance_m(lat, lon, r_lat, r_lon) or float("inf")
+
+    df = df.copy()
+    df["_distance"] = df.apply(calc_dist, axis=1)
+    cols, asc = ["_distance"], [True]
+    if "auction_days" in df.columns:
+        cols, asc = ["auction_days", "_distance"], [False, True]
+    return df.sort_values(cols, ascending=asc)["id"].tolist()
+
+
+def _frame(lat, lon, days=None):
+    df = pd.DataFrame({
+        "id": range(1, len(lat) + 1),
+        "usage": "아파트",
+        "region_big": "서울",
+        "latitude": pd.Series(lat, dtype=object),
+        "longitude": pd.Series(lon, dtype=object),
+    })
+    if days is not None:
+        df["auction_days"] = days
+    return df
+
+
+CASES = {
+    "nan_vs_unparseable": _frame([np.nan, "abc", 37.6, 37.5], [127.0] * 4),
+    "none_nan_strings": _frame(
+        [None, np.nan, "37.51", "37,52", "", 37.5, np.nan, "x", 37.49],
+        [127.0, 127.0, "127.0", 127.01, 127.0, 127.0, None, 127.0, np.nan],
+    ),
+    "with_days": _frame(
+        [np.nan, "abc", 37.6, 37.5, None, 37.55, np.nan, "37.7"],
+        [127.0, 127.0, np.nan, 127.0, 127.0, "127.02", 127.0, "abc"],
+        days=[100, 100, 100, 90, 90, 90, np.nan, 100],
+    ),
+}
+
+
+def test_reviewer_repro_order():
+    df = CASES["nan_vs_unparseable"]
+    assert [r["id"] for r in recommend_by_rule(SUBJECT, df, CFG)] == [3, 2, 4, 1]
+    assert [r["id"] for r in recommend_all_rules(SUBJECT, df, CFG)[1]] == [3, 2, 4, 1]
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_recommend_by_rule_matches_rowwise(name):
+    df = CASES[name]
+    ids = [r["id"] for r in recommend_by_rule(SUBJECT, df, CFG, topk=len(df))]
+    assert ids == _rowwise_ids(df, SUBJECT)
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_sort_by_recency_then_distance_matches_rowwise(name):
+    df = CASES[name]
+    assert sort_by_recency_then_distance(df, SUBJECT)["id"].tolist() == _rowwise_ids(df, SUBJECT)
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_matrix_and_batch_match_rowwise(name):
+    df = CASES[name]
+    expected = _rowwise_ids(df, SUBJECT)
+    matrix = recommend_all_rules(SUBJECT, df, CFG, topk=len(df))
+    batch = recommend_batch([SUBJECT], df, CFG, topk=len(df))
+    assert [r["id"] for r in matrix[1]] == expected
+    assert [r["id"] for r in batch["S"][1]] == expected
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+iter_recommend_async 스트림 정리 테스트
+
+- 클라이언트가 끊겨 비동기 스트림이 중간에 닫히거나 취소되면 동기 iter_recommend 제너레이터도 닫혀야 한다
+"""
+
+import asyncio
+import threading
+
+import recommend_processor as rp
+
+
+def _fake_iter_recommend(state, delay=0.0):
+    def records():
+        try:
+            for i in range(1, 4):
+                if delay:
+                    state["started"].set()
+                    threading.Event().wait(delay)
+                yield {"type": "rule", "rule_index": i, "results": []}
+            yield {"type": "summary", "success": True}
+        finally:
+            state["closed"] = True
+
+    def fake(subject, **kwargs):
+        # 참조를 잡아 두어 가비지 컬렉션이 아니라 명시적 close()로만 닫히게 함
+        state["gen"] = records()
+        return state["gen"]
+
+    return fake
+
+
+def test_closing_async_stream_closes_generator(monkeypatch):
+    state = {"closed": False}
+    monkeypatch.setattr(rp, "iter_recommend", _fake_iter_recommend(state))
+
+    async def run():
+        stream = rp.iter_recommend_async({}, candidates_source="json")
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(run())["rule_index"] == 1
+    assert state["closed"]
+
+
+def test_cancel_during_rule_closes_generator_after_it_finishes(monkeypatch):
+    state = {"closed": False, "started": threading.Event()}
+    monkeypatch.setattr(rp, "iter_recommend", _fake_iter_recommend(state, delay=0.2))
+
+    async def run():
+        async def consume():
+            async for _ in rp.iter_recommend_async({}, candidates_source="json"):
+                pass
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.to_thread(state["started"].wait)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # 스레드에서 진행 중이던 규칙 평가가 끝나면 닫힘
+        for _ in range(50):
+            if state["closed"]:
+                break
+            await asyncio.sleep(0.02)
+
+    asyncio.run(run())
+    assert state["closed"]
+
+
+def test_ndjson_stream_closes_inner_stream(monkeypatch):
+    state = {"closed": False}
+    monkeypatch.setattr(rp, "iter_recommend", _fake_iter_recommend(state))
+
+    async def run():
+        body = rp.stream_recommend_ndjson(subject={}, candidates_source="json")
+        await body.__anext__()
+        await body.aclose()
+
+    asyncio.run(run())
+    assert state["closed"]
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+registry_parser 구간 텍스트 파싱 테스트
+
+- fixtures/registry_expected.json은 C# 쪽(RegistryOcrService/RegistryRepository)이 받는
+  process_pdf 출력 형식 (owners: name/regno/share_ratio, rights: type/order/holder/amount/date/number)
+- rights의 순위(order)는 갑구/을구를 합쳐 접수일 → 접수번호 순
+"""
+
+import json
+import os
+
+import ocr_processor
+import registry_parser
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _fixture_sections():
+    with open(os.path.join(FIXTURES, "registry_text_layer.txt"), encoding="utf-8") as f:
+        return ocr_processor.split_sections(f.read().splitlines())
+
+
+def _expected():
+    with open(os.path.join(FIXTURES, "registry_expected.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_parse_owners_and_rights_match_csharp_contract():
+    sections = _fixture_sections()
+    gapgu = sections[ocr_processor.SEC_GAP]
+    eulgu = sections[ocr_processor.SEC_EUL]
+    expected = _expected()
+    assert registry_parser.parse_owners(gapgu) == expected["owners"]
+    assert registry_parser.parse_rights(gapgu, eulgu) == expected["rights"]
+
+
+def test_parse_registry_id_and_land_info():
+    sections = _fixture_sections()
+    header = sections[ocr_processor.SEC_HEADER]
+    expected = _expected()
+    ident = registry_parser.parse_registry_id(header)
+    assert ident == {k: expected[k] for k in ident}
+    assert registry_parser.parse_land_info(header, sections[ocr_processor.SEC_TITLE]) == expected["land_info"]
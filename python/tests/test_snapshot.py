@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+snapshot 게시/조회 테스트
+
+- 타입이 섞인 object 컬럼은 원래 파이썬 값(숫자는 숫자, None과 NaN 구분)으로 돌아와야 한다
+- 게시가 실패하면 .tmp- 작업 디렉토리가 남지 않아야 한다
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommend import snapshot
+
+
+def _frame():
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "region_big": ["서울", "서울", "부산", "서울", "부산"],
+        "usage": ["아파트"] * 5,
+        "latitude": pd.Series([37.5, "37.6", None, np.nan, "abc"], dtype=object),
+        "price": pd.Series([100, "1,200", 3.5, None, True], dtype=object),
+        "note": pd.Series(["a", None, "b", "a", None], dtype=object),
+    })
+
+
+def test_mixed_object_columns_keep_value_types(tmp_path):
+    df = _frame()
+    snapshot.publish_snapshot(df, str(tmp_path), prepared=True)
+    _, loaded = snapshot.load_candidates_from_snapshot(str(tmp_path))
+
+    for col in ("latitude", "price", "note"):
+        assert loaded[col].dtype == object
+        for got, want in zip(loaded[col], df[col]):
+            if isinstance(want, float) and math.isnan(want):
+                assert isinstance(got, float) and math.isnan(got)
+            else:
+                assert type(got) is type(want) and got == want
+
+
+def test_failed_publish_removes_tmp_dir(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(snapshot, "_write_indexes", fail)
+    with pytest.raises(OSError):
+        snapshot.publish_snapshot(_frame(), str(tmp_path), prepared=True)
+    assert not [d for d in os.listdir(tmp_path) if d.startswith(".tmp-")]
+    assert snapshot.current_version(str(tmp_path)) is None
+
+
+def test_stale_tmp_entries_are_swept(tmp_path):
+    stale = tmp_path / ".tmp-crashed"
+    stale.mkdir()
+    old = os.path.getmtime(stale) - snapshot.TMP_MAX_AGE_SEC - 10
+    os.utime(stale, (old, old))
+    fresh = tmp_path / ".tmp-inprogress"
+    fresh.mkdir()
+
+    snapshot.publish_snapshot(_frame(), str(tmp_path), prepared=True)
+    assert not stale.exists()
+    assert fresh.exists()
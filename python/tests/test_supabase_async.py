@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+supabase_async 페이지 조회 테스트 (로컬 mock PostgREST 서버)
+
+- mock 서버는 order 파라미터대로 정렬하고, Range를 max_rows로 잘라 돌려주며, Content-Range에 전체 행 수를 싣는다
+- 페이지가 요청보다 짧게 와도(max-rows) 전체 행을 빠짐/중복 없이 받아야 한다
+"""
+
+import asyncio
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from recommend.supabase_async import AsyncCandidateSource, content_range_total
+
+ROWS = [{"id": i, "region_big": "서울" if i % 3 else "부산", "price": i * 10} for i in range(1, 1001)]
+
+
+class _PostgrestMock:
+    def __init__(self, rows, max_rows=None, fail_first=0, send_total=True):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.fail_first = fail_first
+        self.send_total = send_total
+        self.requests = []
+
+    def __enter__(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", headers=()):
+                self.send_response(status)
+                for k, v in headers:
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                mock.requests.append((query, self.headers.get("Range")))
+                if mock.fail_first > 0:
+                    mock.fail_first -= 1
+                    return self._send(503)
+
+                data = list(mock.rows)
+                if "region_big" in query:
+                    value = query["region_big"][0][len("eq."):]
+                    data = [r for r in data if r["region_big"] == value]
+                if "order" in query:
+                    data.sort(key=lambda r: r[query["order"][0]])
+                first, last = map(int, self.headers["Range"].split("-"))
+                if mock.max_rows:
+                    last = min(last, first + mock.max_rows - 1)
+                total = str(len(data)) if mock.send_total else "*"
+                if first >= len(data) and data:
+                    return self._send(416, headers=[("Content-Range", f"*/{total}")])
+                page = data[first:last + 1]
+                crange = f"{first}-{first + len(page) - 1}/{total}" if page else f"*/{total}"
+                body = json.dumps(page).encode("utf-8")
+                self._send(206 if page else 200, body, [
+                    ("Content-Type", "application/json"),
+                    ("Content-Range", crange),
+                ])
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _fetch(url, region_big=None, **kwargs):
+    async def run():
+        async with AsyncCandidateSource(url, "key", backoff=0.01, **kwargs) as source:
+            return await source.fetch(region_big), source.stats
+
+    return asyncio.run(run())
+
+
+def test_content_range_total():
+    assert content_range_total("0-999/5000") == 5000
+    assert content_range_total("*/0") == 0
+    assert content_range_total("0-999/*") is None
+    assert content_range_total(None) is None
+
+
+@pytest.mark.parametrize("send_total", [True, False])
+def test_short_pages_from_max_rows_are_not_truncated(send_total):
+    rows = ROWS[:]
+    random.Random(1).shuffle(rows)
+    with _PostgrestMock(rows, max_rows=120, send_total=send_total) as mock:
+        df, _ = _fetch(mock.url, page_size=500)
+    assert df["id"].tolist() == [r["id"] for r in ROWS]
+    assert all(q["order"] == ["id"] for q, _ in mock.requests)
+
+
+def test_region_filter_and_retry():
+    with _PostgrestMock(ROWS, fail_first=2) as mock:
+        df, stats = _fetch(mock.url, region_big="부산", page_size=100)
+    expected = [r["id"] for r in ROWS if r["region_big"] == "부산"]
+    assert df["id"].tolist() == expected
+    assert stats["retries"] == 2
+    # 전체 행 수(Content-Range)까지만 요청: 333행 / 100 = 4페이지 + 실패 2회
+    assert stats["http_calls"] == 6
+
+
+def test_empty_result():
+    with _PostgrestMock([]) as mock:
+        df, _ = _fetch(mock.url)
+    assert df.empty